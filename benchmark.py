@@ -0,0 +1,184 @@
+"""
+Бенчмарк разбора страниц на записанных фикстурах (без обращения к сайту).
+
+Для каждой комбинации движка загрузки и движка разбора HTML прогоняет все страницы архива
+фикстур и выводит скорость (страниц в секунду), задержку разбора одной
+страницы (p50/p95/p99) и пиковое потребление памяти процессом. Страница
+разбирается так же, как в frame_parse.py: отпечаток списка кузовов и
+извлечение кузовов с отсевом повторов и навигации (extract_frames). Каждая
+комбинация запускается в отдельном процессе, чтобы пиковая память не
+смешивалась между ними.
+
+    python frame_parse.py --record fixtures/toyota.zip --max-models 20
+    python benchmark.py fixtures/toyota.zip
+    python benchmark.py fixtures/toyota.zip --engine selenium --repeat 1
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from extractors import BACKENDS, DEFAULT_BACKEND, ParsedPage
+from fetchers import ENGINES
+from fixtures import ReplayFetcher
+from frame_parse import extract_frames, setup_driver
+from incremental import page_fingerprint
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb():
+    """Пиковое потребление памяти текущим процессом в МБ"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает КБ, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def parse_model_page(html, page_url, extractor):
+    """Разбор страницы модели, как в frame_parse.py (один разбор HTML на оба шага)"""
+    page = ParsedPage(html, page_url, extractor)
+    page_fingerprint(page)
+    return extract_frames(html, page_url, "", page=page)
+
+
+def bench_http(archive, extractor, repeat):
+    """Загрузка из архива и разбор извлекателем, возвращает задержки разбора"""
+    fetcher = ReplayFetcher(archive)
+
+    latencies = []
+    for _ in range(repeat):
+        for url in fetcher.pages:
+            page = fetcher.get(url)
+            started = time.perf_counter()
+            parse_model_page(page.text, page.url, extractor)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_selenium(archive, extractor, repeat):
+    """Загрузка страниц архива в Chrome и разбор page_source извлекателем"""
+    fetcher = ReplayFetcher(archive)
+    driver = setup_driver()
+
+    latencies = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "page.html")
+            for _ in range(repeat):
+                for url in fetcher.pages:
+                    with open(path, "w", encoding="utf-8") as f:
+                        f.write(fetcher.get(url).text)
+                    started = time.perf_counter()
+                    driver.get("file://" + path)
+                    parse_model_page(driver.page_source, url, extractor)
+                    latencies.append(time.perf_counter() - started)
+    finally:
+        driver.quit()
+    return latencies
+
+
+def run_case(archive, engine, extractor, repeat):
+    """Прогоняет одну комбинацию в текущем процессе"""
+    started = time.perf_counter()
+    if engine == "selenium":
+        latencies = bench_selenium(archive, extractor, repeat)
+    else:
+        latencies = bench_http(archive, extractor, repeat)
+    total = time.perf_counter() - started
+
+    return {
+        "engine": engine,
+        "extractor": extractor,
+        "pages": len(latencies),
+        "seconds": round(total, 3),
+        "pages_per_second": round(len(latencies) / total, 1) if total > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_benchmark(archive, engines, extractors, repeat):
+    """Запускает каждую комбинацию в отдельном процессе"""
+    cases = [(engine, extractor) for engine in engines for extractor in extractors]
+
+    results = []
+    for engine, extractor in cases:
+        completed = subprocess.run(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                archive,
+                "--case",
+                f"{engine}:{extractor}",
+                "--repeat",
+                str(repeat),
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            print(f"{engine}/{extractor}: ошибка\n{completed.stderr.strip()}")
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def print_results(results):
+    header = f"{'движок':<10}{'извлекатель':<14}{'страниц':>8}{'стр/сек':>10}{'p50 мс':>9}{'p95 мс':>9}{'p99 мс':>9}{'RSS МБ':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['engine']:<10}{r['extractor']:<14}{r['pages']:>8}{r['pages_per_second']:>10}"
+            f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['peak_rss_mb']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора страниц на фикстурах")
+    parser.add_argument("archive", help="Архив фикстур (frame_parse.py --record)")
+    parser.add_argument(
+        "--engine",
+        nargs="+",
+        choices=ENGINES,
+        default=["http"],
+        help="Движки для сравнения (по умолчанию http)",
+    )
+    parser.add_argument(
+        "--extractor",
+        nargs="+",
+        choices=list(BACKENDS),
+        default=list(BACKENDS),
+        help=f"Движки разбора HTML (по умолчанию все доступные, основной {DEFAULT_BACKEND})",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Проходов по архиву")
+    parser.add_argument("--output", help="Сохранить результаты в JSON файл")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        # Дочерний процесс: одна комбинация, результат - JSON в stdout
+        engine, extractor = args.case.split(":", 1)
+        print(json.dumps(run_case(args.archive, engine, extractor, args.repeat)))
+        sys.exit(0)
+
+    results = run_benchmark(args.archive, args.engine, args.extractor, args.repeat)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,80 @@
+"""
+Профили запуска Chrome для Selenium.
+
+"full" - страница загружается полностью, как в обычном браузере.
+"lean" - облегченный профиль для извлечения ссылок: не загружаются
+картинки, шрифты, стили и сторонние скрипты (аналитика, jQuery с
+www.epc-data.com), а driver.get возвращается после построения DOM
+(pageLoadStrategy "eager"), не дожидаясь остальных ресурсов. Списки
+моделей и кузовов есть в серверном HTML, поэтому для разбора ничего из
+заблокированного не нужно, а страница загружается быстрее и Chrome
+расходует меньше памяти.
+"""
+
+PROFILE_FULL = "full"
+PROFILE_LEAN = "lean"
+BROWSER_PROFILES = (PROFILE_LEAN, PROFILE_FULL)
+DEFAULT_PROFILE = PROFILE_LEAN
+
+# Запросы, которые не выполняются в профиле lean (шаблоны Network.setBlockedURLs)
+LEAN_BLOCKED_URLS = [
+    # Картинки и иконки
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    # Шрифты
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.eot",
+    # Стили
+    "*.css",
+    "*.css?*",
+    # Сторонние скрипты: аналитика и библиотеки с других доменов
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*googlesyndication.com*",
+    "*doubleclick.net*",
+    "*mc.yandex.ru*",
+    "*://www.epc-data.com/js/*",
+]
+
+# Настройки Chrome профиля lean (запрет картинок на уровне браузера
+# действует и до включения блокировки через CDP)
+_LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+}
+
+
+def apply_profile_options(options, profile=DEFAULT_PROFILE):
+    """
+    Настраивает ChromeOptions под профиль (до запуска драйвера)
+
+    Raises:
+        ValueError: Неизвестный профиль
+    """
+    if profile not in BROWSER_PROFILES:
+        raise ValueError(
+            f"Неизвестный профиль браузера: {profile}. Доступны: {', '.join(BROWSER_PROFILES)}"
+        )
+    if profile == PROFILE_LEAN:
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--disable-remote-fonts")
+        options.add_argument("--disable-extensions")
+        options.add_experimental_option("prefs", _LEAN_PREFS)
+    return options
+
+
+def apply_profile_driver(driver, profile=DEFAULT_PROFILE):
+    """Включает блокировку ресурсов профиля в запущенном драйвере (через CDP)"""
+    if profile == PROFILE_LEAN:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    return driver
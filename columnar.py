@@ -0,0 +1,602 @@
+"""
+Компактный колоночный экспорт результатов парсинга.
+
+toyota_jdm_frames.json удобен для чтения человеком, но для загрузки в
+другие программы медленный: json.load разбирает весь файл и создает
+объект на каждую строку. Экспорт хранит те же данные по колонкам, одна
+строка таблицы - один кузов (модель без кузовов - строка с пустым
+кузовом), детали (deep_crawl.py) - отдельной таблицей.
+
+По умолчанию используется собственный формат .tjc без зависимостей:
+
+    TJCOL\\0\\0\\1 | длина заголовка (uint64) | заголовок JSON | буферы
+
+Строковые колонки хранятся со словарем: в строках - номера (uint32) в
+списке уникальных значений, поэтому повторяющиеся названия моделей
+хранятся один раз. У URL отдельно кодируются префикс (общая часть,
+например адрес модели) и окончание. Загрузка отображает файл в память
+(mmap) и читает только заголовок, колонки разбираются по мере обращения:
+
+    with load_columnar("toyota_jdm_frames.tjc") as table:
+        table.column("frame_name")[10]
+        for model in iter_models(table):
+            ...
+
+Формат Arrow включается расширением файла: .arrow/.feather (Arrow IPC)
+и .parquet пишутся через pyarrow и читаются любыми инструментами Arrow
+(pandas, polars, DuckDB). Для них load_columnar возвращает pyarrow.Table,
+который не нужно закрывать:
+
+    table = load_columnar("toyota_jdm_frames.arrow")
+    models = list(iter_models(table))
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from ndjson_output import iter_ndjson
+from search_index import part_fields
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+MAGIC = b"TJCOL\x00\x00\x01"
+FORMAT_VERSION = 1
+# Номер строки словаря для отсутствующего значения (None)
+NULL = 0xFFFFFFFF
+_ALIGN = 8
+
+KIND_FRAMES = "frames"
+KIND_PARTS = "parts"
+
+# Arrow - только по расширению файла, по умолчанию собственный формат
+# (имя файла не зависит от установленных пакетов)
+ARROW_EXTENSIONS = (".arrow", ".feather", ".parquet")
+DEFAULT_COLUMNAR_PATH = "toyota_jdm_frames.tjc"
+DEFAULT_PARTS_COLUMNAR_PATH = "toyota_jdm_parts.tjc"
+
+# Колонки таблиц: (имя, тип) - "dict" строки со словарем, "url" префикс
+# и окончание URL
+FRAME_COLUMNS = (
+    ("model_name", "dict"),
+    ("model_url", "url"),
+    ("frame_name", "dict"),
+    ("frame_url", "url"),
+)
+PART_COLUMNS = (
+    ("number", "dict"),
+    ("name", "dict"),
+    ("model", "dict"),
+    ("frame", "dict"),
+    ("url", "url"),
+)
+
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def split_url(url):
+    """Префикс (до последнего сегмента пути) и окончание URL"""
+    cut = url.rfind("/", 0, len(url) - 1) + 1
+    return url[:cut], url[cut:]
+
+
+def frame_rows(models):
+    """Строки таблицы кузовов из списка моделей toyota_jdm_frames.json"""
+    for model in models:
+        frames = model.get("frames") or [{}]
+        for frame in frames:
+            yield (
+                model.get("name"),
+                model.get("frame_name_url"),
+                frame.get("frame_name"),
+                frame.get("frame_url"),
+            )
+
+
+def part_rows(records):
+    """Строки таблицы деталей из записей потока deep_crawl.py"""
+    for record in records:
+        fields = part_fields(record)
+        yield tuple(fields[name] for name, _ in PART_COLUMNS)
+
+
+class _DictionaryEncoder:
+    """Номера строк в словаре уникальных значений"""
+
+    def __init__(self):
+        self.codes = array("I")
+        self.values = []
+        self._index = {}
+
+    def add(self, value):
+        if value is None:
+            self.codes.append(NULL)
+            return
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class _UrlEncoder:
+    """URL как префикс и окончание, каждое со своим словарем"""
+
+    def __init__(self):
+        self.prefix = _DictionaryEncoder()
+        self.suffix = _DictionaryEncoder()
+
+    def add(self, url):
+        if url is None:
+            self.prefix.add(None)
+            self.suffix.add(None)
+            return
+        prefix, suffix = split_url(url)
+        self.prefix.add(prefix)
+        self.suffix.add(suffix)
+
+
+class _BufferWriter:
+    """Накапливает буферы данных с выравниванием и их смещения"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, data):
+        offset = self.size
+        data = bytes(data)
+        self.chunks.append(data)
+        padding = _align(len(data)) - len(data)
+        if padding:
+            self.chunks.append(b"\x00" * padding)
+        self.size += len(data) + padding
+        return [offset, len(data)]
+
+    def dictionary(self, encoder):
+        encoded = [value.encode("utf-8") for value in encoder.values]
+        offsets = array("Q", [0])
+        total = 0
+        for value in encoded:
+            total += len(value)
+            offsets.append(total)
+        return {
+            "codes": self.add(encoder.codes),
+            "offsets": self.add(offsets),
+            "data": self.add(b"".join(encoded)),
+            "size": len(encoded),
+        }
+
+
+def _write_native(path, kind, columns, rows, metadata):
+    encoders = [_UrlEncoder() if type_ == "url" else _DictionaryEncoder() for _, type_ in columns]
+    count = 0
+    for row in rows:
+        for encoder, value in zip(encoders, row):
+            encoder.add(value)
+        count += 1
+
+    buffers = _BufferWriter()
+    column_specs = []
+    for (name, type_), encoder in zip(columns, encoders):
+        if type_ == "url":
+            spec = {
+                "prefix": buffers.dictionary(encoder.prefix),
+                "suffix": buffers.dictionary(encoder.suffix),
+            }
+        else:
+            spec = buffers.dictionary(encoder)
+        column_specs.append({"name": name, "type": type_, **spec})
+
+    header = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "kind": kind,
+            "rows": count,
+            "byteorder": sys.byteorder,
+            "metadata": metadata or {},
+            "columns": column_specs,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\x00" * (data_start - len(MAGIC) - 8 - len(header)))
+        for chunk in buffers.chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    return count
+
+
+def _write_arrow(path, kind, columns, rows, metadata):
+    values = [[] for _ in columns]
+    for row in rows:
+        for column, value in zip(values, row):
+            column.append(value)
+    # Словарное кодирование строк средствами Arrow, URL - целиком
+    table = pyarrow.table(
+        {
+            name: pyarrow.array(column, pyarrow.string()).dictionary_encode()
+            for (name, _), column in zip(columns, values)
+        }
+    )
+    table = table.replace_schema_metadata(
+        {"kind": kind, "metadata": json.dumps(metadata or {}, ensure_ascii=False)}
+    )
+
+    tmp_path = path + ".tmp"
+    if path.endswith(".parquet"):
+        pyarrow.parquet.write_table(table, tmp_path, compression="zstd")
+    else:
+        with pyarrow.OSFile(tmp_path, "wb") as sink:
+            with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+
+def write_columnar(path, kind, rows, metadata=None):
+    """
+    Записывает таблицу кузовов или деталей в колоночный файл
+
+    Args:
+        path: Файл результата: .arrow/.feather/.parquet (нужен pyarrow)
+            или собственный формат (любое другое расширение, обычно .tjc)
+        kind: KIND_FRAMES или KIND_PARTS
+        rows: Строки таблицы (frame_rows / part_rows)
+        metadata: Словарь, сохраняемый в заголовке (например, parsing_info)
+
+    Returns:
+        int: Количество строк
+
+    Raises:
+        ValueError: Неизвестный вид таблицы или нет pyarrow для .arrow/.parquet
+    """
+    columns = {KIND_FRAMES: FRAME_COLUMNS, KIND_PARTS: PART_COLUMNS}.get(kind)
+    if columns is None:
+        raise ValueError(f"Неизвестный вид таблицы: {kind}")
+    if path.endswith(ARROW_EXTENSIONS):
+        if pyarrow is None:
+            raise ValueError(f"Для {path} нужен pyarrow (pip install pyarrow)")
+        return _write_arrow(path, kind, columns, rows, metadata)
+    return _write_native(path, kind, columns, rows, metadata)
+
+
+def export_frames(frames_path, output_path=DEFAULT_COLUMNAR_PATH):
+    """
+    Экспорт результата frame_parse.py (JSON или поток NDJSON)
+
+    Returns:
+        int: Количество строк
+    """
+    if frames_path.endswith(".ndjson"):
+        records = sorted(iter_ndjson(frames_path), key=lambda record: record.get("index", 0))
+        metadata = {}
+    else:
+        with open(frames_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = data.get("models", [])
+        metadata = data.get("parsing_info", {})
+    return write_columnar(output_path, KIND_FRAMES, frame_rows(records), metadata)
+
+
+def export_parts(parts_path, output_path=DEFAULT_PARTS_COLUMNAR_PATH):
+    """
+    Экспорт потока деталей deep_crawl.py
+
+    Returns:
+        int: Количество строк
+    """
+    return write_columnar(output_path, KIND_PARTS, part_rows(iter_ndjson(parts_path)))
+
+
+class StringDictionary:
+    """Словарь уникальных строк колонки (смещения + данные UTF-8)"""
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+        self._index = None
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, code):
+        return str(self._data[self._offsets[code] : self._offsets[code + 1]], "utf-8")
+
+    def code(self, value):
+        """Номер строки в словаре (None - строки нет)"""
+        if self._index is None:
+            self._index = {self[code]: code for code in range(len(self))}
+        return self._index.get(value)
+
+
+class DictColumn:
+    """Строковая колонка со словарем"""
+
+    def __init__(self, codes, dictionary):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        code = self.codes[row]
+        return None if code == NULL else self.dictionary[code]
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def rows(self, value):
+        """Номера строк со значением value"""
+        code = self.dictionary.code(value)
+        if code is None:
+            return []
+        return [row for row, row_code in enumerate(self.codes) if row_code == code]
+
+
+class UrlColumn:
+    """Колонка URL: префикс и окончание со своими словарями"""
+
+    def __init__(self, prefix, suffix):
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def __len__(self):
+        return len(self.prefix)
+
+    def __getitem__(self, row):
+        prefix = self.prefix[row]
+        return None if prefix is None else prefix + self.suffix[row]
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+class ColumnarFile:
+    """
+    Таблица из файла собственного формата, отображенного в память
+
+    Raises:
+        ValueError: Файл не в колоночном формате или другой версии
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            if self._mmap[: len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} не является колоночным файлом")
+            (header_length,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+            header_start = len(MAGIC) + 8
+            header = json.loads(self._mmap[header_start : header_start + header_length])
+            if header["version"] != FORMAT_VERSION:
+                raise ValueError(f"{path}: неподдерживаемая версия формата {header['version']}")
+        except Exception:
+            self._mmap.close()
+            raise
+
+        self._data_start = _align(header_start + header_length)
+        self._swap = header["byteorder"] != sys.byteorder
+        self.kind = header["kind"]
+        self.rows = header["rows"]
+        self.metadata = header["metadata"]
+        self._specs = {spec["name"]: spec for spec in header["columns"]}
+        self._columns = {}
+
+    @property
+    def column_names(self):
+        return list(self._specs)
+
+    def _buffer(self, location, typecode=None):
+        offset, length = location
+        start = self._data_start + offset
+        view = memoryview(self._mmap)[start : start + length]
+        self._views.append(view)
+        if typecode is None:
+            return view
+        if self._swap:
+            # Файл записан на машине с другим порядком байт - копия
+            values = array(typecode, view)
+            values.byteswap()
+            return values
+        view = view.cast(typecode)
+        self._views.append(view)
+        return view
+
+    def _dict_column(self, spec):
+        return DictColumn(
+            self._buffer(spec["codes"], "I"),
+            StringDictionary(self._buffer(spec["offsets"], "Q"), self._buffer(spec["data"])),
+        )
+
+    def column(self, name):
+        """
+        Колонка по имени (разбирается при первом обращении)
+
+        Raises:
+            KeyError: Нет такой колонки
+        """
+        column = self._columns.get(name)
+        if column is None:
+            spec = self._specs[name]
+            if spec["type"] == "url":
+                column = UrlColumn(self._dict_column(spec["prefix"]), self._dict_column(spec["suffix"]))
+            else:
+                column = self._dict_column(spec)
+            self._columns[name] = column
+        return column
+
+    def row(self, index):
+        """Строка таблицы в виде словаря"""
+        return {name: self.column(name)[index] for name in self._specs}
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        columns = [(name, self.column(name)) for name in self._specs]
+        for index in range(self.rows):
+            yield {name: column[index] for name, column in columns}
+
+    def close(self):
+        # Отображение нельзя закрыть, пока на него есть memoryview
+        self._columns.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_columnar(path):
+    """
+    Открывает колоночный файл без чтения данных в память
+
+    Returns:
+        ColumnarFile для собственного формата или pyarrow.Table
+        (.arrow/.feather - через memory_map без копирования, .parquet)
+
+    Raises:
+        ValueError: Нет pyarrow для .arrow/.parquet или неверный формат файла
+    """
+    if path.endswith(ARROW_EXTENSIONS):
+        if pyarrow is None:
+            raise ValueError(f"Для {path} нужен pyarrow (pip install pyarrow)")
+        if path.endswith(".parquet"):
+            return pyarrow.parquet.read_table(path, memory_map=True)
+        return pyarrow.ipc.open_file(pyarrow.memory_map(path, "r")).read_all()
+    return ColumnarFile(path)
+
+
+def _column_values(table, name):
+    """
+    Значения столбца как Python объекты
+
+    Элементы столбца pyarrow.Table - скаляры Arrow (пустое значение не
+    равно None), поэтому столбец Arrow переводится в список; столбцы
+    ColumnarFile уже отдают str/None и читаются лениво.
+    """
+    if pyarrow is not None and isinstance(table, pyarrow.Table):
+        return table.column(name).to_pylist()
+    return table.column(name)
+
+
+def iter_models(table):
+    """
+    Модели в формате toyota_jdm_frames.json из таблицы кузовов
+
+    Строки одной модели идут подряд, модель без кузовов - одна строка
+    с пустым кузовом.
+
+    Args:
+        table: Результат load_columnar (ColumnarFile или pyarrow.Table)
+    """
+    model_names = _column_values(table, "model_name")
+    model_urls = _column_values(table, "model_url")
+    frame_names = _column_values(table, "frame_name")
+    frame_urls = _column_values(table, "frame_url")
+    model = None
+    for row in range(len(model_names)):
+        url = model_urls[row]
+        if model is None or url != model["frame_name_url"]:
+            if model is not None:
+                yield model
+            model = {"name": model_names[row], "frame_name_url": url, "frames": [], "frames_count": 0}
+        frame_name = frame_names[row]
+        if frame_name is not None:
+            model["frames"].append({"frame_name": frame_name, "frame_url": frame_urls[row]})
+            model["frames_count"] += 1
+    if model is not None:
+        yield model
+
+
+def add_columnar_arguments(parser, default=DEFAULT_COLUMNAR_PATH):
+    """Добавляет в argparse параметры колоночного экспорта"""
+    parser.add_argument(
+        "--columnar",
+        default=default,
+        help="Колоночный экспорт результата: .tjc (см. columnar.py) или .arrow/.parquet (нужен pyarrow)",
+    )
+    parser.add_argument(
+        "--no-columnar",
+        action="store_true",
+        help="Не сохранять колоночный экспорт",
+    )
+
+
+def _measure(label, load):
+    started = time.perf_counter()
+    result = load()
+    print(f"{label}: {(time.perf_counter() - started) * 1000:.1f} мс")
+    return result
+
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Колоночный экспорт результатов парсинга")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Экспортировать результат")
+    export.add_argument("kind", choices=(KIND_FRAMES, KIND_PARTS))
+    export.add_argument("source", help="toyota_jdm_frames.json / .ndjson или toyota_jdm_parts.ndjson")
+    export.add_argument("output", help="Файл .tjc, .arrow или .parquet")
+
+    info = commands.add_parser("info", help="Описание колоночного файла и время загрузки")
+    info.add_argument("path")
+    info.add_argument("--head", type=int, default=5, help="Сколько строк показать")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Примеры использования:
+
+    # Экспорт кузовов и деталей
+    # python columnar.py export frames toyota_jdm_frames.json toyota_jdm_frames.tjc
+    # python columnar.py export parts toyota_jdm_parts.ndjson toyota_jdm_parts.tjc
+
+    # Содержимое файла
+    # python columnar.py info toyota_jdm_frames.tjc
+
+    args = parse_args()
+    if args.command == "export":
+        export = export_frames if args.kind == KIND_FRAMES else export_parts
+        rows = export(args.source, args.output)
+        print(f"Строк: {rows}, размер {args.output}: {os.path.getsize(args.output)} байт")
+    else:
+        table = _measure("Загрузка", lambda: load_columnar(args.path))
+        if isinstance(table, ColumnarFile):
+            print(f"Вид: {table.kind}, строк: {len(table)}, колонки: {', '.join(table.column_names)}")
+            for index in range(min(args.head, len(table))):
+                print(table.row(index))
+            table.close()
+        else:
+            print(table.schema)
+            print(table.slice(0, args.head).to_pylist())
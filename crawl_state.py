@@ -0,0 +1,124 @@
+"""
+Журнал состояния парсинга кузовов.
+
+Append-only JSONL файл: одна запись на каждую обработанную модель
+(статус, кузова, число попыток, время). Записи пишутся сразу после
+обработки модели, поэтому падение процесса теряет только модели,
+обработка которых еще не закончилась. При повторном запуске уже
+успешно обработанные модели пропускаются.
+
+Журнал относится к одному незавершенному запуску: после сохранения
+результата он удаляется (complete), поэтому следующий запуск загружает
+модели заново, а не повторяет кузова прошлого запуска.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class CrawlJournal:
+    """Журнал состояния парсинга в формате JSONL"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = {}
+
+    def load(self, since=None):
+        """
+        Читает журнал, для каждой модели остается последняя запись
+
+        Args:
+            since: ISO время; более ранние записи игнорируются (None = все)
+
+        Returns:
+            dict: {frame_name_url: запись}
+        """
+        self._records = {}
+        if not os.path.exists(self.path):
+            return self._records
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Недописанная строка после аварийного завершения
+                    continue
+                if since is not None and record["timestamp"] < since:
+                    continue
+                self._records[record["frame_name_url"]] = record
+
+        return self._records
+
+    def get(self, model_url):
+        return self._records.get(model_url)
+
+    def is_done(self, model_url):
+        record = self._records.get(model_url)
+        return record is not None and record["status"] == STATUS_DONE
+
+    def record(self, model_data):
+        """
+        Добавляет в журнал результат обработки модели
+
+        Args:
+            model_data: Словарь модели с ключами name, frame_name_url, frames
+
+        Returns:
+            dict: Записанная запись
+        """
+        with self._lock:
+            previous = self._records.get(model_data["frame_name_url"])
+            record = {
+                "name": model_data["name"],
+                "frame_name_url": model_data["frame_name_url"],
+                # Пустой список кузовов на разобранной странице (с отпечатком) -
+                # тоже результат
+                "status": (
+                    STATUS_DONE
+                    if model_data["frames"] or model_data.get("page_fingerprint")
+                    else STATUS_FAILED
+                ),
+                "frames": model_data["frames"],
+                "attempts": (previous["attempts"] if previous else 0) + 1,
+                "timestamp": datetime.now().isoformat(),
+            }
+            if model_data.get("page_fingerprint"):
+                record["page_fingerprint"] = model_data["page_fingerprint"]
+            self._records[record["frame_name_url"]] = record
+
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            return record
+
+    def reset(self):
+        """Очищает журнал (новый парсинг с нуля)"""
+        with self._lock:
+            self._records = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def complete(self):
+        """Отмечает запуск завершенным: результат сохранен, журнал больше не нужен"""
+        self.reset()
+
+    def compact(self):
+        """Перезаписывает журнал, оставляя только последние записи моделей"""
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in self._records.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
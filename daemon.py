@@ -0,0 +1,575 @@
+"""
+Долгоживущий процесс парсера: периодическое обновление каталога и
+локальный HTTP/JSON API для запросов к нему.
+
+Вместо запуска main.py и frame_parse.py по расписанию (каждый раз новый
+Python, Chrome и webdriver_manager) процесс держит открытыми HTTP клиент,
+кэш ответов, пул WebDriver и ограничитель нагрузки (с уже подобранной
+частотой запросов), а результат - в памяти. Уровни каталога обновляются
+каждый со своим интервалом: список моделей (main.py) и кузова
+(frame_parse.py, инкрементально - загружаются только новые и изменившиеся
+модели).
+
+Запросы к API обслуживаются из памяти:
+
+    GET  /health                      состояние и расписание обновлений
+    GET  /models?q=allion&limit=50    модели (без кузовов)
+    GET  /models/<название>           модель с кузовами
+    GET  /frames?code=ZZE121          модели с кузовом
+    GET  /frames?prefix=ZZE&limit=20  кузова по началу кода
+    POST /refresh/<models|frames>     обновить уровень вне расписания
+
+    python daemon.py --port 8765 --models-every 24h --frames-every 6h
+"""
+
+import argparse
+import bisect
+import json
+import os
+import re
+import signal
+import threading
+import time
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from browser_profile import BROWSER_PROFILES, DEFAULT_PROFILE
+from driver_pool import DriverPool
+from fetchers import ENGINES
+from fixtures import open_fetcher
+from frame_parse import USER_AGENTS, scrape_toyota_frames, setup_driver
+from http_cache import ResponseCache, add_cache_arguments
+from logging_setup import add_logging_arguments, logging_options, setup_logging
+from main import scrape_toyota_models
+from rate_limit import AdaptiveRateLimiter
+from search_index import normalize_code, split_frame_codes
+from snapshots import DEFAULT_SNAPSHOT_DIR, canonical_models, content_hash
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+LEVEL_MODELS = "models"
+LEVEL_FRAMES = "frames"
+# Порядок обновления, если подошло время нескольких уровней
+LEVELS = (LEVEL_MODELS, LEVEL_FRAMES)
+
+_INTERVAL_RE = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+_INTERVAL_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_interval(value):
+    """
+    Интервал "90", "30m", "6h", "1d" в секундах
+
+    Raises:
+        ValueError: Неверный формат
+    """
+    match = _INTERVAL_RE.match(value.strip().lower())
+    if not match:
+        raise ValueError(f"Неверный интервал: {value} (пример: 90, 30m, 6h, 1d)")
+    return float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+class CatalogState:
+    """Каталог в памяти: модели с кузовами и индекс по кодам кузовов"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.models = []
+        self.version = None
+        self.loaded_at = None
+        self._by_name = {}
+        self._codes = {}
+        self._sorted_codes = []
+
+    def load(self, models_path, frames_path):
+        """
+        Загружает результаты парсинга (кузова - из frames_path, модели без
+        результата по кузовам - из models_path)
+
+        Returns:
+            bool: True - каталог загружен, False - файлов еще нет
+        """
+        if os.path.exists(frames_path):
+            path = frames_path
+        elif os.path.exists(models_path):
+            path = models_path
+        else:
+            return False
+        with open(path, "r", encoding="utf-8") as f:
+            models = json.load(f).get("models", [])
+
+        by_name = {}
+        codes = {}
+        for model in models:
+            by_name.setdefault(model.get("name", "").lower(), model)
+            for frame in model.get("frames", []):
+                entry = {
+                    "model": model.get("name"),
+                    "model_url": model.get("frame_name_url"),
+                    "frame_name": frame.get("frame_name"),
+                    "frame_url": frame.get("frame_url"),
+                }
+                for code in split_frame_codes(frame.get("frame_name", "")):
+                    codes.setdefault(code, []).append(entry)
+
+        # Новый каталог подменяет старый целиком - запросы видят
+        # либо прошлую, либо новую версию
+        with self._lock:
+            self.models = models
+            self.version = content_hash(canonical_models(models))[:16]
+            self.loaded_at = datetime.now().isoformat()
+            self._by_name = by_name
+            self._codes = codes
+            self._sorted_codes = sorted(codes)
+        return True
+
+    def list_models(self, query=None, limit=None):
+        """Модели без кузовов, query - подстрока названия"""
+        with self._lock:
+            models = self.models
+        query = (query or "").lower()
+        result = [
+            {
+                "name": model.get("name"),
+                "frame_name_url": model.get("frame_name_url"),
+                "frames_count": model.get("frames_count", len(model.get("frames", []))),
+            }
+            for model in models
+            if query in model.get("name", "").lower()
+        ]
+        return result[:limit] if limit else result
+
+    def get_model(self, name):
+        """Модель с кузовами по названию (без учета регистра) или None"""
+        with self._lock:
+            return self._by_name.get(name.lower())
+
+    def find_frames(self, code=None, prefix=None, limit=100):
+        """Кузова по точному коду или по началу кода"""
+        with self._lock:
+            codes = self._codes
+            sorted_codes = self._sorted_codes
+        if code:
+            return codes.get(normalize_code(code), [])[:limit]
+        key = normalize_code(prefix or "")
+        result = []
+        position = bisect.bisect_left(sorted_codes, key)
+        while position < len(sorted_codes) and sorted_codes[position].startswith(key):
+            result.extend(codes[sorted_codes[position]])
+            if len(result) >= limit:
+                break
+            position += 1
+        return result[:limit]
+
+
+class CatalogDaemon:
+    """Расписание обновлений уровней каталога и открытые ресурсы парсера"""
+
+    def __init__(
+        self,
+        intervals,
+        engine="http",
+        workers=2,
+        delay_between_requests=1.0,
+        max_requests_per_second=5.0,
+        cache=None,
+        browser_profile=DEFAULT_PROFILE,
+        models_path="toyota_jdm_models.json",
+        frames_path="toyota_jdm_frames.json",
+        snapshot_dir=DEFAULT_SNAPSHOT_DIR,
+        initial_refresh=True,
+        log_options=None,
+    ):
+        """
+        Args:
+            intervals: {уровень: интервал обновления в секундах}
+                (уровни LEVELS; уровень без интервала обновляется только
+                по запросу POST /refresh)
+            engine: Движок загрузки страниц кузовов
+            workers: Количество параллельных воркеров
+            delay_between_requests: Начальный интервал между запросами
+            max_requests_per_second: Верхняя граница частоты запросов
+            cache: ResponseCache для условных запросов
+            browser_profile: Профиль Chrome для Selenium
+            models_path: Файл списка моделей
+            frames_path: Файл результата по кузовам
+            snapshot_dir: Каталог снимков (None = не сохранять)
+            initial_refresh: Обновить все уровни сразу после запуска
+                (False - первое обновление через интервал)
+            log_options: Параметры setup_logging (см. logging_setup.py)
+        """
+        self.intervals = intervals
+        self.engine = engine
+        self.workers = workers
+        self.delay_between_requests = delay_between_requests
+        self.max_requests_per_second = max_requests_per_second
+        self.browser_profile = browser_profile
+        self.models_path = models_path
+        self.frames_path = frames_path
+        self.snapshot_dir = snapshot_dir
+        self.log_options = log_options
+        self.logger = setup_logging("toyota_daemon", **(log_options or {}))
+        self.state = CatalogState()
+
+        # Ресурсы, которые живут между обновлениями. Для движка selenium
+        # драйверы запускаются сразу (как в frame_parse.py), для http -
+        # только при запасной попытке через Selenium
+        self.fetcher = open_fetcher(pool_size=max(workers, 10), cache=cache)
+        pool_size = workers + 1 if engine == "selenium" else workers
+        self.drivers = DriverPool(
+            lambda user_agent: setup_driver(user_agent=user_agent, profile=browser_profile),
+            USER_AGENTS,
+            max_size=pool_size,
+            prewarm=pool_size if engine == "selenium" else 0,
+            logger=self.logger,
+        )
+        initial_rate = (
+            1 / delay_between_requests if delay_between_requests > 0 else max_requests_per_second
+        )
+        self.limiter = AdaptiveRateLimiter(
+            max_in_flight=workers,
+            requests_per_second=initial_rate,
+            min_rate=min(0.1, initial_rate),
+            max_rate=max(max_requests_per_second, initial_rate),
+        )
+
+        now = time.monotonic()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._schedule = {}
+        for level in LEVELS:
+            interval = intervals.get(level)
+            if initial_refresh:
+                next_run = now
+            else:
+                next_run = now + interval if interval else None
+            self._schedule[level] = {
+                "interval": interval,
+                "next_run": next_run,
+                "running": False,
+                "last_started": None,
+                "last_finished": None,
+                "last_seconds": None,
+                "last_result": None,
+                "last_error": None,
+            }
+        self._thread = threading.Thread(target=self._run, name="refresh", daemon=True)
+
+    def start(self):
+        if self.state.load(self.models_path, self.frames_path):
+            self.logger.info(
+                "Загружен каталог: моделей %s, версия %s", len(self.state.models), self.state.version
+            )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает расписание и закрывает загрузчик и драйверы"""
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.fetcher.close()
+        self.drivers.close()
+
+    def trigger(self, level):
+        """
+        Запускает обновление уровня вне расписания
+
+        Raises:
+            ValueError: Неизвестный уровень
+        """
+        if level not in self._schedule:
+            raise ValueError(f"Неизвестный уровень: {level}. Доступны: {', '.join(LEVELS)}")
+        with self._lock:
+            self._schedule[level]["next_run"] = time.monotonic()
+        self._wakeup.set()
+
+    def status(self):
+        """Состояние каталога и расписания (для /health)"""
+        now = time.monotonic()
+        with self._lock:
+            levels = {}
+            for level, entry in self._schedule.items():
+                levels[level] = {
+                    key: value for key, value in entry.items() if key != "next_run"
+                }
+                next_run = entry["next_run"]
+                levels[level]["next_run_in"] = (
+                    None if next_run is None else round(max(0.0, next_run - now), 1)
+                )
+        return {
+            "version": self.state.version,
+            "loaded_at": self.state.loaded_at,
+            "models": len(self.state.models),
+            "levels": levels,
+            "rate_limiter": self.limiter.snapshot(),
+            "driver_pool": dict(self.drivers.stats),
+        }
+
+    def _due_level(self):
+        """Уровень, время обновления которого подошло, и пауза до следующего"""
+        now = time.monotonic()
+        wait_for = None
+        with self._lock:
+            for level in LEVELS:
+                next_run = self._schedule[level]["next_run"]
+                if next_run is None:
+                    continue
+                if next_run <= now:
+                    return level, 0
+                wait_for = next_run - now if wait_for is None else min(wait_for, next_run - now)
+        return None, wait_for
+
+    def _run(self):
+        while not self._stopped.is_set():
+            level, wait_for = self._due_level()
+            if level is None:
+                self._wakeup.wait(wait_for)
+                self._wakeup.clear()
+                continue
+            self.refresh(level)
+
+    def refresh(self, level):
+        """Обновляет уровень каталога и каталог в памяти"""
+        entry = self._schedule[level]
+        with self._refresh_lock:
+            with self._lock:
+                entry["running"] = True
+                entry["last_started"] = datetime.now().isoformat()
+                entry["next_run"] = None
+            started = time.monotonic()
+            self.logger.info("Обновление уровня %s", level)
+            result = None
+            error = None
+            try:
+                if level == LEVEL_MODELS:
+                    # Главная страница - под общим ограничителем нагрузки
+                    models = scrape_toyota_models(
+                        cache=self.fetcher.cache,
+                        snapshot_dir=self.snapshot_dir,
+                        output_filename=self.models_path,
+                        fetcher=self.fetcher,
+                        limiter=self.limiter,
+                    )
+                    result = {"models": len(models)} if models else None
+                else:
+                    # Все модели проверяются условными запросами (304 или
+                    # неизменившийся список кузовов - модель берется из
+                    # прошлого результата без разбора)
+                    result = scrape_toyota_frames(
+                        delay_between_requests=self.delay_between_requests,
+                        engine=self.engine,
+                        workers=self.workers,
+                        output_filename=self.frames_path,
+                        incremental=True,
+                        revalidate=True,
+                        max_requests_per_second=self.max_requests_per_second,
+                        snapshot_dir=self.snapshot_dir,
+                        browser_profile=self.browser_profile,
+                        models_path=self.models_path,
+                        limiter=self.limiter,
+                        log_options=self.log_options,
+                        fetcher=self.fetcher if self.engine == "http" else None,
+                        drivers=self.drivers,
+                    )
+                if result is None:
+                    error = "обновление не завершено, подробности в логе"
+                else:
+                    self.state.load(self.models_path, self.frames_path)
+            except Exception as e:
+                self.logger.exception("Ошибка обновления уровня %s", level)
+                error = str(e)
+
+            seconds = round(time.monotonic() - started, 1)
+            self.logger.info(
+                "Уровень %s обновлен за %s сек., версия каталога %s",
+                level,
+                seconds,
+                self.state.version,
+            )
+            with self._lock:
+                entry["running"] = False
+                entry["last_finished"] = datetime.now().isoformat()
+                entry["last_seconds"] = seconds
+                entry["last_error"] = error
+                if error is None:
+                    entry["last_result"] = _summary(result)
+                # Ручной запуск во время обновления не теряется
+                if entry["next_run"] is None and entry["interval"]:
+                    entry["next_run"] = time.monotonic() + entry["interval"]
+
+
+def _summary(result):
+    """Краткая сводка обновления (без вложенной статистики)"""
+    return {key: value for key, value in result.items() if not isinstance(value, (dict, list))}
+
+
+class CatalogRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к API (self.server.daemon - CatalogDaemon)"""
+
+    server_version = "ToyotaCatalog/1.0"
+
+    def log_message(self, format, *args):
+        self.server.daemon.logger.debug("%s - " + format, self.address_string(), *args)
+
+    def _send_json(self, data, status=HTTPStatus.OK, etag=None):
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send_json({"error": message}, status)
+
+    def do_GET(self):
+        daemon = self.server.daemon
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        # Ответы из каталога кэшируются клиентом до смены версии
+        etag = f'"{daemon.state.version}"' if daemon.state.version else None
+
+        try:
+            limit = int(params["limit"]) if "limit" in params else None
+        except ValueError:
+            return self._error(HTTPStatus.BAD_REQUEST, "limit должен быть числом")
+
+        if parts == ["health"]:
+            return self._send_json(daemon.status())
+        if parts == ["models"]:
+            return self._send_json(daemon.state.list_models(params.get("q"), limit), etag=etag)
+        if len(parts) == 2 and parts[0] == "models":
+            model = daemon.state.get_model(parts[1])
+            if model is None:
+                return self._error(HTTPStatus.NOT_FOUND, f"Модель {parts[1]} не найдена")
+            return self._send_json(model, etag=etag)
+        if parts == ["frames"]:
+            if not params.get("code") and not params.get("prefix"):
+                return self._error(HTTPStatus.BAD_REQUEST, "Нужен параметр code или prefix")
+            frames = daemon.state.find_frames(params.get("code"), params.get("prefix"), limit or 100)
+            return self._send_json(frames, etag=etag)
+        return self._error(HTTPStatus.NOT_FOUND, f"Неизвестный адрес: {url.path}")
+
+    def do_POST(self):
+        parts = [part for part in urlsplit(self.path).path.strip("/").split("/") if part]
+        if len(parts) != 2 or parts[0] != "refresh":
+            return self._error(HTTPStatus.NOT_FOUND, f"Неизвестный адрес: {self.path}")
+        try:
+            self.server.daemon.trigger(parts[1])
+        except ValueError as e:
+            return self._error(HTTPStatus.BAD_REQUEST, str(e))
+        self._send_json({"scheduled": parts[1]}, HTTPStatus.ACCEPTED)
+
+
+def serve(daemon, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Запускает расписание и API, работает до SIGTERM / Ctrl+C"""
+    server = ThreadingHTTPServer((host, port), CatalogRequestHandler)
+    server.daemon_threads = True
+    server.daemon = daemon
+
+    def shutdown(signum, frame):
+        # shutdown() ждет завершения serve_forever - из другого потока
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    daemon.start()
+    daemon.logger.info("API каталога: http://%s:%s/health", host, server.server_port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.logger.info("Остановка")
+        server.server_close()
+        daemon.stop()
+
+
+def _interval_argument(value):
+    try:
+        return parse_interval(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Парсер каталога Toyota в режиме службы")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Адрес API (по умолчанию только локально)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Порт API")
+    parser.add_argument(
+        "--models-every",
+        type=_interval_argument,
+        default=parse_interval("24h"),
+        help="Интервал обновления списка моделей: 90, 30m, 6h, 1d (по умолчанию 24h)",
+    )
+    parser.add_argument(
+        "--frames-every",
+        type=_interval_argument,
+        default=parse_interval("6h"),
+        help="Интервал обновления кузовов (по умолчанию 6h)",
+    )
+    parser.add_argument(
+        "--no-initial-refresh",
+        action="store_true",
+        help="Не обновлять каталог при запуске, отдавать сохраненные файлы",
+    )
+    parser.add_argument("--engine", choices=ENGINES, default="http", help="Движок загрузки кузовов")
+    parser.add_argument("--workers", type=int, default=2, help="Количество параллельных воркеров")
+    parser.add_argument("--delay", type=float, default=1.0, help="Начальный интервал между запросами")
+    parser.add_argument("--max-rate", type=float, default=5.0, help="Максимум запросов в секунду")
+    parser.add_argument(
+        "--browser-profile",
+        choices=BROWSER_PROFILES,
+        default=DEFAULT_PROFILE,
+        help="Профиль Chrome для Selenium",
+    )
+    add_cache_arguments(parser)
+    add_logging_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Примеры использования:
+
+    # Модели раз в сутки, кузова каждые 6 часов, API на порту 8765
+    # python daemon.py
+
+    # Сразу отдавать сохраненный каталог, обновлять кузова каждый час
+    # python daemon.py --no-initial-refresh --frames-every 1h
+
+    # Запросы
+    # curl http://127.0.0.1:8765/frames?code=ZZE121
+    # curl -X POST http://127.0.0.1:8765/refresh/frames
+
+    args = parse_args()
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            args.cache, ttl=args.cache_ttl, max_bytes=args.cache_max_mb * 1024 * 1024
+        )
+    daemon = CatalogDaemon(
+        {LEVEL_MODELS: args.models_every, LEVEL_FRAMES: args.frames_every},
+        engine=args.engine,
+        workers=args.workers,
+        delay_between_requests=args.delay,
+        max_requests_per_second=args.max_rate,
+        cache=cache,
+        browser_profile=args.browser_profile,
+        initial_refresh=not args.no_initial_refresh,
+        log_options=logging_options(args),
+    )
+    serve(daemon, args.host, args.port)
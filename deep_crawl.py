@@ -0,0 +1,393 @@
+"""
+Многоуровневый потоковый парсинг каталога:
+модели → кузова → группы → подгруппы → детали.
+
+Каждый уровень - отдельная стадия со своим извлекателем и пулом воркеров.
+Найденные ссылки сразу попадают в ограниченную очередь следующей стадии,
+поэтому первые детали появляются в выводе через секунды после старта,
+а память не растет с размером дерева: при заполнении очереди воркеры
+предыдущей стадии ждут (backpressure). Ссылки проходят через фронтир
+(frontier.py): общие подстраницы, на которые ссылаются несколько
+страниц, загружаются один раз за запуск.
+
+Селекторы уровней ниже кузова заданы по структуре страниц epc-data.com
+(списки `ul.category2`, таблица деталей) и при изменении сайта
+настраиваются в DEFAULT_STAGES.
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+
+import requests
+
+from extractors import extract_links, extract_rows
+from fetchers import HttpFetcher
+from frame_parse import load_models_data
+from frontier import FrontierQueue, canonicalize_url, dedup_links, make_seen_filter
+from http_cache import ResponseCache, add_cache_arguments
+from logging_setup import add_logging_arguments, logging_options, setup_logging
+from ndjson_output import NdjsonWriter
+from rate_limit import AdaptiveRateLimiter
+from search_index import add_index_arguments, update_index
+from columnar import DEFAULT_PARTS_COLUMNAR_PATH, add_columnar_arguments, export_parts
+
+# Маркер завершения работы воркера
+_STOP = object()
+
+
+class Stage:
+    """Уровень каталога: как извлекать дочерние элементы со страницы"""
+
+    def __init__(self, name, selectors=None, row_selector=None, workers=2):
+        """
+        Args:
+            name: Имя уровня (ключ в пути записи: frame, group, subgroup, part)
+            selectors: Селекторы ссылок на страницы следующего уровня
+            row_selector: Селектор строк таблицы для конечного уровня (детали)
+            workers: Количество воркеров стадии
+        """
+        self.name = name
+        self.selectors = selectors or []
+        self.row_selector = row_selector
+        self.workers = workers
+
+    @property
+    def is_leaf(self):
+        return self.row_selector is not None
+
+    def extract(self, html, page_url):
+        """Возвращает дочерние элементы страницы"""
+        if self.is_leaf:
+            return [
+                {"cells": row["cells"], "url": row["href"]}
+                for row in extract_rows(html, self.row_selector, page_url)
+            ]
+
+        _, links = extract_links(html, self.selectors, page_url)
+        return [
+            {"name": link["text"], "url": link["href"]}
+            for link in dedup_links(links, page_url)
+        ]
+
+
+# Стадии по умолчанию: страница модели → кузова, страница кузова → группы,
+# страница группы → подгруппы, страница подгруппы → строки деталей
+DEFAULT_STAGES = [
+    Stage("frame", ["ul.category2 h4 a", ".category2 a"]),
+    Stage("group", ["ul.category2 h4 a", ".category2 a", "table.parts_groups a"]),
+    Stage("subgroup", ["ul.category2 h4 a", ".category2 a", "table.parts_subgroups a"]),
+    Stage("part", row_selector="table.parts tr"),
+]
+
+
+class DeepCrawler:
+    """Потоковый конвейер стадий с ограниченными очередями между ними"""
+
+    def __init__(
+        self,
+        fetcher,
+        stages,
+        on_record,
+        logger,
+        limiter=None,
+        queue_size=100,
+        max_retries=3,
+        seen=None,
+    ):
+        """
+        Args:
+            fetcher: HttpFetcher instance (общий для всех стадий)
+            stages: Список Stage, от верхнего уровня к нижнему
+            on_record: Вызывается для каждой найденной записи конечного уровня
+            logger: Logger instance
+            limiter: AdaptiveRateLimiter для всех запросов
+            queue_size: Размер очереди перед каждой стадией
+            max_retries: Количество попыток загрузки страницы
+            seen: Множество встреченных URL (frontier.make_seen_filter;
+                None = точное множество в памяти)
+        """
+        self.fetcher = fetcher
+        self.stages = stages
+        self.on_record = on_record
+        self.logger = logger
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self.seen = seen if seen is not None else make_seen_filter()
+        # Очереди стадий: приоритет и очередь на каждый сайт
+        self.queues = [FrontierQueue(maxsize=queue_size) for _ in stages]
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "pages": {stage.name: 0 for stage in stages},
+            "errors": {stage.name: 0 for stage in stages},
+            "records": 0,
+            "duplicates": 0,
+        }
+
+    def _count(self, key, stage_name=None):
+        with self._stats_lock:
+            if stage_name is None:
+                self.stats[key] += 1
+            else:
+                self.stats[key][stage_name] += 1
+
+    def _fetch(self, url):
+        """Загружает страницу с повторными попытками"""
+        for attempt in range(self.max_retries):
+            try:
+                with self.limiter or nullcontext():
+                    page = self.fetcher.get(url)
+                if self.limiter is not None:
+                    self.limiter.record_success(page.elapsed)
+                return page
+            except requests.RequestException as e:
+                if self.limiter is not None:
+                    self.limiter.record_failure()
+                self.logger.warning(
+                    "Попытка %s/%s: ошибка загрузки %s: %s",
+                    attempt + 1,
+                    self.max_retries,
+                    url,
+                    e,
+                )
+                if attempt < self.max_retries - 1:
+                    time.sleep(
+                        self.limiter.backoff(attempt) if self.limiter else 2**attempt
+                    )
+        return None
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+
+        while True:
+            item = inbox.get()
+            try:
+                if item is _STOP:
+                    return
+                self._process(index, stage, item)
+            except Exception as e:
+                self._count("errors", stage.name)
+                self.logger.error(
+                    "Ошибка стадии %s для %s: %s",
+                    stage.name,
+                    item["url"],
+                    e,
+                )
+            finally:
+                inbox.task_done()
+
+    def _process(self, index, stage, item):
+        page = self._fetch(item["url"])
+        if page is None:
+            self._count("errors", stage.name)
+            return
+        self._count("pages", stage.name)
+
+        children = stage.extract(page.text, page.url)
+        if not children:
+            self.logger.debug("Стадия %s: пустая страница %s", stage.name, item["url"])
+
+        for child in children:
+            if stage.is_leaf:
+                self.on_record({"path": item["path"], stage.name: child})
+                self._count("records")
+            elif index + 1 < len(self.stages):
+                # Страница уже загружена или стоит в очереди по другой ссылке
+                url = canonicalize_url(child["url"])
+                if not self.seen.add(url):
+                    self._count("duplicates")
+                    continue
+                # Блокируется при заполненной очереди следующей стадии
+                self.queues[index + 1].put(
+                    {
+                        "url": url,
+                        "path": {**item["path"], stage.name: child["name"]},
+                        "priority": item.get("priority", 0),
+                    }
+                )
+            else:
+                # Последняя стадия без таблицы - выдаем найденные ссылки
+                self.on_record({"path": item["path"], stage.name: child})
+                self._count("records")
+
+    def run(self, seeds):
+        """
+        Запускает конвейер
+
+        Args:
+            seeds: Итерируемые элементы первой стадии {"url", "path"}
+                (читаются лениво, по мере освобождения очереди)
+        """
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,), daemon=True)
+                thread.start()
+                threads.append((index, thread))
+
+        for seed in seeds:
+            seed = {**seed, "url": canonicalize_url(seed["url"])}
+            if self.seen.add(seed["url"]):
+                self.queues[0].put(seed)
+            else:
+                self._count("duplicates")
+
+        # Стадия завершена, когда обработаны все ее элементы; дочерние элементы
+        # попадают в следующую очередь раньше, чем элемент отмечается обработанным
+        for index, stage in enumerate(self.stages):
+            self.queues[index].join()
+            for _ in range(stage.workers):
+                self.queues[index].put(_STOP)
+
+        for _, thread in threads:
+            thread.join()
+
+        return self.stats
+
+
+def model_seeds(models):
+    """Элементы первой стадии из списка моделей"""
+    for model in models:
+        url = model.get("frame_name_url")
+        if url:
+            yield {"url": url, "path": {"model": model.get("name", "Unknown")}}
+
+
+def crawl_catalog(
+    output_filename="toyota_jdm_parts.ndjson",
+    max_models=None,
+    workers=2,
+    delay_between_requests=0.5,
+    cache=None,
+    stages=None,
+    index_path=None,
+    columnar_path=None,
+    seen_capacity=None,
+    seen_path=None,
+    log_options=None,
+):
+    """
+    Парсит каталог до уровня деталей, записи пишутся в NDJSON по мере получения
+
+    Args:
+        output_filename: Файл результата (одна JSON запись на строку)
+        max_models: Максимальное количество моделей (None = все)
+        workers: Количество воркеров на каждую стадию
+        delay_between_requests: Начальный интервал между запросами (общий),
+            дальше частота подстраивается под ответы сайта
+        cache: ResponseCache для условных запросов
+        stages: Список Stage (None = DEFAULT_STAGES)
+        index_path: Поисковый индекс, в который добавляются детали
+            (None = не обновлять)
+        columnar_path: Колоночный экспорт деталей для быстрой загрузки
+            (см. columnar.py; None = не сохранять)
+        seen_capacity: Ожидаемое число страниц для фильтра Блума встреченных
+            URL (None = точное множество в памяти)
+        seen_path: Файл фильтра Блума на диске (None = в памяти)
+        log_options: Параметры setup_logging (см. logging_setup.py)
+    """
+    logger = setup_logging("toyota_deep_crawl", **(log_options or {}))
+    logger.info("=" * 60)
+    logger.info("Запуск многоуровневого парсинга каталога")
+
+    models = load_models_data().get("models", [])
+    if max_models is not None:
+        models = models[:max_models]
+
+    stages = [
+        Stage(stage.name, stage.selectors, stage.row_selector, workers)
+        for stage in (stages or DEFAULT_STAGES)
+    ]
+    limiter = AdaptiveRateLimiter(
+        max_in_flight=workers * len(stages),
+        requests_per_second=(
+            1 / delay_between_requests if delay_between_requests > 0 else None
+        ),
+    )
+
+    seen = make_seen_filter(seen_capacity, seen_path)
+    started = time.monotonic()
+    try:
+        with NdjsonWriter(output_filename) as output, HttpFetcher(
+            pool_size=workers * len(stages), cache=cache
+        ) as fetcher:
+            crawler = DeepCrawler(fetcher, stages, output.write, logger, limiter, seen=seen)
+            stats = crawler.run(model_seeds(models))
+    finally:
+        seen.close()
+
+    logger.info("Загружено страниц по уровням: %s", stats["pages"])
+    logger.info("Ошибок по уровням: %s", stats["errors"])
+    logger.info("Повторных ссылок пропущено: %s", stats["duplicates"])
+    logger.info("Частота запросов: %s", limiter.snapshot())
+    logger.info(
+        "Записей: %s за %.1f сек.",
+        stats["records"],
+        time.monotonic() - started,
+    )
+    logger.info("Результат сохранен в: %s", output_filename)
+
+    if index_path:
+        try:
+            index_stats = update_index(index_path, frames_path=None, parts_path=output_filename)
+            logger.info(
+                "Поисковый индекс %s: добавлено деталей %s",
+                index_path,
+                index_stats["parts"],
+            )
+        except sqlite3.Error as e:
+            logger.warning("Не удалось обновить поисковый индекс: %s", e)
+
+    if columnar_path:
+        try:
+            rows = export_parts(output_filename, columnar_path)
+            logger.info("Колоночный экспорт: %s (%s строк)", columnar_path, rows)
+        except (OSError, ValueError) as e:
+            logger.warning("Не удалось сохранить колоночный экспорт: %s", e)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Многоуровневый парсинг каталога Toyota")
+    parser.add_argument("--output", default="toyota_jdm_parts.ndjson")
+    parser.add_argument("--max-models", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=2, help="Воркеров на стадию")
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument(
+        "--seen-capacity",
+        type=int,
+        default=None,
+        help="Фильтр Блума встреченных URL на N страниц (по умолчанию - точное множество)",
+    )
+    parser.add_argument(
+        "--seen-file",
+        default=None,
+        help="Хранить фильтр Блума в файле (для миллионов страниц)",
+    )
+    add_cache_arguments(parser)
+    add_index_arguments(parser)
+    add_columnar_arguments(parser, default=DEFAULT_PARTS_COLUMNAR_PATH)
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(
+            args.cache, ttl=args.cache_ttl, max_bytes=args.cache_max_mb * 1024 * 1024
+        )
+
+    crawl_catalog(
+        output_filename=args.output,
+        max_models=args.max_models,
+        workers=args.workers,
+        delay_between_requests=args.delay,
+        cache=cache,
+        index_path=None if args.no_index else args.index,
+        columnar_path=None if args.no_columnar else args.columnar,
+        seen_capacity=args.seen_capacity,
+        seen_path=args.seen_file,
+        log_options=logging_options(args),
+    )
@@ -0,0 +1,249 @@
+"""
+Пул прогретых WebDriver.
+
+Запуск Chrome занимает секунды, поэтому драйверы создаются заранее и
+переиспользуются между моделями. Перед выдачей драйвер проверяется
+(зависший или упавший браузер заменяется), после заданного числа страниц
+или при росте памяти вкладки пересоздается. Смена User-Agent делается
+переходом на другой прогретый экземпляр пула, а не запуском нового Chrome.
+"""
+
+import functools
+import itertools
+import threading
+
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+@functools.lru_cache(maxsize=None)
+def chromedriver_path():
+    """Путь к chromedriver (определяется и скачивается один раз за процесс)"""
+    return ChromeDriverManager().install()
+
+
+class PooledDriver:
+    """WebDriver пула вместе с его User-Agent и счетчиком страниц"""
+
+    def __init__(self, driver, user_agent):
+        self.driver = driver
+        self.user_agent = user_agent
+        self.pages = 0
+
+
+class DriverPool:
+    """
+    Пул WebDriver с проверкой работоспособности и ротацией User-Agent
+
+    Драйвер берется на время обработки модели и возвращается обратно:
+
+        pooled = pool.acquire()
+        try:
+            pooled.driver.get(url)
+        finally:
+            pool.release(pooled)
+    """
+
+    def __init__(
+        self,
+        factory,
+        user_agents,
+        max_size,
+        prewarm=0,
+        max_pages=200,
+        max_memory_mb=512,
+        logger=None,
+    ):
+        """
+        Args:
+            factory: Функция создания драйвера factory(user_agent) -> WebDriver
+            user_agents: User-Agent экземпляров пула (назначаются по кругу)
+            max_size: Максимум одновременно запущенных драйверов
+            prewarm: Сколько драйверов запустить сразу (остальные по запросу)
+            max_pages: После скольких страниц драйвер пересоздается
+            max_memory_mb: Размер JS heap вкладки, после которого драйвер
+                пересоздается (None = не проверять)
+            logger: Logger instance
+        """
+        self.factory = factory
+        self.user_agents = list(user_agents)
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.logger = logger
+        self._next_user_agent = itertools.cycle(self.user_agents)
+        self._cond = threading.Condition()
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self.stats = {"created": 0, "recycled": 0, "unhealthy": 0, "rotations": 0}
+
+        try:
+            for _ in range(min(prewarm, max_size)):
+                with self._cond:
+                    self._total += 1
+                self._idle.append(self._create())
+        except Exception:
+            # Пул не будет создан и закрыть его снаружи нельзя: останавливаем
+            # уже запущенные браузеры, чтобы не оставить процессы Chrome
+            self.close()
+            raise
+
+    def _log(self, level, message, *args):
+        if self.logger is not None:
+            getattr(self.logger, level)(message, *args)
+
+    def _pick_user_agent(self, exclude=None):
+        for _ in range(len(self.user_agents)):
+            user_agent = next(self._next_user_agent)
+            if user_agent != exclude:
+                return user_agent
+        return next(self._next_user_agent)
+
+    def _create(self, exclude_user_agent=None):
+        """Запускает драйвер (слот в self._total должен быть уже занят)"""
+        with self._cond:
+            user_agent = self._pick_user_agent(exclude_user_agent)
+        try:
+            driver = self.factory(user_agent)
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats["created"] += 1
+        self._log("info", "Запущен WebDriver (%d/%d в пуле)", self._total, self.max_size)
+        return PooledDriver(driver, user_agent)
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            self._log("warning", "Ошибка при закрытии WebDriver: %s", e)
+
+    def _is_healthy(self, pooled):
+        """Браузер отвечает на команды"""
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _memory_mb(self, pooled):
+        """Размер JS heap текущей вкладки в МБ (None, если недоступен)"""
+        try:
+            used = pooled.driver.execute_script(
+                "return window.performance && performance.memory"
+                " ? performance.memory.usedJSHeapSize : null"
+            )
+        except Exception:
+            return None
+        return used / (1024 * 1024) if used else None
+
+    def acquire(self, exclude_user_agent=None):
+        """
+        Выдает рабочий драйвер, при необходимости ждет освобождения
+
+        Args:
+            exclude_user_agent: Выдать экземпляр с другим User-Agent
+
+        Returns:
+            PooledDriver
+
+        Raises:
+            Exception: Не удалось запустить новый драйвер
+        """
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Пул WebDriver закрыт")
+                    pooled = next(
+                        (p for p in self._idle if p.user_agent != exclude_user_agent),
+                        None,
+                    )
+                    if pooled is not None:
+                        self._idle.remove(pooled)
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1
+                        break
+                    if self._idle:
+                        # Свободны только экземпляры с тем же User-Agent:
+                        # перезапускаем один из них с другим
+                        self._quit(self._idle.pop())
+                        break
+                    self._cond.wait()
+
+            if pooled is None:
+                return self._create(exclude_user_agent)
+
+            if self._is_healthy(pooled):
+                return pooled
+
+            self._log("warning", "WebDriver не отвечает, заменяется новым")
+            self._quit(pooled)
+            with self._cond:
+                self.stats["unhealthy"] += 1
+                self._total -= 1
+
+    def release(self, pooled):
+        """Возвращает драйвер в пул, при износе заменяет его новым"""
+        pooled.pages += 1
+
+        reason = None
+        if pooled.pages >= self.max_pages:
+            reason = f"после {pooled.pages} страниц"
+        elif self.max_memory_mb is not None:
+            memory = self._memory_mb(pooled)
+            if memory is not None and memory > self.max_memory_mb:
+                reason = f"память вкладки {memory:.0f} МБ"
+
+        if reason is not None:
+            self._log("info", "WebDriver пересоздается: %s", reason)
+            self._quit(pooled)
+            with self._cond:
+                self.stats["recycled"] += 1
+            # Слот остается занятым: замена запускается сразу, чтобы
+            # следующий воркер получил прогретый драйвер
+            try:
+                pooled = self._create()
+            except Exception as e:
+                self._log("error", "Не удалось пересоздать WebDriver: %s", e)
+                return
+
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                self._quit(pooled)
+                return
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def rotate(self, pooled):
+        """
+        Меняет драйвер на прогретый экземпляр с другим User-Agent
+
+        Returns:
+            PooledDriver
+        """
+        user_agent = pooled.user_agent
+        self.release(pooled)
+        with self._cond:
+            self.stats["rotations"] += 1
+        return self.acquire(exclude_user_agent=user_agent)
+
+    def close(self):
+        """Закрывает свободные драйверы; занятые закрываются при возврате"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,468 @@
+"""
+Извлечение ссылок из HTML без браузера.
+
+Страницы каталога epc-data.com отдают списки моделей и кузовов
+(`ul.category2 h4 a`) прямо в серверном HTML, поэтому для их разбора
+достаточно стандартного html.parser и небольшого подмножества CSS
+селекторов: тег, *, .class, #id, [attr], [attr=v], [attr*=v], [attr^=v],
+[attr$=v], потомок (пробел) и дочерний элемент (>). Другой синтаксис
+(псевдоклассы, +, ~, списки через запятую) вызывает ValueError, а не
+тихо находит не те элементы.
+
+Если установлены selectolax или lxml (+cssselect), разбор выполняется
+ими - они в разы быстрее html.parser. Тот же разбор используется и для
+Selenium: страница берется одним вызовом page_source вместо запросов
+element.text / get_attribute к WebDriver для каждого элемента.
+"""
+
+import functools
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+    from selectolax.lexbor import SelectolaxError
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+    from cssselect import SelectorError
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+# Элементы без закрывающего тега
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "param",
+    "source",
+    "track",
+    "wbr",
+}
+
+# Элементы, текст которых не отображается браузером
+HIDDEN_TEXT_ELEMENTS = {"script", "style", "noscript", "template", "head", "title"}
+
+
+class Node:
+    """Узел упрощенного DOM дерева"""
+
+    __slots__ = ("tag", "attrs", "parent", "children", "text_parts")
+
+    def __init__(self, tag, attrs=None, parent=None):
+        self.tag = tag
+        self.attrs = attrs or {}
+        self.parent = parent
+        self.children = []
+        self.text_parts = []
+
+    @property
+    def classes(self):
+        return self.attrs.get("class", "").split()
+
+    def iter_descendants(self):
+        """Обходит всех потомков в порядке документа"""
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def text(self):
+        """Видимый текст элемента с нормализованными пробелами (как element.text)"""
+        parts = []
+        self._collect_text(parts)
+        return " ".join(" ".join(parts).split())
+
+    def outer_html(self):
+        """
+        HTML элемента, собранный из дерева (текст элемента записывается
+        перед вложенными элементами)
+        """
+        attrs = "".join(f' {name}="{value}"' for name, value in self.attrs.items())
+        inner = "".join(self.text_parts) + "".join(child.outer_html() for child in self.children)
+        if self.tag in VOID_ELEMENTS:
+            return f"<{self.tag}{attrs}>"
+        return f"<{self.tag}{attrs}>{inner}</{self.tag}>"
+
+    def _collect_text(self, parts):
+        if self.tag in HIDDEN_TEXT_ELEMENTS:
+            return
+        parts.extend(self.text_parts)
+        for child in self.children:
+            child._collect_text(parts)
+
+
+class _TreeBuilder(HTMLParser):
+    """Строит дерево Node из HTML"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document")
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1]
+        node = Node(tag, {k: (v or "") for k, v in attrs}, parent)
+        parent.children.append(node)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        parent = self.stack[-1]
+        parent.children.append(Node(tag, {k: (v or "") for k, v in attrs}, parent))
+
+    def handle_endtag(self, tag):
+        # Закрываем ближайший открытый элемент с таким тегом,
+        # незакрытые вложенные элементы закрываются неявно
+        for index in range(len(self.stack) - 1, 0, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                return
+
+    def handle_data(self, data):
+        # Текст храним в порядке появления внутри текущего элемента
+        node = self.stack[-1]
+        node.text_parts.append(data)
+
+
+def parse_html(html):
+    """Разбирает HTML и возвращает корневой узел документа"""
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+_ATTR_RE = re.compile(
+    r"\[\s*([\w-]+)\s*(?:([*^$]?=)\s*(?:'([^']*)'|\"([^\"]*)\"|([^\]\s]*))\s*)?\]"
+)
+_SIMPLE_RE = re.compile(r"([#.]?)([\w-]+)")
+_TOKEN_RE = re.compile(r"(?:\[[^\]]*\]|[^\s\[])+|>")
+# Составной селектор без [атрибутов]: тег или *, затем .class и #id
+_COMPOUND_RE = re.compile(r"(?:\*|[\w-]+)?(?:[#.][\w-]+)*")
+
+
+def _parse_compound(token):
+    """
+    Разбирает составной селектор вида tag.class#id[attr*='v']
+
+    Raises:
+        ValueError: Синтаксис не поддерживается встроенным движком
+    """
+    compound = {"tag": None, "id": None, "classes": [], "attrs": []}
+    for match in _ATTR_RE.finditer(token):
+        name, op, v1, v2, v3 = match.groups()
+        value = next((v for v in (v1, v2, v3) if v is not None), None)
+        compound["attrs"].append((name, op, value))
+    token = _ATTR_RE.sub("", token)
+    if not _COMPOUND_RE.fullmatch(token) or not (token or compound["attrs"]):
+        raise ValueError(token)
+    for prefix, name in _SIMPLE_RE.findall(token):
+        if prefix == ".":
+            compound["classes"].append(name)
+        elif prefix == "#":
+            compound["id"] = name
+        else:
+            compound["tag"] = name.lower()
+    return compound
+
+
+def parse_selector(selector):
+    """
+    Разбирает CSS селектор в список шагов (комбинатор, составной селектор)
+
+    Returns:
+        list: [(combinator, compound), ...], где combinator - " " или ">"
+
+    Raises:
+        ValueError: Синтаксис не поддерживается встроенным движком
+    """
+    # Отделяем комбинаторы ">" пробелами, не трогая содержимое [атрибутов]
+    spaced = re.sub(r"\s*>\s*(?![^\[]*\])", " > ", selector.strip())
+    tokens = _TOKEN_RE.findall(spaced)
+    # Между токенами допускаются только пробелы (например, не "a[")
+    if _TOKEN_RE.sub("", spaced).strip():
+        raise ValueError(f"Неверный CSS селектор: {selector}")
+
+    steps = []
+    combinator = " "
+    for token in tokens:
+        if token == ">":
+            if combinator == ">" or not steps:
+                raise ValueError(f"Неверный CSS селектор: {selector}")
+            combinator = ">"
+            continue
+        try:
+            steps.append((combinator, _parse_compound(token)))
+        except ValueError:
+            raise ValueError(
+                f"CSS селектор не поддерживается встроенным движком: {selector}"
+            ) from None
+        combinator = " "
+    if combinator == ">":
+        raise ValueError(f"Неверный CSS селектор: {selector}")
+    return steps
+
+
+def _matches_compound(node, compound):
+    if compound["tag"] and node.tag != compound["tag"]:
+        return False
+    if compound["id"] and node.attrs.get("id") != compound["id"]:
+        return False
+    if compound["classes"]:
+        classes = node.classes
+        if any(cls not in classes for cls in compound["classes"]):
+            return False
+    for name, op, value in compound["attrs"]:
+        if name not in node.attrs:
+            return False
+        actual = node.attrs[name]
+        if op == "=" and actual != value:
+            return False
+        if op == "*=" and value not in actual:
+            return False
+        if op == "^=" and not actual.startswith(value):
+            return False
+        if op == "$=" and not actual.endswith(value):
+            return False
+    return True
+
+
+def _matches_steps(node, steps, index):
+    """Проверяет, что узел и его предки удовлетворяют шагам steps[:index + 1]"""
+    combinator, compound = steps[index]
+    if not _matches_compound(node, compound):
+        return False
+    if index == 0:
+        return True
+
+    parent = node.parent
+    if combinator == ">":
+        return parent is not None and _matches_steps(parent, steps, index - 1)
+
+    while parent is not None:
+        if _matches_steps(parent, steps, index - 1):
+            return True
+        parent = parent.parent
+    return False
+
+
+def select(root, selector):
+    """Возвращает узлы, соответствующие CSS селектору, в порядке документа"""
+    steps = parse_selector(selector)
+    if not steps:
+        return []
+    last = len(steps) - 1
+    return [node for node in root.iter_descendants() if _matches_steps(node, steps, last)]
+
+
+def _normalize_text(text):
+    return " ".join(text.split())
+
+
+class _BuiltinBackend:
+    """Разбор стандартным html.parser (без зависимостей)"""
+
+    parse = staticmethod(parse_html)
+    select = staticmethod(select)
+
+    @staticmethod
+    def text(node):
+        return node.text()
+
+    @staticmethod
+    def attr(node, name):
+        return node.attrs.get(name)
+
+    @staticmethod
+    def html(node):
+        return node.outer_html()
+
+
+class _SelectolaxBackend:
+    """Разбор selectolax (HTML5 парсер Lexbor на C)"""
+
+    @staticmethod
+    def parse(html):
+        return SelectolaxParser(html)
+
+    @staticmethod
+    def select(node, selector):
+        try:
+            return node.css(selector)
+        except SelectolaxError as e:
+            raise ValueError(f"Неверный CSS селектор для selectolax: {selector}") from e
+
+    @staticmethod
+    def text(node):
+        return _normalize_text(node.text(deep=True, separator=" "))
+
+    @staticmethod
+    def attr(node, name):
+        return node.attributes.get(name)
+
+    @staticmethod
+    def html(node):
+        return node.html
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_css(selector):
+    try:
+        return CSSSelector(selector)
+    except SelectorError as e:
+        raise ValueError(f"Неверный CSS селектор для lxml: {selector}") from e
+
+
+class _LxmlBackend:
+    """Разбор lxml с CSS селекторами через cssselect"""
+
+    @staticmethod
+    def parse(html):
+        # lxml не принимает пустой документ
+        return lxml.html.document_fromstring(html or "<html></html>")
+
+    @staticmethod
+    def select(node, selector):
+        return _compile_css(selector)(node)
+
+    @staticmethod
+    def text(node):
+        return _normalize_text(node.text_content())
+
+    @staticmethod
+    def attr(node, name):
+        return node.get(name)
+
+    @staticmethod
+    def html(node):
+        return lxml.html.tostring(node, encoding="unicode", with_tail=False)
+
+
+# Доступные движки разбора в порядке предпочтения (самый быстрый первый)
+BACKENDS = {}
+if SelectolaxParser is not None:
+    BACKENDS["selectolax"] = _SelectolaxBackend
+if CSSSelector is not None:
+    BACKENDS["lxml"] = _LxmlBackend
+BACKENDS["html.parser"] = _BuiltinBackend
+
+DEFAULT_BACKEND = next(iter(BACKENDS))
+
+
+def _get_backend(backend):
+    name = backend or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Движок разбора {name} недоступен. Доступны: {', '.join(BACKENDS)}"
+        )
+    return BACKENDS[name]
+
+
+class ParsedPage:
+    """
+    Разобранная страница: один разбор HTML для нескольких запросов
+    (например, отпечаток списка кузовов и извлечение ссылок)
+    """
+
+    def __init__(self, html, base_url, backend=None):
+        """
+        Args:
+            html: HTML код страницы
+            base_url: URL страницы для преобразования относительных ссылок
+            backend: Движок разбора из BACKENDS (None = DEFAULT_BACKEND)
+        """
+        self.engine = _get_backend(backend)
+        self.backend = backend or DEFAULT_BACKEND
+        self.base_url = base_url
+        self.root = self.engine.parse(html)
+
+    def outer_html(self, selector):
+        """HTML элементов по CSS селектору (целиком, с вложенными элементами)"""
+        return [self.engine.html(element) for element in self.engine.select(self.root, selector)]
+
+    def links(self, selectors):
+        """
+        Извлекает ссылки по первому сработавшему селектору
+
+        Returns:
+            tuple: (сработавший селектор или None, список словарей {"text", "href"})
+
+        Raises:
+            ValueError: Селектор не поддерживается движком разбора (ошибка в
+                селекторах, а не пустая страница)
+        """
+        engine = self.engine
+        for selector in selectors:
+            elements = engine.select(self.root, selector)
+            if not elements:
+                continue
+
+            links = []
+            for element in elements:
+                text = engine.text(element)
+                href = engine.attr(element, "href")
+                if text and href:
+                    links.append({"text": text, "href": urljoin(self.base_url, href)})
+            return selector, links
+
+        return None, []
+
+
+def extract_links(html, selectors, base_url, backend=None):
+    """
+    Извлекает ссылки по первому сработавшему селектору
+
+    Args:
+        html: HTML код страницы
+        selectors: Список CSS селекторов в порядке приоритета
+        base_url: URL страницы для преобразования относительных ссылок
+        backend: Движок разбора из BACKENDS (None = DEFAULT_BACKEND)
+
+    Returns:
+        tuple: (сработавший селектор или None, список словарей {"text", "href"})
+
+    Raises:
+        ValueError: Движок недоступен или селектор им не поддерживается
+    """
+    return ParsedPage(html, base_url, backend).links(selectors)
+
+
+def extract_rows(html, row_selector, base_url, cell_selector="td", backend=None):
+    """
+    Извлекает строки таблицы: текст ячеек и первую ссылку строки
+
+    Args:
+        html: HTML код страницы
+        row_selector: CSS селектор строк (например "table tr")
+        base_url: URL страницы для преобразования относительных ссылок
+        cell_selector: CSS селектор ячеек внутри строки
+        backend: Движок разбора из BACKENDS (None = DEFAULT_BACKEND)
+
+    Returns:
+        list: Список словарей {"cells": [...], "href": str или None}
+    """
+    engine = _get_backend(backend)
+    root = engine.parse(html)
+
+    rows = []
+    for row in engine.select(root, row_selector):
+        cells = [engine.text(cell) for cell in engine.select(row, cell_selector)]
+        if not any(cells):
+            continue
+        links = engine.select(row, "a[href]")
+        href = urljoin(base_url, engine.attr(links[0], "href")) if links else None
+        rows.append({"cells": cells, "href": href})
+    return rows
@@ -0,0 +1,134 @@
+"""
+Движки загрузки страниц каталога.
+
+По умолчанию используется HTTP клиент с пулом keep-alive соединений:
+списки моделей и кузовов уже есть в серверном HTML, и запуск браузера
+для них не нужен. Selenium остается запасным вариантом (см. frame_parse.py).
+"""
+
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+ENGINES = ("http", "selenium")
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class FetchResult:
+    """Результат загрузки страницы"""
+
+    def __init__(self, url, status, text, elapsed, from_cache=False, not_modified=False):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.elapsed = elapsed
+        # Страница взята из кэша (свежая запись или ответ 304)
+        self.from_cache = from_cache
+        # Страница не изменилась с прошлой загрузки
+        self.not_modified = not_modified
+
+
+class HttpFetcher:
+    """HTTP загрузчик страниц с переиспользуемой сессией (keep-alive)"""
+
+    def __init__(self, user_agent=None, timeout=30, pool_size=10, cache=None):
+        """
+        Args:
+            user_agent: User-Agent запросов (None = DEFAULT_USER_AGENT)
+            timeout: Таймаут запроса в секундах
+            pool_size: Размер пула соединений на хост
+            cache: ResponseCache для условных запросов (None = без кэша)
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.session.headers.update(
+            {
+                "User-Agent": user_agent or DEFAULT_USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9",
+                "Connection": "keep-alive",
+            }
+        )
+
+    def get(self, url):
+        """
+        Загружает страницу
+
+        Raises:
+            requests.RequestException: Сетевая ошибка или статус 4xx/5xx
+        """
+        started = time.monotonic()
+
+        entry = self.cache.get(url) if self.cache is not None else None
+        if entry is not None and entry.is_fresh(self.cache.ttl):
+            return FetchResult(
+                url=url,
+                status=200,
+                text=entry.body,
+                elapsed=time.monotonic() - started,
+                from_cache=True,
+                not_modified=True,
+            )
+
+        headers = entry.conditional_headers() if entry is not None else None
+        response = self.session.get(url, timeout=self.timeout, headers=headers)
+        response.raise_for_status()
+
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(url)
+            return FetchResult(
+                url=url,
+                status=304,
+                text=entry.body,
+                elapsed=time.monotonic() - started,
+                from_cache=True,
+                not_modified=True,
+            )
+
+        # Без charset в Content-Type requests считает страницу ISO-8859-1
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            response.encoding = "utf-8"
+
+        # Сервер не поддерживает условные запросы, но содержимое не изменилось
+        not_modified = entry is not None and entry.body == response.text
+
+        if self.cache is not None:
+            if not_modified:
+                self.cache.touch(url)
+            else:
+                self.cache.store(
+                    url,
+                    response.text,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+
+        return FetchResult(
+            url=response.url,
+            status=response.status_code,
+            text=response.text,
+            elapsed=time.monotonic() - started,
+            not_modified=not_modified,
+        )
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,189 @@
+"""
+Запись и воспроизведение загруженных страниц (фикстуры).
+
+При записи каждая загруженная страница сохраняется в сжатый zip архив.
+При воспроизведении страницы отдаются из архива вместо запросов к сайту,
+поэтому main.py и frame_parse.py можно запускать полностью офлайн, а
+benchmark.py - измерять скорость разбора на одних и тех же страницах.
+
+    python frame_parse.py --record fixtures/toyota.zip   # запись
+    python frame_parse.py --replay fixtures/toyota.zip   # без сети
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zipfile
+
+from fetchers import FetchResult, HttpFetcher
+
+
+class FixtureMissing(LookupError):
+    """
+    Страницы нет в архиве фикстур
+
+    Не наследует requests.RequestException: повторная попытка вернет тот же
+    результат, поэтому офлайн-прогон не ждет пауз между попытками
+    """
+
+
+def _entry_name(url):
+    return "pages/" + hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json"
+
+
+def load_fixtures(path):
+    """
+    Читает архив фикстур
+
+    Returns:
+        dict: {url: {"url", "final_url", "status", "text"}}
+    """
+    pages = {}
+    with zipfile.ZipFile(path) as archive:
+        for name in archive.namelist():
+            if name.startswith("pages/"):
+                page = json.loads(archive.read(name))
+                pages[page["url"]] = page
+    return pages
+
+
+class RecordingFetcher:
+    """
+    Обертка над HttpFetcher, сохраняющая загруженные страницы в архив
+
+    Страницы добавляются к уже записанным в архив (например, main.py и
+    затем frame_parse.py пишут в один архив). Повторная загрузка того же
+    URL заменяет запись, поэтому в архив попадает последний ответ
+    (например, удачная попытка после пустой). Архив пишется при закрытии.
+    """
+
+    def __init__(self, fetcher, path):
+        """
+        Args:
+            fetcher: HttpFetcher instance
+            path: Путь к архиву фикстур (.zip)
+        """
+        self.fetcher = fetcher
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages = load_fixtures(path) if os.path.exists(path) else {}
+
+    @property
+    def cache(self):
+        return self.fetcher.cache
+
+    def get(self, url):
+        page = self.fetcher.get(url)
+        with self._lock:
+            self._pages[url] = {
+                "url": url,
+                "final_url": page.url,
+                "status": page.status,
+                "text": page.text,
+            }
+        return page
+
+    def save(self):
+        """Записывает архив"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.path + ".tmp"
+        with self._lock, zipfile.ZipFile(
+            tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9
+        ) as archive:
+            for url, page in self._pages.items():
+                archive.writestr(_entry_name(url), json.dumps(page, ensure_ascii=False))
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        try:
+            self.save()
+        finally:
+            self.fetcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ReplayFetcher:
+    """Загрузчик, отдающий страницы из архива фикстур без обращения к сети"""
+
+    # Кэш HTTP ответов при воспроизведении не нужен
+    cache = None
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Путь к архиву фикстур (.zip)
+        """
+        self.path = path
+        self.pages = load_fixtures(path)
+
+    def get(self, url):
+        """
+        Возвращает страницу из архива
+
+        Raises:
+            FixtureMissing: Страница не была записана
+        """
+        started = time.monotonic()
+        page = self.pages.get(url)
+        if page is None:
+            raise FixtureMissing(f"Страница отсутствует в архиве {self.path}: {url}")
+        return FetchResult(
+            url=page["final_url"],
+            status=page["status"],
+            text=page["text"],
+            elapsed=time.monotonic() - started,
+        )
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_fetcher(record=None, replay=None, **kwargs):
+    """
+    Создает загрузчик страниц с учетом режима фикстур
+
+    Args:
+        record: Путь к архиву для записи загруженных страниц
+        replay: Путь к архиву для воспроизведения (без сети)
+        **kwargs: Параметры HttpFetcher
+
+    Returns:
+        HttpFetcher, RecordingFetcher или ReplayFetcher
+    """
+    if replay:
+        return ReplayFetcher(replay)
+    fetcher = HttpFetcher(**kwargs)
+    if record:
+        return RecordingFetcher(fetcher, record)
+    return fetcher
+
+
+def add_fixture_arguments(parser):
+    """Добавляет в argparse параметры записи и воспроизведения фикстур"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--record",
+        metavar="ARCHIVE",
+        help="Сохранить все загруженные страницы в архив фикстур (.zip)",
+    )
+    group.add_argument(
+        "--replay",
+        metavar="ARCHIVE",
+        help="Работать офлайн: брать страницы из архива фикстур вместо сайта",
+    )
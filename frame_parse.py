@@ -1,85 +1,119 @@
 import json
 import time
-import logging
-import os
 import random
+import re
+import sqlite3
+import sys
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+import requests
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import (
     TimeoutException,
     NoSuchElementException,
     WebDriverException,
 )
+from extractors import ParsedPage
+from logging_setup import add_logging_arguments, logging_options, setup_logging
+from frontier import dedup_links
+from fetchers import ENGINES
+from fixtures import FixtureMissing, add_fixture_arguments, open_fetcher
+from rate_limit import AdaptiveRateLimiter
+from metrics import LiveSummary, RunMetrics, write_metrics
+from readiness import wait_for_content
+from retry_queue import (
+    DEFAULT_FAILED_PATH,
+    DeferredRetryQueue,
+    load_failed_urls,
+    write_failed_models,
+)
+from crawl_state import CrawlJournal
+from driver_pool import DriverPool, chromedriver_path
+from browser_profile import (
+    BROWSER_PROFILES,
+    DEFAULT_PROFILE,
+    apply_profile_driver,
+    apply_profile_options,
+)
+from ndjson_output import NdjsonWriter, finalize_to_json
+from search_index import DEFAULT_INDEX_PATH, add_index_arguments, update_index
+from columnar import DEFAULT_COLUMNAR_PATH, add_columnar_arguments, export_frames
+from snapshots import (
+    DEFAULT_SNAPSHOT_DIR,
+    KIND_FRAMES,
+    add_snapshot_arguments,
+    describe_changeset,
+    snapshot_file,
+)
+from sharding import (
+    DEFAULT_REGISTRY_PATH,
+    STATUS_DONE,
+    STATUS_FAILED,
+    STATUS_RUNNING,
+    ShardRegistry,
+    filter_shard,
+    parse_shard,
+    shard_path,
+)
+from incremental import (
+    REASON_CHANGED,
+    REASON_NEW,
+    REASON_REVALIDATE,
+    PageFingerprints,
+    load_previous_output,
+    page_fingerprint,
+    plan_incremental,
+)
+from http_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_BYTES,
+    DEFAULT_TTL,
+    ResponseCache,
+    add_cache_arguments,
+)
 
 
-def setup_logging():
-    """Настройка системы логирования"""
-    # Создаем директорию для логов если её нет
-    os.makedirs("logs", exist_ok=True)
-
-    # Настройка логгера
-    logger = logging.getLogger("toyota_frame_parser")
-    logger.setLevel(logging.INFO)
-
-    # Удаляем существующие обработчики чтобы избежать дублирования
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-
-    # Создаем обработчик для записи в файл
-    file_handler = logging.FileHandler("logs/toyota_frame_parser.log", encoding="utf-8")
-    file_handler.setLevel(logging.INFO)
-
-    # Создаем обработчик для вывода в консоль
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-
-    # Создаем форматтер
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-
-    # Добавляем обработчики к логгеру
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
-    return logger
-
-
-def load_models_data():
+def load_models_data(path="toyota_jdm_models.json"):
     """Загружает данные моделей из JSON файла"""
     try:
-        with open("toyota_jdm_models.json", "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except FileNotFoundError:
         raise FileNotFoundError(
-            "Файл toyota_jdm_models.json не найден. Сначала запустите main.py для получения списка моделей."
+            f"Файл {path} не найден. Сначала запустите main.py для получения списка моделей."
         )
     except json.JSONDecodeError:
-        raise ValueError("Ошибка при чтении JSON файла toyota_jdm_models.json")
+        raise ValueError(f"Ошибка при чтении JSON файла {path}")
 
 
-def get_random_user_agent():
-    """Возвращает случайный User-Agent для обхода блокировки"""
-    user_agents = [
+# User-Agent для обхода блокировки (первый используется по умолчанию)
+USER_AGENTS = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0) Gecko/20100101 Firefox/120.0",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15",
         "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    ]
-    return random.choice(user_agents)
+]
 
 
-def setup_driver(use_random_ua=False):
-    """Настройка и инициализация Chrome WebDriver"""
+def get_random_user_agent():
+    """Возвращает случайный User-Agent для обхода блокировки"""
+    return random.choice(USER_AGENTS)
+
+
+def setup_driver(use_random_ua=False, user_agent=None, profile=DEFAULT_PROFILE):
+    """
+    Настройка и инициализация Chrome WebDriver
+
+    Args:
+        use_random_ua: Использовать случайный User-Agent
+        user_agent: Конкретный User-Agent (имеет приоритет над use_random_ua)
+        profile: Профиль браузера: "lean" (без картинок, шрифтов, стилей и
+            сторонних скриптов, загрузка до построения DOM) или "full"
+    """
     options = webdriver.ChromeOptions()
     options.add_argument("--headless")  # Запуск в фоновом режиме
     options.add_argument("--disable-gpu")
@@ -91,33 +125,102 @@ def setup_driver(use_random_ua=False):
     options.add_argument("--window-size=1920,1080")
 
     # Используем случайный User-Agent если указано
-    if use_random_ua:
-        user_agent = get_random_user_agent()
-        options.add_argument(f"--user-agent={user_agent}")
-    else:
-        options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        )
+    if user_agent is None:
+        user_agent = get_random_user_agent() if use_random_ua else USER_AGENTS[0]
+    options.add_argument(f"--user-agent={user_agent}")
+    apply_profile_options(options, profile)
 
-    # Инициализация драйвера
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), options=options
-    )
+    # Инициализация драйвера (путь к chromedriver определяется один раз)
+    driver = webdriver.Chrome(service=Service(chromedriver_path()), options=options)
 
     # Скрываем признаки автоматизации
     driver.execute_script(
         "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
     )
+    apply_profile_driver(driver, profile)
 
-    # Настройка таймаутов
-    driver.implicitly_wait(10)
+    # Настройка таймаутов. Неявное ожидание отключено: иначе каждый
+    # find_elements без совпадений блокируется на весь таймаут, а загрузка
+    # страницы ожидается явно (readiness.wait_for_content)
+    driver.implicitly_wait(0)
     driver.set_page_load_timeout(30)
 
     return driver
 
 
+# Содержимое страницы модели, появление которого означает, что кузова загружены
+FRAME_CONTENT_SELECTOR = ".category2 a"
+
+# Максимальное ожидание готовности страницы после перехода, сек.
+PAGE_READY_TIMEOUT = 20
+
+
+def get_frame_selectors(model_name, selectors=None):
+    """
+    Возвращает список селекторов для поиска кузовов в порядке приоритета
+
+    Args:
+        model_name: Название модели
+        selectors: Селекторы из профиля сайта (см. site_profiles.py);
+            {model} заменяется на название модели в нижнем регистре
+            (None = стандартный список для epc-data.com)
+    """
+    # Кавычки и скобки в названии модели (в адресах их нет) сломали бы
+    # селектор атрибута
+    slug = re.sub(r"['\"\[\]\\]", "", model_name.lower().replace(" ", "_"))
+    if selectors is not None:
+        return [selector.replace("{model}", slug) for selector in selectors]
+
+    # Расширенный список селекторов для поиска кузовов
+    return [
+        "ul.category2 h4 a",  # Основной селектор из примера HTML
+        "table ul.category2 h4 a",  # Более специфичный селектор
+        ".category2 a",  # Альтернативный селектор
+        "ul.category2 a",  # Еще один вариант
+        "li h4 a",  # Общий селектор для заголовков в списках
+        "table a[href*='/']",  # Ссылки в таблицах
+        "div.category2 a",  # Если используются div вместо ul
+        "a[href*='/" + slug + "/']",  # Ссылки содержащие имя модели
+    ]
+
+
+def extract_frames(html, page_url, model_name, selectors=None, page=None):
+    """
+    Извлекает кузова из HTML страницы модели за один проход разбора
+
+    Используется обоими движками: в Selenium HTML берется одним вызовом
+    page_source вместо запросов text/href к WebDriver для каждого элемента
+
+    Args:
+        selectors: Селекторы кузовов из профиля сайта (None = стандартные)
+        page: Уже разобранная страница (ParsedPage, например после расчета
+            отпечатка) вместо повторного разбора html
+
+    Returns:
+        tuple: (сработавший селектор или None, список словарей с данными о кузовах)
+    """
+    if page is None:
+        page = ParsedPage(html, page_url)
+    selector, links = page.links(get_frame_selectors(model_name, selectors))
+    # Запасные селекторы могут вернуть одну ссылку несколько раз и навигацию
+    frames = [
+        {"frame_name": link["text"], "frame_url": link["href"]}
+        for link in dedup_links(links, page_url)
+    ]
+    return selector, frames
+
+
 def parse_frames_from_model_page_with_retry(
-    driver, model_url, model_name, logger, wait_time=3, max_retries=5
+    driver,
+    model_url,
+    model_name,
+    logger,
+    wait_time=3,
+    max_retries=5,
+    limiter=None,
+    metrics=None,
+    frame_selectors=None,
+    fingerprints=None,
 ):
     """
     Парсит кузова (frames) с страницы конкретной модели с retry логикой
@@ -127,126 +230,168 @@ def parse_frames_from_model_page_with_retry(
         model_url: URL страницы модели
         model_name: Название модели
         logger: Logger instance
-        wait_time: Время ожидания между запросами
+        wait_time: Сколько секунд загруженная страница без кузовов должна не
+            меняться, чтобы считать ее пустой (страница с кузовами
+            разбирается сразу, как только они появились)
         max_retries: Максимальное количество попыток
+        limiter: AdaptiveRateLimiter для загрузки страниц
+            (None = отдельный ограничитель с настройками по умолчанию)
+        metrics: RunMetrics для замеров фаз (None = без сохранения)
+        frame_selectors: Селекторы кузовов из профиля сайта (None = стандартные)
+        fingerprints: PageFingerprints прошлого результата: страница с
+            неизменившимся списком кузовов не разбирается (None = всегда разбирать)
 
     Returns:
         list: Список словарей с данными о кузовах
     """
     frames = []
+    limiter = limiter or AdaptiveRateLimiter()
+    metrics = metrics or RunMetrics()
 
-    # Расширенный список селекторов для поиска кузовов
-    frame_selectors = [
-        "ul.category2 h4 a",  # Основной селектор из примера HTML
-        "table ul.category2 h4 a",  # Более специфичный селектор
-        ".category2 a",  # Альтернативный селектор
-        "ul.category2 a",  # Еще один вариант
-        "li h4 a",  # Общий селектор для заголовков в списках
-        "table a[href*='/']",  # Ссылки в таблицах
-        "div.category2 a",  # Если используются div вместо ul
-        "a[href*='/"
-        + model_name.lower().replace(" ", "_")
-        + "/']",  # Ссылки содержащие имя модели
-    ]
-
-    # Различные стратегии обхода блокировки
+    # Различные стратегии обхода блокировки. Паузы между попытками задает
+    # limiter по текущей частоте запросов, а не фиксированные множители
     retry_strategies = [
-        {"wait_time": wait_time, "use_js": False, "clear_cache": False},
-        {"wait_time": wait_time * 2, "use_js": True, "clear_cache": False},
-        {"wait_time": wait_time * 3, "use_js": False, "clear_cache": True},
-        {"wait_time": wait_time * 2, "use_js": True, "clear_cache": True},
-        {"wait_time": wait_time * 4, "use_js": True, "clear_cache": True},
+        {"use_js": False, "clear_cache": False},
+        {"use_js": True, "clear_cache": False},
+        {"use_js": False, "clear_cache": True},
+        {"use_js": True, "clear_cache": True},
     ]
 
     for attempt in range(max_retries):
+        metrics.count("attempts", engine="selenium")
+        if attempt > 0:
+            metrics.count("retries", engine="selenium")
         try:
             strategy = retry_strategies[min(attempt, len(retry_strategies) - 1)]
 
             logger.info(
-                f"Попытка {attempt + 1}/{max_retries} парсинга модели {model_name}"
+                "Попытка %s/%s парсинга модели %s",
+                attempt + 1,
+                max_retries,
+                model_name,
             )
             logger.debug(
-                f"Стратегия: wait={strategy['wait_time']}s, js={strategy['use_js']}, clear_cache={strategy['clear_cache']}"
+                "Стратегия: js=%s, clear_cache=%s, частота %.2f запр./сек.",
+                strategy["use_js"],
+                strategy["clear_cache"],
+                limiter.requests_per_second,
             )
 
             # Очистка кэша если требуется
             if strategy["clear_cache"] and attempt > 0:
                 try:
-                    driver.delete_all_cookies()
-                    driver.execute_script("window.localStorage.clear();")
-                    driver.execute_script("window.sessionStorage.clear();")
+                    with metrics.phase("clear_cache"):
+                        driver.delete_all_cookies()
+                        driver.execute_script("window.localStorage.clear();")
+                        driver.execute_script("window.sessionStorage.clear();")
                     logger.debug("Кэш и cookies очищены")
                 except Exception as e:
-                    logger.warning(f"Ошибка при очистке кэша: {e}")
+                    logger.warning("Ошибка при очистке кэша: %s", e)
 
             # Переходим на страницу модели
-            driver.get(model_url)
-
-            # Ждем загрузки страницы
-            wait = WebDriverWait(driver, 20)
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-
-            # Дополнительная пауза для полной загрузки контента
-            time.sleep(strategy["wait_time"])
+            with metrics.phase("rate_wait"):
+                limiter.acquire()
+            started = time.monotonic()
+            try:
+                with metrics.phase("driver_get"):
+                    driver.get(model_url)
+            finally:
+                limiter.release()
+
+            # Ждем появления кузовов или окончания загрузки страницы
+            with metrics.phase("ready_wait"):
+                ready = wait_for_content(
+                    driver,
+                    FRAME_CONTENT_SELECTOR,
+                    timeout=PAGE_READY_TIMEOUT,
+                    quiet_period=wait_time,
+                )
+            elapsed = time.monotonic() - started
+            metrics.count("ready", reason=ready)
 
-            # Если используем JavaScript, прокручиваем страницу для загрузки контента
+            # Если используем JavaScript и кузовов еще нет, прокручиваем
+            # страницу для подгрузки контента
             if strategy["use_js"]:
                 try:
-                    driver.execute_script(
-                        "window.scrollTo(0, document.body.scrollHeight);"
-                    )
-                    time.sleep(2)
-                    driver.execute_script("window.scrollTo(0, 0);")
-                    time.sleep(1)
-                except Exception as e:
-                    logger.warning(f"Ошибка при прокрутке страницы: {e}")
-
-            # Пробуем разные селекторы
-            frame_elements = []
-            for selector in frame_selectors:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        frame_elements = elements
-                        logger.info(
-                            f"Найдено {len(elements)} кузовов с селектором: {selector}"
+                    with metrics.phase("scroll"):
+                        driver.execute_script(
+                            "window.scrollTo(0, document.body.scrollHeight);"
                         )
-                        break
+                        wait_for_content(
+                            driver, FRAME_CONTENT_SELECTOR, timeout=3, quiet_period=0.5
+                        )
+                        driver.execute_script("window.scrollTo(0, 0);")
                 except Exception as e:
-                    logger.debug(f"Ошибка с селектором {selector}: {e}")
-                    continue
-
-            # Если элементы найдены, извлекаем данные
-            if frame_elements:
-                for element in frame_elements:
-                    try:
-                        frame_name = element.text.strip()
-                        frame_url = element.get_attribute("href")
-
-                        if frame_name and frame_url:
-                            frames.append(
-                                {"frame_name": frame_name, "frame_url": frame_url}
-                            )
-                            logger.debug(f"Найден кузов: {frame_name} -> {frame_url}")
-
-                    except Exception as e:
-                        logger.warning(f"Ошибка при извлечении данных кузова: {e}")
-                        continue
-
-                if frames:
+                    logger.warning("Ошибка при прокрутке страницы: %s", e)
+
+            # Берем HTML страницы одним вызовом и разбираем его локально
+            with metrics.phase("page_source"):
+                page_source = driver.page_source
+
+            # Список кузовов не изменился - берем кузова прошлого результата
+            parsed = None
+            fingerprint = None
+            if fingerprints is not None:
+                with metrics.phase("fingerprint"):
+                    parsed = ParsedPage(page_source, driver.current_url)
+                    fingerprint = page_fingerprint(parsed, frame_selectors)
+                    stored_frames = fingerprints.match(model_url, fingerprint)
+                if stored_frames is not None:
+                    limiter.record_success(elapsed)
+                    metrics.count("outcomes", engine="selenium", outcome="unchanged")
                     logger.info(
-                        f"Успешно извлечено {len(frames)} кузовов для модели {model_name}"
-                    )
-                    return frames
-                else:
-                    logger.warning(
-                        f"Элементы найдены, но данные не извлечены для модели {model_name}"
+                        "Список кузовов модели %s не изменился, %s кузовов взято из "
+                        "прошлого результата",
+                        model_name,
+                        len(stored_frames),
                     )
+                    return stored_frames
+
+            # Поиск селектора и извлечение - один проход разбора HTML
+            with metrics.phase("extract", engine="selenium"):
+                selector, frames = extract_frames(
+                    page_source, driver.current_url, model_name, frame_selectors, parsed
+                )
+            metrics.count("selector_hits", selector=selector or "none")
+            if selector:
+                logger.info(
+                    "Найдено %s кузовов с селектором: %s",
+                    len(frames),
+                    selector,
+                )
+            else:
+                logger.debug("Ни один из селекторов кузовов не сработал")
+
+            if frames:
+                limiter.record_success(elapsed)
+                metrics.count("outcomes", engine="selenium", outcome="success")
+                logger.info(
+                    "Успешно извлечено %s кузовов для модели %s",
+                    len(frames),
+                    model_name,
+                )
+                return frames
+            elif fingerprint is not None:
+                # Список кузовов на странице есть, но пустой - страница разобрана
+                limiter.record_success(elapsed)
+                metrics.count("outcomes", engine="selenium", outcome="empty_list")
+                logger.info("Список кузовов модели %s пуст", model_name)
+                return frames
+            elif selector:
+                logger.warning(
+                    "Элементы найдены, но данные не извлечены для модели %s",
+                    model_name,
+                )
 
             # Если кузова не найдены, пробуем альтернативные методы
             if not frames:
+                # Пустая страница - частый признак ограничения со стороны сайта
+                limiter.record_failure()
+                metrics.count("outcomes", engine="selenium", outcome="empty")
                 logger.warning(
-                    f"Попытка {attempt + 1}: Кузова не найдены для модели {model_name}"
+                    "Попытка %s: Кузова не найдены для модели %s",
+                    attempt + 1,
+                    model_name,
                 )
 
                 # Сохраняем HTML для отладки при последней попытке
@@ -254,76 +399,659 @@ def parse_frames_from_model_page_with_retry(
                     try:
                         debug_filename = f"debug_{model_name.replace(' ', '_').replace('/', '_')}_attempt_{attempt + 1}.html"
                         with open(debug_filename, "w", encoding="utf-8") as f:
-                            f.write(driver.page_source)
+                            f.write(page_source)
                         logger.info(
-                            f"HTML страницы сохранен в {debug_filename} для отладки"
+                            "HTML страницы сохранен в %s для отладки",
+                            debug_filename,
                         )
                     except Exception as e:
-                        logger.warning(f"Ошибка при сохранении HTML: {e}")
-
-                # Увеличиваем задержку перед следующей попыткой
-                if attempt < max_retries - 1:
-                    retry_delay = random.uniform(3, 8)
-                    logger.info(
-                        f"Пауза {retry_delay:.1f} сек. перед следующей попыткой"
-                    )
-                    time.sleep(retry_delay)
+                        logger.warning("Ошибка при сохранении HTML: %s", e)
 
         except TimeoutException:
+            limiter.record_failure()
+            metrics.count("outcomes", engine="selenium", outcome="timeout")
             logger.warning(
-                f"Попытка {attempt + 1}: Таймаут при загрузке страницы модели {model_name}"
+                "Попытка %s: Таймаут при загрузке страницы модели %s",
+                attempt + 1,
+                model_name,
             )
         except WebDriverException as e:
+            limiter.record_failure()
+            metrics.count("outcomes", engine="selenium", outcome="webdriver_error")
             logger.warning(
-                f"Попытка {attempt + 1}: Ошибка WebDriver при парсинге модели {model_name}: {e}"
+                "Попытка %s: Ошибка WebDriver при парсинге модели %s: %s",
+                attempt + 1,
+                model_name,
+                e,
             )
         except Exception as e:
+            metrics.count("outcomes", engine="selenium", outcome="error")
             logger.warning(
-                f"Попытка {attempt + 1}: Неожиданная ошибка при парсинге модели {model_name}: {e}"
+                "Попытка %s: Неожиданная ошибка при парсинге модели %s: %s",
+                attempt + 1,
+                model_name,
+                e,
             )
 
         # Пауза между попытками (кроме последней)
         if attempt < max_retries - 1:
-            retry_delay = random.uniform(2, 5)
-            time.sleep(retry_delay)
+            retry_delay = limiter.backoff(attempt)
+            logger.info(
+                "Пауза %.1f сек. перед следующей попыткой (частота %.2f запр./сек.)",
+                retry_delay,
+                limiter.requests_per_second,
+            )
+            with metrics.phase("retry_sleep"):
+                time.sleep(retry_delay)
 
     # Если все попытки неудачны
     logger.error(
-        f"Не удалось получить кузова для модели {model_name} после {max_retries} попыток"
+        "Не удалось получить кузова для модели %s после %s попыток",
+        model_name,
+        max_retries,
     )
     return frames
 
 
-def parse_frames_from_model_page(driver, model_url, model_name, logger, wait_time=3):
+def parse_frames_from_model_page(
+    driver,
+    model_url,
+    model_name,
+    logger,
+    wait_time=3,
+    limiter=None,
+    metrics=None,
+    frame_selectors=None,
+    fingerprints=None,
+):
     """
     Обертка для функции парсинга с retry логикой
     """
     return parse_frames_from_model_page_with_retry(
-        driver, model_url, model_name, logger, wait_time
+        driver,
+        model_url,
+        model_name,
+        logger,
+        wait_time,
+        limiter=limiter,
+        metrics=metrics,
+        frame_selectors=frame_selectors,
+        fingerprints=fingerprints,
     )
 
 
-def scrape_toyota_frames(start_index=0, max_models=None, delay_between_requests=3):
+def parse_frames_from_model_page_http(
+    fetcher,
+    model_url,
+    model_name,
+    logger,
+    max_retries=3,
+    limiter=None,
+    metrics=None,
+    frame_selectors=None,
+    fingerprints=None,
+):
+    """
+    Парсит кузова со страницы модели через HTTP без запуска браузера
+
+    Args:
+        fetcher: HttpFetcher (или загрузчик фикстур) instance
+        model_url: URL страницы модели
+        model_name: Название модели
+        logger: Logger instance
+        max_retries: Максимальное количество попыток
+        limiter: AdaptiveRateLimiter для загрузки страниц
+            (None = отдельный ограничитель с настройками по умолчанию)
+        metrics: RunMetrics для замеров фаз (None = без сохранения)
+        frame_selectors: Селекторы кузовов из профиля сайта (None = стандартные)
+        fingerprints: PageFingerprints прошлого результата (см.
+            parse_frames_from_model_page_with_retry)
+
+    Returns:
+        list: Список словарей с данными о кузовах
+    """
+    limiter = limiter or AdaptiveRateLimiter()
+    metrics = metrics or RunMetrics()
+
+    for attempt in range(max_retries):
+        metrics.count("attempts", engine="http")
+        if attempt > 0:
+            metrics.count("retries", engine="http")
+        try:
+            logger.info(
+                "Попытка %s/%s парсинга модели %s (http)",
+                attempt + 1,
+                max_retries,
+                model_name,
+            )
+            with metrics.phase("rate_wait"):
+                limiter.acquire()
+            try:
+                with metrics.phase("http_get"):
+                    page = fetcher.get(model_url)
+            finally:
+                limiter.release()
+
+            # Страница не изменилась (304 или свежая запись кэша) - кузова и
+            # отпечаток берутся из кэша без разбора страницы. Сохраненный
+            # разбор используется, только если его отпечаток совпадает с
+            # прошлым результатом: запись кэша без отпечатка (прежней версии)
+            # и --reparse (прошлых отпечатков нет) разбирают страницу заново
+            if page.not_modified and fetcher.cache is not None:
+                cached_frames = fetcher.cache.get_parsed(model_url)
+                if fingerprints is None:
+                    cache_usable = bool(cached_frames)
+                else:
+                    cache_usable = (
+                        cached_frames is not None
+                        and fingerprints.match(
+                            model_url, fetcher.cache.get_fingerprint(model_url)
+                        )
+                        is not None
+                    )
+                if cache_usable:
+                    limiter.record_success(page.elapsed)
+                    metrics.count("outcomes", engine="http", outcome="not_modified")
+                    logger.info(
+                        "Страница модели %s не изменилась, %s кузовов взято из кэша",
+                        model_name,
+                        len(cached_frames),
+                    )
+                    return cached_frames
+
+            # Отпечаток новой версии страницы пишется в результат и в кэш
+            stored_frames = None
+            parsed = None
+            fingerprint = None
+            if fingerprints is not None:
+                with metrics.phase("fingerprint"):
+                    parsed = ParsedPage(page.text, page.url)
+                    fingerprint = page_fingerprint(parsed, frame_selectors)
+                    stored_frames = fingerprints.match(model_url, fingerprint)
+
+            # Изменилась страница, но не список кузовов - без извлечения кузовов
+            if stored_frames is not None:
+                limiter.record_success(page.elapsed)
+                metrics.count("outcomes", engine="http", outcome="unchanged")
+                if fetcher.cache is not None:
+                    fetcher.cache.store_parsed(model_url, stored_frames, fingerprint)
+                logger.info(
+                    "Список кузовов модели %s не изменился, %s кузовов взято из "
+                    "прошлого результата",
+                    model_name,
+                    len(stored_frames),
+                )
+                return stored_frames
+
+            with metrics.phase("extract", engine="http"):
+                selector, frames = extract_frames(
+                    page.text, page.url, model_name, frame_selectors, parsed
+                )
+            metrics.count("selector_hits", selector=selector or "none")
+
+            if frames:
+                limiter.record_success(page.elapsed)
+                metrics.count("outcomes", engine="http", outcome="success")
+                if fetcher.cache is not None:
+                    fetcher.cache.store_parsed(model_url, frames, fingerprint)
+                logger.info(
+                    "Найдено %s кузовов с селектором: %s",
+                    len(frames),
+                    selector,
+                )
+                logger.info(
+                    "Успешно извлечено %s кузовов для модели %s",
+                    len(frames),
+                    model_name,
+                )
+                return frames
+
+            if fingerprint is not None:
+                # Список кузовов на странице есть, но пустой - страница разобрана
+                limiter.record_success(page.elapsed)
+                metrics.count("outcomes", engine="http", outcome="empty_list")
+                if fetcher.cache is not None:
+                    fetcher.cache.store_parsed(model_url, frames, fingerprint)
+                logger.info("Список кузовов модели %s пуст", model_name)
+                return frames
+
+            limiter.record_failure()
+            metrics.count("outcomes", engine="http", outcome="empty")
+            logger.warning(
+                "Попытка %s: Кузова не найдены для модели %s",
+                attempt + 1,
+                model_name,
+            )
+
+        except FixtureMissing as e:
+            # Работа офлайн: страницы нет в архиве, повтор ничего не изменит
+            metrics.count("outcomes", engine="http", outcome="fixture_missing")
+            logger.error("Модель %s: %s", model_name, e)
+            return []
+
+        except requests.RequestException as e:
+            # Таймаут, сетевая ошибка или статус 4xx/5xx (в том числе 429)
+            limiter.record_failure()
+            metrics.count("outcomes", engine="http", outcome="http_error")
+            logger.warning(
+                "Попытка %s: Ошибка HTTP при парсинге модели %s: %s",
+                attempt + 1,
+                model_name,
+                e,
+            )
+
+        # Пауза между попытками (кроме последней)
+        if attempt < max_retries - 1:
+            retry_delay = limiter.backoff(attempt)
+            logger.info(
+                "Пауза %.1f сек. перед следующей попыткой (частота %.2f запр./сек.)",
+                retry_delay,
+                limiter.requests_per_second,
+            )
+            with metrics.phase("retry_sleep"):
+                time.sleep(retry_delay)
+
+    logger.error(
+        "Не удалось получить кузова для модели %s после %s попыток",
+        model_name,
+        max_retries,
+    )
+    return []
+
+
+class CriticalCrawlError(Exception):
+    """Ошибка, после которой продолжать парсинг невозможно"""
+
+
+def process_model(
+    model,
+    position,
+    total,
+    fetcher,
+    drivers,
+    limiter,
+    logger,
+    delay_between_requests,
+    metrics=None,
+    fast=False,
+    frame_selectors=None,
+    fingerprints=None,
+):
+    """
+    Парсит кузова одной модели (выполняется в потоке воркера)
+
+    Args:
+        model: Словарь модели из toyota_jdm_models.json
+        position: Порядковый номер модели (с 1) для логов
+        total: Общее количество моделей для логов
+        fetcher: HttpFetcher instance (режим http) или None
+        drivers: DriverPool (в режиме http - для запасной попытки через Selenium,
+            None - без запасной попытки, например при работе офлайн)
+        limiter: AdaptiveRateLimiter instance
+        logger: Logger instance
+        delay_between_requests: Ожидание подгрузки контента в Selenium
+            (см. wait_time в parse_frames_from_model_page_with_retry)
+        metrics: RunMetrics для замеров (None = без сохранения)
+        fast: Одна быстрая попытка без повторов и без смены WebDriver
+            (неудачная модель повторяется позже, см. retry_queue.py)
+        frame_selectors: Селекторы кузовов из профиля сайта (None = стандартные)
+        fingerprints: PageFingerprints прошлого результата (None = всегда
+            разбирать страницу); отпечаток страницы пишется в model_data.
+            Страница с отпечатком, но без кузовов (пустой список) считается
+            разобранной: без запасной попытки и отложенных повторов
+
+    Returns:
+        dict: {"model_data": ..., "retried": bool} или None если у модели нет URL
+
+    Raises:
+        CriticalCrawlError: Не удалось получить WebDriver из пула (режим selenium)
+    """
+    model_name = model.get("name", "Unknown")
+    model_url = model.get("frame_name_url", "")
+
+    logger.info(
+        "[%s/%s] Обработка модели: %s (частота %.2f запр./сек.)",
+        position,
+        total,
+        model_name,
+        limiter.requests_per_second,
+    )
+
+    if not model_url:
+        logger.warning("URL не найден для модели %s", model_name)
+        return None
+
+    metrics = metrics or RunMetrics()
+    engine = "http" if fetcher is not None else "selenium"
+    started = time.perf_counter()
+
+    # В режиме selenium берем прогретый драйвер из пула
+    pooled = None
+    retried = False
+
+    try:
+        # Парсим кузова для текущей модели
+        if fetcher is not None:
+            frames = parse_frames_from_model_page_http(
+                fetcher,
+                model_url,
+                model_name,
+                logger,
+                max_retries=1 if fast else 3,
+                limiter=limiter,
+                metrics=metrics,
+                frame_selectors=frame_selectors,
+                fingerprints=fingerprints,
+            )
+        else:
+            try:
+                with metrics.phase("driver_acquire"):
+                    pooled = drivers.acquire()
+            except Exception as e:
+                logger.error("Критическая ошибка при получении WebDriver: %s", e)
+                raise CriticalCrawlError(str(e)) from e
+            frames = parse_frames_from_model_page_with_retry(
+                pooled.driver,
+                model_url,
+                model_name,
+                logger,
+                delay_between_requests,
+                max_retries=1 if fast else 5,
+                limiter=limiter,
+                metrics=metrics,
+                frame_selectors=frame_selectors,
+                fingerprints=fingerprints,
+            )
+
+        # Если кузова не найдены, пробуем дополнительные методы (кроме страниц
+        # с пустым списком кузовов - у них есть отпечаток)
+        if (
+            not frames
+            and drivers is not None
+            and not fast
+            and not (fingerprints is not None and fingerprints.fingerprint(model_url))
+        ):
+            logger.warning(
+                "⚠️ Модель %s имеет 0 кузовов - это подозрительно!",
+                model_name,
+            )
+
+            # Пробуем с другим User-Agent
+            logger.info("Попытка с другим WebDriver и User-Agent для %s", model_name)
+            try:
+                # Переходим на прогретый экземпляр пула с другим User-Agent
+                # (в режиме http драйвер берется только здесь, как запасной вариант)
+                with metrics.phase("driver_acquire"):
+                    if pooled is not None:
+                        previous, pooled = pooled, None
+                        pooled = drivers.rotate(previous)
+                    else:
+                        pooled = drivers.acquire()
+                retried = True
+                metrics.count("fallbacks", engine=engine)
+
+                # Увеличенная пауза перед повторной попыткой: после неудачных
+                # попыток частота уже снижена, поэтому и пауза длиннее
+                retry_delay = limiter.backoff(1)
+                logger.info("Пауза %.1f сек. перед повторной попыткой", retry_delay)
+                with metrics.phase("retry_sleep"):
+                    time.sleep(retry_delay)
+
+                # Повторная попытка парсинга
+                frames = parse_frames_from_model_page_with_retry(
+                    pooled.driver,
+                    model_url,
+                    model_name,
+                    logger,
+                    delay_between_requests * 2,
+                    max_retries=3,
+                    limiter=limiter,
+                    metrics=metrics,
+                    frame_selectors=frame_selectors,
+                    fingerprints=fingerprints,
+                )
+
+                if frames:
+                    logger.info(
+                        "✅ Успешно получены кузова для %s после смены User-Agent",
+                        model_name,
+                    )
+                else:
+                    logger.error(
+                        "❌ Не удалось получить кузова для %s даже после смены "
+                        "User-Agent",
+                        model_name,
+                    )
+
+            except Exception as e:
+                logger.error(
+                    "Ошибка при смене WebDriver для модели %s: %s",
+                    model_name,
+                    e,
+                )
+
+    finally:
+        # Возвращаем драйвер в пул
+        if pooled is not None:
+            drivers.release(pooled)
+
+    metrics.observe("model_seconds", time.perf_counter() - started, engine=engine)
+    metrics.count("models", engine=engine, result="frames" if frames else "zero_frames")
+
+    # Логирование результата
+    if len(frames) > 0:
+        logger.info("✅ Модель %s: найдено %s кузовов", model_name, len(frames))
+    else:
+        logger.warning("⚠️ Модель %s: найдено %s кузовов", model_name, len(frames))
+
+    model_data = {
+        "name": model_name,
+        "frame_name_url": model_url,
+        "frames": frames,
+        "frames_count": len(frames),
+    }
+    fingerprint = fingerprints.fingerprint(model_url) if fingerprints is not None else None
+    if fingerprint:
+        model_data["page_fingerprint"] = fingerprint
+    return {"model_data": model_data, "retried": retried}
+
+
+def iter_known_models(indexed_models, pending_models, journal, reuse):
+    """
+    Модели, результат которых известен без загрузки: успешно обработанные
+    ранее (по журналу) и взятые из прошлого результата (неизменившиеся в
+    инкрементальном режиме, не вошедшие в --retry-failed)
+
+    Args:
+        reuse: {frame_name_url: model_data} прошлого результата
+
+    Yields:
+        tuple: (индекс модели, данные модели в формате результата)
+    """
+    pending_urls = {model.get("frame_name_url", "") for _, model in pending_models}
+
+    for i, model in indexed_models:
+        model_url = model.get("frame_name_url", "")
+        if model_url in pending_urls:
+            continue
+
+        record = journal.get(model_url)
+        if record is None:
+            record = reuse.get(model_url)
+        if record is None:
+            continue
+
+        model_data = {
+            "name": record["name"],
+            "frame_name_url": record["frame_name_url"],
+            "frames": record["frames"],
+            "frames_count": len(record["frames"]),
+        }
+        if record.get("page_fingerprint"):
+            model_data["page_fingerprint"] = record["page_fingerprint"]
+        yield i, model_data
+
+
+def scrape_toyota_frames(
+    start_index=0,
+    max_models=None,
+    delay_between_requests=3,
+    engine="http",
+    workers=1,
+    journal_path="toyota_jdm_frames.journal.jsonl",
+    resume=True,
+    cache_path=DEFAULT_CACHE_PATH,
+    cache_ttl=DEFAULT_TTL,
+    cache_max_bytes=DEFAULT_MAX_BYTES,
+    output_filename="toyota_jdm_frames.json",
+    incremental=False,
+    revalidate=False,
+    stream_output="toyota_jdm_frames.ndjson",
+    finalize_json=True,
+    max_requests_per_second=5.0,
+    record=None,
+    replay=None,
+    shard=None,
+    shard_registry=None,
+    index_path=DEFAULT_INDEX_PATH,
+    metrics_path="toyota_jdm_frames.metrics.json",
+    metrics_interval=None,
+    snapshot_dir=DEFAULT_SNAPSHOT_DIR,
+    browser_profile=DEFAULT_PROFILE,
+    retry_rounds=2,
+    retry_cooldown=30.0,
+    failed_output=DEFAULT_FAILED_PATH,
+    retry_failed=None,
+    models_path="toyota_jdm_models.json",
+    frame_selectors=None,
+    limiter=None,
+    log_name="toyota_frame_parser",
+    columnar_path=DEFAULT_COLUMNAR_PATH,
+    log_options=None,
+    fetcher=None,
+    drivers=None,
+    reparse=False,
+):
     """
     Основная функция для парсинга кузовов Toyota
 
     Args:
         start_index: Индекс модели с которой начать парсинг (для возобновления)
         max_models: Максимальное количество моделей для парсинга (None = все)
-        delay_between_requests: Задержка между запросами в секундах
+        delay_between_requests: Начальный интервал между началом запросов
+            в секундах (общий для всех воркеров). Дальше частота подстраивается
+            под ответы сайта: растет, пока страницы приходят быстро и с данными,
+            и снижается при таймаутах, ошибках и пустых страницах
+        engine: Движок загрузки страниц: "http" (по умолчанию) или "selenium".
+            В режиме "http" Selenium запускается только как запасной вариант
+            для моделей, у которых не найдено ни одного кузова
+        workers: Количество параллельных воркеров. В режиме "selenium"
+            на каждый воркер создается свой WebDriver
+        journal_path: Путь к журналу состояния парсинга (JSONL)
+        resume: Пропускать модели, успешно обработанные в прошлых запусках.
+            False - очистить журнал и начать заново
+        cache_path: Путь к кэшу HTTP ответов (None = без кэша, только режим http)
+        cache_ttl: Время в секундах, в течение которого страница из кэша
+            используется без ревалидации
+        cache_max_bytes: Максимальный размер кэша
+        output_filename: Файл результата
+        incremental: Загружать только новые и изменившиеся модели, остальные
+            взять из прошлого результата output_filename
+        revalidate: В инкрементальном режиме проверять и неизменившиеся
+            модели условным запросом через кэш HTTP (страницы с ответом 304
+            не разбираются повторно)
+        stream_output: Файл NDJSON, в который каждая модель пишется сразу
+            после обработки
+        finalize_json: Собрать из потока итоговый output_filename с отступами
+        max_requests_per_second: Верхняя граница подстраиваемой частоты запросов
+        record: Архив фикстур, в который сохраняются загруженные страницы
+        replay: Архив фикстур для работы офлайн (движок http, без кэша,
+            без запасной попытки через Selenium и без отложенных повторов;
+            модель, страницы которой нет в архиве, сразу считается неудачной)
+        shard: Шард "K/N" или (K, N): обрабатывать только K-ю из N частей
+            моделей (по хешу URL). Результат, поток, журнал и лог шарда
+            пишутся в отдельные файлы (toyota_jdm_frames.shard2of4.json)
+        shard_registry: Общий файл состояния шардов (см. sharding.py)
+        index_path: Поисковый индекс, обновляемый после сборки output_filename
+            (None = не обновлять; для шардов индекс обновляет sharding.py merge)
+        metrics_path: Файл метрик запуска (длительность фаз, гистограммы
+            времени моделей, счетчики попыток и селекторов), пишется в конце
+            запуска: .prom - формат Prometheus, иначе JSON (None = не писать)
+        metrics_interval: Интервал в секундах вывода сводки метрик в лог
+            во время работы (None = только в конце)
+        snapshot_dir: Каталог снимков: output_filename сохраняется как новая
+            версия, если каталог изменился, и рядом пишется changeset
+            относительно прошлой версии (None = не сохранять; для шардов
+            снимок сохраняет sharding.py merge)
+        browser_profile: Профиль Chrome для Selenium: "lean" (без картинок,
+            шрифтов, стилей и сторонних скриптов) или "full" (см. browser_profile.py)
+        retry_rounds: Сколько раз повторять модель без кузовов. Сначала каждая
+            модель получает одну быструю попытку, неудачные откладываются и
+            повторяются с полным набором попыток после паузы, не задерживая
+            остальные модели (0 = все попытки сразу, как раньше)
+        retry_cooldown: Пауза перед первым отложенным повтором в секундах
+            (удваивается с каждым кругом)
+        failed_output: Файл со списком моделей, которые не удалось обработать
+        retry_failed: Файл failed_models.json: загрузить только эти модели,
+            остальные взять из журнала или прошлого результата (модели,
+            которых нет ни там, ни там, тоже загружаются)
+        models_path: Файл списка моделей (результат main.py)
+        frame_selectors: Селекторы кузовов из профиля сайта (None = стандартные)
+        limiter: Общий AdaptiveRateLimiter нескольких запусков на одном сайте
+            (None = свой ограничитель по delay_between_requests и workers)
+        log_name: Имя лога запуска
+        columnar_path: Колоночный экспорт output_filename для быстрой загрузки
+            другими программами (см. columnar.py; None = не сохранять; для
+            шардов экспорт сохраняет sharding.py merge)
+        log_options: Параметры setup_logging: уровень, лог JSON Lines,
+            ротация (None = по умолчанию, см. logging_setup.py)
+        fetcher: Открытый загрузчик страниц долгоживущего процесса
+            (daemon.py); используется вместо создания нового и не закрывается
+        drivers: Открытый DriverPool долгоживущего процесса (аналогично fetcher)
+        reparse: Разбирать все загруженные страницы. По умолчанию страница,
+            отпечаток списка кузовов которой (блоки ul.category2) совпал с
+            сохраненным в прошлом результате, не разбирается - кузова
+            берутся из него (см. incremental.py). Отпечатки записываются
+            в результат в обоих случаях
+
+    Returns:
+        dict: Сводная информация о парсинге или None, если парсинг не завершен
     """
-    logger = setup_logging()
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный движок: {engine}. Доступны: {', '.join(ENGINES)}")
+
+    if shard is not None:
+        if isinstance(shard, str):
+            shard = parse_shard(shard)
+        output_filename = shard_path(output_filename, shard)
+        stream_output = shard_path(stream_output, shard)
+        failed_output = shard_path(failed_output, shard)
+        journal_path = shard_path(journal_path, shard)
+        log_name = shard_path(log_name, shard)
+        if metrics_path:
+            metrics_path = shard_path(metrics_path, shard)
+
+    logger = setup_logging(log_name, **(log_options or {}))
     logger.info("=" * 60)
     logger.info("Запуск парсера кузовов Toyota")
-    logger.info(f"Время начала: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info("Время начала: %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
     logger.info("=" * 60)
 
-    driver = None
+    # Переданные загрузчик и драйверы принадлежат вызывающему и не закрываются
+    owns_engine = fetcher is None and drivers is None
+    completed = False
+    metrics = RunMetrics()
+    live_summary = None
+
+    registry = None
+    if shard is not None and shard_registry:
+        registry = ShardRegistry(shard_registry)
+        registry.update(shard, STATUS_RUNNING, output_filename)
 
     try:
         # Загружаем данные моделей
-        logger.info("Загрузка данных моделей из toyota_jdm_models.json")
-        models_data = load_models_data()
+        logger.info("Загрузка данных моделей из %s", models_path)
+        models_data = load_models_data(models_path)
         models = models_data.get("models", [])
 
         if not models:
@@ -336,219 +1064,684 @@ def scrape_toyota_frames(start_index=0, max_models=None, delay_between_requests=
             if max_models is None
             else min(start_index + max_models, len(models))
         )
-        models_to_process = models[start_index:end_index]
+        indexed_models = list(
+            enumerate(models[start_index:end_index], start=start_index)
+        )
+
+        logger.info("Всего моделей в файле: %s", len(models))
+        logger.info(
+            "Будет обработано моделей: %s (с %s по %s)",
+            len(indexed_models),
+            start_index,
+            end_index-1,
+        )
+
+        # Шард: только модели своей части, индексы остаются исходными
+        if shard is not None:
+            indexed_models = filter_shard(indexed_models, shard)
+            logger.info(
+                "Шард %s/%s: моделей %s, результат: %s",
+                shard[0],
+                shard[1],
+                len(indexed_models),
+                output_filename,
+            )
+            if not finalize_json:
+                logger.warning("Для объединения шардов нужен итоговый JSON (без --no-finalize)")
+        models_to_process = [model for _, model in indexed_models]
+
+        # Прошлый результат: отпечатки страниц для пропуска разбора
+        # неизменившихся списков кузовов и план инкрементального режима
+        previous_timestamp = None
+        previous_models = {}
+        plan = None
+        if incremental or retry_failed or not reparse:
+            output_timestamp, previous_models = load_previous_output(
+                output_filename if finalize_json else stream_output
+            )
+        # При reparse отпечатки только записываются в новый результат
+        fingerprints = PageFingerprints(() if reparse else previous_models.values())
+        if len(fingerprints):
+            logger.info("Отпечатков страниц в прошлом результате: %s", len(fingerprints))
+
+        # Инкрементальный режим: сравниваем список моделей с прошлым результатом
+        if incremental:
+            previous_timestamp = output_timestamp
+            plan = plan_incremental(models_to_process, previous_models, revalidate)
+            reasons = list(plan["fetch"].values())
+            logger.info(
+                "Инкрементальный режим: новых %s, изменившихся %s, на ревалидацию %s, "
+                "без изменений %s, удаленных %s",
+                reasons.count(REASON_NEW),
+                reasons.count(REASON_CHANGED),
+                reasons.count(REASON_REVALIDATE),
+                len(plan["reuse"]),
+                len(plan["removed"]),
+            )
+            for removed_model in plan["removed"]:
+                logger.info("Модель удалена из каталога: %s", removed_model.get('name'))
+
+        # Журнал прерванного запуска: успешно обработанные модели пропускаются
+        # (после завершения запуска журнал удаляется). В инкрементальном режиме
+        # учитываются только записи после прошлого результата
+        journal = CrawlJournal(journal_path)
+        if resume:
+            journal.load(since=previous_timestamp)
+        else:
+            journal.reset()
+
+        pending_models = [
+            (i, model)
+            for i, model in indexed_models
+            if not journal.is_done(model.get("frame_name_url", ""))
+            and (plan is None or model.get("frame_name_url", "") in plan["fetch"])
+        ]
+        # Модели, взятые из прошлого результата без загрузки
+        reuse = dict(plan["reuse"]) if plan is not None else {}
+        if retry_failed:
+            # Загружаются модели из списка; остальные берутся из журнала или
+            # прошлого результата, а если их нет и там - тоже загружаются
+            failed_urls = load_failed_urls(retry_failed)
+            for model_url, model_data in previous_models.items():
+                if model_url not in failed_urls:
+                    reuse.setdefault(model_url, model_data)
+            pending_models = [
+                (i, model)
+                for i, model in pending_models
+                if model.get("frame_name_url", "") in failed_urls
+                or model.get("frame_name_url", "") not in reuse
+            ]
+            logger.info(
+                "Повтор моделей из %s: загружается %s (из списка %s), из прошлого "
+                "результата %s",
+                retry_failed,
+                len(pending_models),
+                len(failed_urls),
+                len(reuse),
+            )
+        models_resumed = sum(
+            1
+            for model in models_to_process
+            if journal.is_done(model.get("frame_name_url", ""))
+        )
+        if models_resumed:
+            logger.info(
+                "Пропущено моделей, уже обработанных ранее (%s): %s",
+                journal_path,
+                models_resumed,
+            )
 
-        logger.info(f"Всего моделей в файле: {len(models)}")
+        # Инициализация движка загрузки страниц (не нужна, если загружать нечего)
+        if not pending_models:
+            logger.info("Нет моделей для загрузки")
+        elif not owns_engine:
+            logger.info("Используются открытые HTTP клиент и WebDriver")
+        elif replay:
+            logger.info("Работа офлайн: страницы берутся из архива %s", replay)
+            fetcher = open_fetcher(replay=replay)
+            # Архив не меняется между попытками - отложенные повторы не нужны
+            retry_rounds = 0
+        elif engine == "http":
+            logger.info("Инициализация HTTP клиента")
+            cache = None
+            if cache_path:
+                cache = ResponseCache(cache_path, ttl=cache_ttl, max_bytes=cache_max_bytes)
+                logger.info("Кэш HTTP ответов: %s (TTL %s сек.)", cache_path, cache_ttl)
+            fetcher = open_fetcher(
+                record=record, pool_size=max(workers, 10), cache=cache
+            )
+            if record:
+                logger.info("Загруженные страницы сохраняются в архив %s", record)
+            # Драйверы запускаются только для запасной попытки через Selenium
+            # и затем переиспользуются
+            drivers = DriverPool(
+                lambda user_agent: setup_driver(user_agent=user_agent, profile=browser_profile),
+                USER_AGENTS,
+                max_size=workers,
+                logger=logger,
+            )
+        else:
+            if record:
+                logger.warning("Запись фикстур поддерживается только движком http")
+            # На каждый воркер свой драйвер и один запасной прогретый
+            # экземпляр для смены User-Agent без запуска нового Chrome
+            logger.info("Инициализация Chrome WebDriver (%s шт.)", workers + 1)
+            drivers = DriverPool(
+                lambda user_agent: setup_driver(user_agent=user_agent, profile=browser_profile),
+                USER_AGENTS,
+                max_size=workers + 1,
+                prewarm=workers + 1,
+                logger=logger,
+            )
+            logger.info("WebDriver успешно инициализирован")
+
+        # Общий ограничитель нагрузки, частота подстраивается под ответы сайта.
+        # Переданный ограничитель делится с другими запусками на том же сайте
+        if limiter is None:
+            initial_rate = (
+                1 / delay_between_requests
+                if delay_between_requests > 0
+                else max_requests_per_second
+            )
+            limiter = AdaptiveRateLimiter(
+                max_in_flight=workers,
+                requests_per_second=initial_rate,
+                # Заданная частота всегда попадает в допустимый диапазон
+                min_rate=min(0.1, initial_rate),
+                max_rate=max(max_requests_per_second, initial_rate),
+            )
         logger.info(
-            f"Будет обработано моделей: {len(models_to_process)} (с {start_index} по {end_index-1})"
+            "Воркеров: %s, начальная частота: %.2f запр./сек., максимальная: %.2f "
+            "запр./сек.",
+            workers,
+            limiter.requests_per_second,
+            limiter.max_rate,
         )
 
-        # Инициализация драйвера
-        logger.info("Инициализация Chrome WebDriver")
-        driver = setup_driver()
-        logger.info("WebDriver успешно инициализирован")
-
-        # Структура для результата
-        result_data = {
-            "parsing_info": {
-                "timestamp": datetime.now().isoformat(),
-                "total_models_processed": 0,
-                "total_frames_found": 0,
-                "start_index": start_index,
-                "end_index": end_index - 1,
-            },
-            "models": [],
+        # Сводная информация о парсинге
+        parsing_info = {
+            "timestamp": datetime.now().isoformat(),
+            "total_models_processed": 0,
+            "total_frames_found": 0,
+            "start_index": start_index,
+            "end_index": end_index - 1,
         }
+        if shard is not None:
+            parsing_info["shard"] = f"{shard[0]}/{shard[1]}"
 
         # Счетчики для статистики
         models_with_zero_frames = 0
         models_retried = 0
 
-        # Парсинг каждой модели
-        for i, model in enumerate(models_to_process, start=start_index):
-            model_name = model.get("name", "Unknown")
-            model_url = model.get("frame_name_url", "")
-
-            logger.info(f"[{i+1}/{len(models)}] Обработка модели: {model_name}")
-
-            if not model_url:
-                logger.warning(f"URL не найден для модели {model_name}")
-                continue
-
-            # Парсим кузова для текущей модели
-            frames = parse_frames_from_model_page(
-                driver, model_url, model_name, logger, delay_between_requests
-            )
-
-            # Если кузова не найдены, пробуем дополнительные методы
-            if not frames:
+        # Модели без кузовов повторяются позже, не задерживая остальные
+        deferred = DeferredRetryQueue(cooldown=retry_cooldown, max_rounds=retry_rounds)
+        failed_models = []
+
+        def emit(stream, index, model_data):
+            """Пишет модель в поток NDJSON и обновляет статистику"""
+            nonlocal models_with_zero_frames
+            stream.write({"index": index, **model_data})
+            parsing_info["total_models_processed"] += 1
+            parsing_info["total_frames_found"] += model_data["frames_count"]
+            if not model_data["frames"]:
                 models_with_zero_frames += 1
-                logger.warning(
-                    f"⚠️ Модель {model_name} имеет 0 кузовов - это подозрительно!"
-                )
 
-                # Пробуем с другим User-Agent
-                logger.info(
-                    f"Попытка с новым WebDriver и случайным User-Agent для {model_name}"
+        if metrics_interval and pending_models:
+            live_summary = LiveSummary(metrics, logger, metrics_interval).start()
+
+        # Каждая модель пишется в поток NDJSON сразу после получения и
+        # в журнал, модели обрабатываются параллельно
+        with NdjsonWriter(stream_output) as stream, ThreadPoolExecutor(
+            max_workers=workers
+        ) as executor:
+            # Модели, обработанные ранее (журнал) или не изменившиеся
+            # (инкрементальный режим), известны заранее и пишутся первыми
+            known_models = iter_known_models(indexed_models, pending_models, journal, reuse)
+            for i, model_data in known_models:
+                emit(stream, i, model_data)
+
+            futures = {}
+
+            def submit(i, model, fast):
+                future = executor.submit(
+                    process_model,
+                    model,
+                    i + 1,
+                    len(models),
+                    fetcher,
+                    drivers,
+                    limiter,
+                    logger,
+                    delay_between_requests,
+                    metrics,
+                    fast,
+                    frame_selectors,
+                    fingerprints,
                 )
-                try:
-                    # Закрываем текущий драйвер
-                    driver.quit()
-
-                    # Создаем новый с случайным User-Agent
-                    driver = setup_driver(use_random_ua=True)
-                    models_retried += 1
-
-                    # Увеличенная пауза перед повторной попыткой
-                    retry_delay = random.uniform(5, 10)
-                    logger.info(
-                        f"Пауза {retry_delay:.1f} сек. перед повторной попыткой"
-                    )
-                    time.sleep(retry_delay)
-
-                    # Повторная попытка парсинга
-                    frames = parse_frames_from_model_page_with_retry(
-                        driver,
-                        model_url,
-                        model_name,
-                        logger,
-                        delay_between_requests * 2,
-                        max_retries=3,
-                    )
-
-                    if frames:
-                        logger.info(
-                            f"✅ Успешно получены кузова для {model_name} после смены User-Agent"
-                        )
-                        models_with_zero_frames -= 1
-                    else:
-                        logger.error(
-                            f"❌ Не удалось получить кузова для {model_name} даже после смены User-Agent"
-                        )
+                futures[future] = (i, model)
+
+            # Первый проход - одна быстрая попытка на модель (если есть отложенные повторы)
+            for i, model in pending_models:
+                submit(i, model, fast=retry_rounds > 0)
+
+            stopped = False
+            while (futures or deferred) and not stopped:
+                # Отложенные модели, пауза которых прошла, - полный набор попыток
+                for i, model in deferred.pop_ready():
+                    submit(i, model, fast=False)
+                if not futures:
+                    time.sleep(deferred.next_ready_in())
+                    continue
 
-                except Exception as e:
-                    logger.error(
-                        f"Ошибка при смене WebDriver для модели {model_name}: {e}"
-                    )
-                    # Пересоздаем драйвер в случае ошибки
+                done, _ = wait(
+                    futures, timeout=deferred.next_ready_in(), return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    i, model = futures.pop(future)
                     try:
-                        driver = setup_driver()
-                    except Exception as e2:
-                        logger.error(
-                            f"Критическая ошибка при пересоздании WebDriver: {e2}"
+                        outcome = future.result()
+                    except CriticalCrawlError:
+                        # Останавливаем парсинг: отменяем модели, которые еще не начаты.
+                        # Необработанные модели (эта, в работе, в очереди и отложенные)
+                        # попадают в failed_models.json
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        stopped = True
+                        failed_models.append(model)
+                        failed_models.extend(model for _, model in futures.values())
+                        failed_models.extend(
+                            model for _, model in deferred.pop_ready(force=True)
                         )
                         break
+                    except Exception:
+                        # Ошибка на одной странице (разметка, кэш и т.п.) не
+                        # останавливает остальные модели: модель без кузовов
+                        # откладывается или попадает в failed_models.json
+                        logger.exception(
+                            "Ошибка при обработке модели %s", model.get("name", "Unknown")
+                        )
+                        metrics.count("model_errors")
+                        outcome = {
+                            "model_data": {
+                                "name": model.get("name", "Unknown"),
+                                "frame_name_url": model.get("frame_name_url", ""),
+                                "frames": [],
+                                "frames_count": 0,
+                            },
+                            "retried": False,
+                        }
+
+                    if outcome is None:
+                        continue
 
-            # Добавляем данные модели с кузовами в результат
-            model_data = {
-                "name": model_name,
-                "frame_name_url": model_url,
-                "frames": frames,
-                "frames_count": len(frames),
-            }
-
-            result_data["models"].append(model_data)
-            result_data["parsing_info"]["total_frames_found"] += len(frames)
-
-            # Логирование результата
-            if len(frames) > 0:
-                logger.info(f"✅ Модель {model_name}: найдено {len(frames)} кузовов")
-            else:
-                logger.warning(f"⚠️ Модель {model_name}: найдено {len(frames)} кузовов")
-
-            # Пауза между запросами для избежания блокировки
-            if i < end_index - 1:  # Не делаем паузу после последней модели
-                base_delay = delay_between_requests
-                # Увеличиваем задержку если было много неудачных попыток
-                if models_with_zero_frames > 3:
-                    base_delay *= 2
-                    logger.debug(
-                        f"Увеличена задержка до {base_delay} сек. из-за проблем с парсингом"
-                    )
-
-                logger.debug(f"Пауза {base_delay} сек. перед следующим запросом")
-                time.sleep(base_delay)
+                    model_data = outcome["model_data"]
+                    if not model_data["frames"] and not model_data.get("page_fingerprint"):
+                        model_url = model_data["frame_name_url"]
+                        if deferred.push(model_url, (i, model)):
+                            logger.info(
+                                "Модель %s отложена для повторной попытки (круг %s/%s)",
+                                model_data["name"],
+                                deferred.rounds(model_url),
+                                retry_rounds,
+                            )
+                            metrics.count("deferred")
+                            continue
+                        failed_models.append(model)
+                    elif deferred.rounds(model_data["frame_name_url"]):
+                        metrics.count("recovered")
+
+                    journal.record(model_data)
+                    emit(stream, i, model_data)
+                    if outcome["retried"]:
+                        models_retried += 1
+
+        journal.compact()
+
+        # Запуск не завершен: результат, снимок, индекс и колоночный экспорт
+        # прошлого запуска не заменяются, обработанные модели остаются в журнале
+        if stopped:
+            write_failed_models(failed_models, failed_output)
+            logger.error(
+                "Парсинг остановлен после критической ошибки. Не обработано моделей: "
+                "%s, список сохранен в %s; обработанные модели сохранены в журнале %s",
+                len(failed_models),
+                failed_output,
+                journal_path,
+            )
+            return None
 
         # Дополнительная статистика
-        result_data["parsing_info"]["models_with_zero_frames"] = models_with_zero_frames
-        result_data["parsing_info"]["models_retried"] = models_retried
-
-        # Обновляем статистику
-        result_data["parsing_info"]["total_models_processed"] = len(
-            result_data["models"]
-        )
-
-        # Сохраняем результат в файл
-        output_filename = "toyota_jdm_frames.json"
-        logger.info(f"Сохранение результатов в файл: {output_filename}")
+        parsing_info["models_with_zero_frames"] = models_with_zero_frames
+        parsing_info["models_retried"] = models_retried
+        parsing_info["models_resumed"] = models_resumed
+        parsing_info["models_deferred"] = deferred.stats["deferred"]
+        parsing_info["models_failed"] = len(failed_models)
+
+        # Модели без кузовов после всех повторов - для отдельного запуска
+        write_failed_models(failed_models, failed_output)
+        if failed_models:
+            logger.warning(
+                "Не удалось обработать моделей: %s, список сохранен в %s (повтор: "
+                "--retry-failed %s)",
+                len(failed_models),
+                failed_output,
+                failed_output,
+            )
+        parsing_info["rate_limiter"] = limiter.snapshot()
+        if drivers is not None and drivers.stats["created"]:
+            parsing_info["driver_pool"] = dict(drivers.stats)
+        if plan is not None:
+            reasons = list(plan["fetch"].values())
+            parsing_info["incremental"] = {
+                "previous_timestamp": previous_timestamp,
+                "new": reasons.count(REASON_NEW),
+                "changed": reasons.count(REASON_CHANGED),
+                "revalidated": reasons.count(REASON_REVALIDATE),
+                "reused": len(plan["reuse"]),
+                "removed": len(plan["removed"]),
+            }
+        if not reparse:
+            fingerprint_summary = fingerprints.summary()
+            parsing_info["fingerprints"] = fingerprint_summary
+            logger.info(
+                "Списки кузовов: без изменений %s, изменились %s, новых страниц %s",
+                fingerprint_summary["unchanged"],
+                fingerprint_summary["changed"],
+                fingerprint_summary["new"],
+            )
+            for model_url in fingerprint_summary["changed_urls"]:
+                logger.info("Изменился список кузовов: %s", model_url)
+        parsing_info["completed_at"] = datetime.now().isoformat()
+        logger.info("Поток результатов сохранен в: %s", stream_output)
+
+        # Итоговый JSON собирается из потока в исходном порядке моделей
+        if finalize_json:
+            logger.info("Сохранение результатов в файл: %s", output_filename)
+            finalize_to_json(stream_output, output_filename, parsing_info)
+        completed = True
+        # Результат сохранен - следующий запуск начнется с чистого журнала
+        journal.complete()
+
+        if finalize_json and snapshot_dir and shard is None:
+            try:
+                snapshot, changeset = snapshot_file(output_filename, KIND_FRAMES, snapshot_dir)
+                logger.info("Снимок результата: %s", snapshot["id"])
+                if changeset is not None:
+                    logger.info("Изменения каталога: %s", describe_changeset(changeset))
+            except OSError as e:
+                logger.warning("Не удалось сохранить снимок результата: %s", e)
+
+        if finalize_json and index_path and shard is None:
+            try:
+                index_stats = update_index(index_path, output_filename, parts_path=None)
+                logger.info(
+                    "Поисковый индекс %s обновлен: %s",
+                    index_path,
+                    index_stats["frames"],
+                )
+            except sqlite3.Error as e:
+                logger.warning("Не удалось обновить поисковый индекс: %s", e)
 
-        with open(output_filename, "w", encoding="utf-8") as f:
-            json.dump(result_data, f, indent=2, ensure_ascii=False)
+        if finalize_json and columnar_path and shard is None:
+            try:
+                rows = export_frames(output_filename, columnar_path)
+                logger.info("Колоночный экспорт: %s (%s строк)", columnar_path, rows)
+            except (OSError, ValueError) as e:
+                logger.warning("Не удалось сохранить колоночный экспорт: %s", e)
 
         # Финальная статистика
         logger.info("=" * 60)
         logger.info("ПАРСИНГ ЗАВЕРШЕН")
+        logger.info("Обработано моделей: %s", parsing_info["total_models_processed"])
+        logger.info("Найдено кузовов: %s", parsing_info["total_frames_found"])
+        logger.info("Моделей с 0 кузовов: %s", models_with_zero_frames)
+        logger.info("Моделей с повторными попытками: %s", models_retried)
         logger.info(
-            f"Обработано моделей: {result_data['parsing_info']['total_models_processed']}"
+            "Частота запросов: итоговая %.2f запр./сек., снижений %s, повышений %s",
+            limiter.requests_per_second,
+            limiter.stats["decreases"],
+            limiter.stats["increases"],
         )
-        logger.info(
-            f"Найдено кузовов: {result_data['parsing_info']['total_frames_found']}"
-        )
-        logger.info(f"Моделей с 0 кузовов: {models_with_zero_frames}")
-        logger.info(f"Моделей с повторными попытками: {models_retried}")
 
         # Вычисляем процент успешности
-        total_processed = result_data["parsing_info"]["total_models_processed"]
+        total_processed = parsing_info["total_models_processed"]
         success_rate = (
             ((total_processed - models_with_zero_frames) / total_processed * 100)
             if total_processed > 0
             else 0
         )
-        logger.info(f"Процент успешности: {success_rate:.1f}%")
+        logger.info("Процент успешности: %.1f%%", success_rate)
 
         if models_with_zero_frames > 0:
             logger.warning(
-                f"⚠️ ВНИМАНИЕ: {models_with_zero_frames} моделей имеют 0 кузовов - требуется проверка!"
+                "⚠️ ВНИМАНИЕ: %s моделей имеют 0 кузовов - требуется проверка!",
+                models_with_zero_frames,
             )
         else:
             logger.info("✅ Все модели успешно обработаны!")
 
-        logger.info(f"Результат сохранен в: {output_filename}")
-        logger.info(f"Время завершения: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        if finalize_json:
+            logger.info("Результат сохранен в: %s", output_filename)
+        logger.info(
+            "Время завершения: %s",
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        )
         logger.info("=" * 60)
+        return parsing_info
 
     except FileNotFoundError as e:
-        logger.error(f"Файл не найден: {e}")
+        logger.error("Файл не найден: %s", e)
     except ValueError as e:
-        logger.error(f"Ошибка данных: {e}")
+        logger.error("Ошибка данных: %s", e)
     except WebDriverException as e:
-        logger.error(f"Ошибка WebDriver: {e}")
+        logger.error("Ошибка WebDriver: %s", e)
     except Exception as e:
-        logger.error(f"Неожиданная ошибка: {e}")
+        logger.error("Неожиданная ошибка: %s", e)
         logger.exception("Детали ошибки:")
 
     finally:
-        # Корректное закрытие драйвера
-        if driver is not None:
+        if live_summary is not None:
+            live_summary.stop()
+
+        if metrics_path:
             try:
-                logger.info("Закрытие WebDriver")
-                driver.quit()
-                logger.info("WebDriver успешно закрыт")
-            except Exception as e:
-                logger.warning(f"Ошибка при закрытии WebDriver: {e}")
+                write_metrics(metrics, metrics_path)
+                logger.info("Метрики: %s", metrics.summary())
+                logger.info("Метрики сохранены в: %s", metrics_path)
+            except OSError as e:
+                logger.warning("Не удалось сохранить метрики: %s", e)
+
+        if fetcher is not None and owns_engine:
+            fetcher.close()
+
+        # Корректное закрытие драйверов
+        if drivers is not None and owns_engine:
+            logger.info("Закрытие WebDriver")
+            drivers.close()
+
+        # Отмечаем результат шарда для объединения (sharding.py merge)
+        if registry is not None:
+            registry.update(
+                shard,
+                STATUS_DONE if completed else STATUS_FAILED,
+                output_filename,
+                parsing_info if completed else None,
+            )
+            registry.close()
+
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Парсер кузовов Toyota")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="http",
+        help="Движок загрузки страниц (по умолчанию http, selenium - запасной)",
+    )
+    parser.add_argument(
+        "--start-index",
+        type=int,
+        default=0,
+        help="Индекс модели с которой начать парсинг",
+    )
+    parser.add_argument(
+        "--max-models",
+        type=int,
+        default=None,
+        help="Максимальное количество моделей (по умолчанию все)",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=3,
+        help="Начальный интервал между запросами в секундах (дальше подстраивается)",
+    )
+    parser.add_argument(
+        "--max-rate",
+        type=float,
+        default=5.0,
+        help="Максимальная частота запросов в секунду",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Количество параллельных воркеров",
+    )
+    parser.add_argument(
+        "--journal",
+        default="toyota_jdm_frames.journal.jsonl",
+        help="Журнал состояния парсинга (для автоматического возобновления)",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Очистить журнал и начать парсинг заново",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Загружать только новые и изменившиеся модели, остальные взять из прошлого результата",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="В инкрементальном режиме проверять неизменившиеся модели условным запросом",
+    )
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Разбирать все страницы, даже если список кузовов не изменился с прошлого результата",
+    )
+    parser.add_argument(
+        "--stream-output",
+        default="toyota_jdm_frames.ndjson",
+        help="Файл NDJSON, в который модели пишутся по мере обработки",
+    )
+    parser.add_argument(
+        "--no-finalize",
+        action="store_true",
+        help="Не собирать toyota_jdm_frames.json из потока NDJSON",
+    )
+    parser.add_argument(
+        "--retry-rounds",
+        type=int,
+        default=2,
+        help="Сколько раз повторять модель без кузовов после быстрой первой попытки (0 = сразу)",
+    )
+    parser.add_argument(
+        "--retry-cooldown",
+        type=float,
+        default=30.0,
+        help="Пауза перед первым отложенным повтором в секундах (удваивается с каждым кругом)",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        nargs="?",
+        const=DEFAULT_FAILED_PATH,
+        default=None,
+        metavar="FILE",
+        help="Загрузить только модели из failed_models.json, остальные взять из журнала",
+    )
+    parser.add_argument(
+        "--browser-profile",
+        choices=BROWSER_PROFILES,
+        default=DEFAULT_PROFILE,
+        help="Профиль Chrome: lean - без картинок, шрифтов, стилей и сторонних скриптов",
+    )
+    add_cache_arguments(parser)
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        help="Обрабатывать только часть K из N (например 2/4), см. sharding.py",
+    )
+    parser.add_argument(
+        "--shard-registry",
+        default=DEFAULT_REGISTRY_PATH,
+        help="Общий файл состояния шардов",
+    )
+    parser.add_argument(
+        "--metrics",
+        default="toyota_jdm_frames.metrics.json",
+        help="Файл метрик запуска (.prom - формат Prometheus, иначе JSON)",
+    )
+    parser.add_argument(
+        "--no-metrics",
+        action="store_true",
+        help="Не сохранять метрики запуска",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=None,
+        help="Выводить сводку метрик в лог каждые N секунд",
+    )
+    add_fixture_arguments(parser)
+    add_index_arguments(parser)
+    add_columnar_arguments(parser)
+    add_logging_arguments(parser)
+    add_snapshot_arguments(parser)
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     # Примеры использования:
 
-    # Парсинг всех моделей
-    scrape_toyota_frames()
+    # Парсинг всех моделей через HTTP
+    # python frame_parse.py
 
-    # Парсинг с определенного индекса (для возобновления)
-    # scrape_toyota_frames(start_index=50)
+    # Парсинг через Selenium
+    # python frame_parse.py --engine selenium
 
-    # Парсинг только первых 10 моделей для тестирования
-    # scrape_toyota_frames(max_models=10, delay_between_requests=2)
+    # Возобновление после сбоя происходит автоматически по журналу,
+    # для парсинга с нуля:
+    # python frame_parse.py --no-resume
+
+    # Парсинг с определенного индекса
+    # python frame_parse.py --start-index 50
 
-    # Парсинг с 20-й модели, максимум 30 моделей
-    # scrape_toyota_frames(start_index=20, max_models=30, delay_between_requests=5)
+    # Парсинг только первых 10 моделей для тестирования
+    # python frame_parse.py --max-models 10 --delay 2
+
+    # Параллельный парсинг: 4 воркера, старт с 2 запросов в секунду,
+    # частота подстраивается под сайт, но не выше 4 запросов в секунду
+    # python frame_parse.py --workers 4 --delay 0.5 --max-rate 4
+
+    args = parse_args()
+    parsing_info = scrape_toyota_frames(
+        start_index=args.start_index,
+        max_models=args.max_models,
+        delay_between_requests=args.delay,
+        engine=args.engine,
+        workers=args.workers,
+        journal_path=args.journal,
+        resume=not args.no_resume,
+        cache_path=None if args.no_cache else args.cache,
+        cache_ttl=args.cache_ttl,
+        cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+        incremental=args.incremental,
+        revalidate=args.revalidate,
+        reparse=args.reparse,
+        stream_output=args.stream_output,
+        finalize_json=not args.no_finalize,
+        max_requests_per_second=args.max_rate,
+        record=args.record,
+        replay=args.replay,
+        shard=args.shard,
+        shard_registry=args.shard_registry,
+        index_path=None if args.no_index else args.index,
+        columnar_path=None if args.no_columnar else args.columnar,
+        log_options=logging_options(args),
+        metrics_path=None if args.no_metrics else args.metrics,
+        metrics_interval=args.metrics_interval,
+        snapshot_dir=None if args.no_snapshot else args.snapshots,
+        browser_profile=args.browser_profile,
+        retry_rounds=args.retry_rounds,
+        retry_cooldown=args.retry_cooldown,
+        retry_failed=args.retry_failed,
+    )
+    # Незавершенный запуск (критическая ошибка, неожиданное исключение) -
+    # ненулевой код выхода, по нему sharding.py считает шард неудачным
+    if parsing_info is None:
+        sys.exit(1)
@@ -0,0 +1,284 @@
+"""
+Фронтир обхода: приведение URL к каноническому виду, отсев уже
+встреченных адресов и очередь страниц с приоритетами по сайтам.
+
+Одна и та же страница может встретиться под разными адресами
+(HOST в другом регистре, без завершающего слэша, параметры запроса в
+другом порядке, якорь #...) и по нескольким ссылкам: запасные селекторы
+кузовов и общие подстраницы групп возвращают одинаковые ссылки. Перед
+постановкой в очередь URL приводится к каноническому виду и проверяется
+по множеству встреченных адресов, поэтому за запуск каждая страница
+загружается один раз.
+
+Встреченные адреса хранятся либо точно (множество 8-байтовых хешей,
+~100 байт на адрес), либо в фильтре Блума фиксированного размера
+(для миллионов адресов, в памяти или в файле на диске). Фильтр Блума
+изредка (с вероятностью error_rate) считает новый адрес встреченным.
+
+    seen = BloomFilter(capacity=10_000_000, path="cache/seen.bloom")
+    url = canonicalize_url(href, base=page_url)
+    if seen.add(url):
+        frontier.put({"url": url, "path": path, "priority": 1})
+"""
+
+import hashlib
+import heapq
+import itertools
+import math
+import mmap
+import os
+import queue
+import re
+import threading
+from collections import deque
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Порты по умолчанию, которые не пишутся в каноническом URL
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# Процентное кодирование в верхнем регистре (%2f -> %2F)
+_PERCENT_RE = re.compile(r"%[0-9a-fA-F]{2}")
+_SLASHES_RE = re.compile(r"/{2,}")
+
+
+def canonicalize_url(url, base=None):
+    """
+    Канонический вид URL
+
+    Схема и хост в нижнем регистре, без порта по умолчанию, якоря и
+    повторных слэшей, параметры запроса отсортированы, у страниц-каталогов
+    (последний сегмент пути без расширения) - завершающий слэш, как в
+    адресах epc-data.com.
+
+    Args:
+        url: Адрес (абсолютный или относительный)
+        base: Адрес страницы для относительных ссылок
+    """
+    if base:
+        url = urljoin(base, url)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = _SLASHES_RE.sub("/", parts.path) or "/"
+    last_segment = path.rsplit("/", 1)[-1]
+    if last_segment and "." not in last_segment:
+        path += "/"
+    path = _PERCENT_RE.sub(lambda match: match.group(0).upper(), path)
+
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_host(url):
+    """Хост URL (ключ очереди сайта)"""
+    return urlsplit(url).hostname or ""
+
+
+def dedup_links(links, page_url):
+    """
+    Ссылки со страницы без повторов и навигации
+
+    Повторы определяются по каноническому виду адреса, но в результат
+    ссылка попадает в исходном виде - так же, как в прошлых результатах
+    (инкрементальный режим и снимки сравнивают адреса как есть).
+    Отбрасываются ссылки на другие сайты, на саму страницу и на главную
+    страницу сайта, которые возвращают запасные селекторы вида
+    `table a[href*='/']`.
+
+    Args:
+        links: Список словарей {"text", "href"} (extract_links)
+        page_url: Адрес страницы, с которой взяты ссылки
+
+    Returns:
+        list: Ссылки в исходном порядке (href не изменяется)
+    """
+    page = canonicalize_url(page_url)
+    page_parts = urlsplit(page)
+    navigation = {page, urlunsplit((page_parts.scheme, page_parts.netloc, "/", "", ""))}
+    unique = []
+    seen = set()
+    for link in links:
+        key = canonicalize_url(link["href"], base=page_url)
+        if urlsplit(key).netloc != page_parts.netloc:
+            continue
+        if key in navigation or key in seen:
+            continue
+        seen.add(key)
+        unique.append(link)
+    return unique
+
+
+def _url_digest(url):
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+
+class SeenUrls:
+    """Точное множество встреченных URL (хранятся 8-байтовые хеши)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hashes = set()
+
+    def add(self, url):
+        """
+        Отмечает URL встреченным
+
+        Returns:
+            bool: True - адрес новый, False - уже встречался
+        """
+        key = int.from_bytes(_url_digest(url)[:8], "little")
+        with self._lock:
+            if key in self._hashes:
+                return False
+            self._hashes.add(key)
+            return True
+
+    def __contains__(self, url):
+        key = int.from_bytes(_url_digest(url)[:8], "little")
+        with self._lock:
+            return key in self._hashes
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hashes)
+
+    def close(self):
+        pass
+
+
+class BloomFilter:
+    """
+    Фильтр Блума фиксированного размера для встреченных URL
+
+    Размер не зависит от количества адресов: для capacity адресов и
+    error_rate 1e-6 нужно ~3.6 байта на адрес (36 МБ на 10 млн). С path
+    биты хранятся в файле, отображенном в память: в памяти остаются
+    только используемые страницы файла.
+    """
+
+    def __init__(self, capacity=10_000_000, error_rate=1e-6, path=None):
+        """
+        Args:
+            capacity: Ожидаемое количество адресов
+            error_rate: Допустимая доля новых адресов, ошибочно
+                считающихся встреченными, при capacity адресах
+            path: Файл фильтра (None = в памяти). Существующий файл
+                очищается: фильтр действует в пределах одного запуска
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        size = (self.bits + 7) // 8
+        self.path = path
+        self._lock = threading.Lock()
+        self._count = 0
+        self._file = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(path, "w+b")
+            self._file.truncate(size)
+            self._array = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._array = bytearray(size)
+
+    def _positions(self, url):
+        digest = _url_digest(url)
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def add(self, url):
+        """
+        Отмечает URL встреченным
+
+        Returns:
+            bool: True - адрес новый, False - уже встречался (или ложное
+                срабатывание фильтра)
+        """
+        positions = self._positions(url)
+        with self._lock:
+            new = False
+            for position in positions:
+                byte, bit = divmod(position, 8)
+                mask = 1 << bit
+                if not self._array[byte] & mask:
+                    self._array[byte] |= mask
+                    new = True
+            if new:
+                self._count += 1
+            return new
+
+    def __contains__(self, url):
+        positions = self._positions(url)
+        with self._lock:
+            return all(
+                self._array[position // 8] & (1 << position % 8) for position in positions
+            )
+
+    def __len__(self):
+        """Количество добавленных адресов"""
+        with self._lock:
+            return self._count
+
+    def close(self):
+        if self._file is not None:
+            self._array.close()
+            self._file.close()
+            self._file = None
+
+
+def make_seen_filter(capacity=None, path=None, error_rate=1e-6):
+    """
+    Множество встреченных URL: точное (capacity не задан) или фильтр Блума
+    """
+    if capacity is None and path is None:
+        return SeenUrls()
+    return BloomFilter(capacity or 10_000_000, error_rate, path)
+
+
+class FrontierQueue(queue.Queue):
+    """
+    Очередь страниц с приоритетами и отдельной очередью на каждый сайт
+
+    Совместима с queue.Queue (put/get/task_done/join, maxsize для
+    ограничения памяти). Элемент - словарь с ключом "url" и
+    необязательным "priority" (меньше - раньше). Внутри сайта элементы
+    выдаются по приоритету, между сайтами - по очереди, поэтому один
+    большой сайт не задерживает остальные.
+    """
+
+    def _init(self, maxsize):
+        self._hosts = {}
+        self._ready_hosts = deque()
+        self._order = itertools.count()
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, item):
+        # Маркеры остановки воркеров (не словари) идут в общую очередь ""
+        host = url_host(item["url"]) if isinstance(item, dict) else ""
+        priority = item.get("priority", 0) if isinstance(item, dict) else math.inf
+        heap = self._hosts.get(host)
+        if heap is None:
+            heap = self._hosts[host] = []
+            self._ready_hosts.append(host)
+        heapq.heappush(heap, (priority, next(self._order), item))
+        self._size += 1
+
+    def _get(self):
+        host = self._ready_hosts.popleft()
+        heap = self._hosts[host]
+        _, _, item = heapq.heappop(heap)
+        if heap:
+            self._ready_hosts.append(host)
+        else:
+            del self._hosts[host]
+        self._size -= 1
+        return item
@@ -0,0 +1,276 @@
+"""
+Дисковый кэш HTTP ответов с условной ревалидацией.
+
+Хранит тело страницы, ETag/Last-Modified и время загрузки в SQLite.
+Пока запись свежее TTL, страница отдается из кэша без запроса к сайту.
+Устаревшие записи ревалидируются условным GET (If-None-Match /
+If-Modified-Since): ответ 304 обновляет время загрузки, тело берется
+из кэша. Вместе со страницей можно сохранить результат ее разбора и
+отпечаток (incremental.page_fingerprint), чтобы не парсить
+неизменившиеся страницы повторно. Размер кэша
+ограничен, при превышении удаляются давно не использованные записи (LRU).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "cache/http_cache.sqlite"
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Сколько попаданий в кэш накапливать перед записью времени обращения
+ACCESS_FLUSH_BATCH = 256
+
+
+class CacheEntry:
+    """Запись кэша"""
+
+    def __init__(self, url, body, etag, last_modified, fetched_at):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl):
+        return ttl > 0 and time.time() - self.fetched_at < ttl
+
+    def conditional_headers(self):
+        """Заголовки условного запроса для ревалидации"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Кэш HTTP ответов в SQLite с TTL и LRU вытеснением"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: Путь к файлу базы кэша
+            ttl: Время в секундах, в течение которого запись отдается без ревалидации
+            max_bytes: Максимальный суммарный размер тел страниц в кэше
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Время последнего обращения к записям, еще не записанное в базу:
+        # попадания в кэш не коммитятся по одному, а сбрасываются пачкой
+        self._accessed = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Кэш может быть общим для нескольких процессов (шарды): ждем
+        # снятия блокировки записи, а не падаем сразу
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                parsed TEXT,
+                fingerprint TEXT
+            )
+            """
+        )
+        # Кэш прежней версии без отпечатков страниц
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(responses)")]
+        if "fingerprint" not in columns:
+            self._conn.execute("ALTER TABLE responses ADD COLUMN fingerprint TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        # Суммарный размер тел хранится в отдельной строке и поддерживается
+        # триггерами, чтобы не считать SUM(size) по всей таблице при каждой
+        # записи. Триггеры срабатывают в той же транзакции, поэтому счетчик
+        # верен и при общем кэше у нескольких процессов
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            """
+            INSERT OR IGNORE INTO cache_meta (key, value)
+            SELECT 'total_size', COALESCE(SUM(size), 0) FROM responses
+            """
+        )
+        self._conn.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses
+            BEGIN
+                UPDATE cache_meta SET value = value + NEW.size WHERE key = 'total_size';
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses
+            BEGIN
+                UPDATE cache_meta SET value = value - OLD.size + NEW.size WHERE key = 'total_size';
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses
+            BEGIN
+                UPDATE cache_meta SET value = value - OLD.size WHERE key = 'total_size';
+            END;
+            """
+        )
+        self._conn.commit()
+
+    def get(self, url):
+        """Возвращает CacheEntry или None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[url] = time.time()
+            if len(self._accessed) >= ACCESS_FLUSH_BATCH:
+                self._flush_accessed()
+                self._conn.commit()
+
+        body, etag, last_modified, fetched_at = row
+        return CacheEntry(url, body, etag, last_modified, fetched_at)
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Сохраняет новую версию страницы (результат разбора и отпечаток сбрасываются)"""
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(url, None)
+            # UPSERT вместо INSERT OR REPLACE: замена строки через REPLACE
+            # не вызывает триггер удаления, и счетчик размера разошелся бы
+            self._conn.execute(
+                """
+                INSERT INTO responses
+                    (url, body, etag, last_modified, fetched_at, accessed_at, size, parsed, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)
+                ON CONFLICT (url) DO UPDATE SET
+                    body = excluded.body,
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at,
+                    accessed_at = excluded.accessed_at,
+                    size = excluded.size,
+                    parsed = NULL,
+                    fingerprint = NULL
+                """,
+                (url, body, etag, last_modified, now, now, len(body.encode("utf-8"))),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url):
+        """Отмечает успешную ревалидацию (ответ 304)"""
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(url, None)
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (now, now, url),
+            )
+            self._conn.commit()
+
+    def get_parsed(self, url):
+        """Возвращает сохраненный результат разбора страницы или None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT parsed FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def get_fingerprint(self, url):
+        """Возвращает отпечаток текущей версии страницы или None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def store_parsed(self, url, data, fingerprint=None):
+        """
+        Сохраняет результат разбора текущей версии страницы
+
+        Args:
+            fingerprint: Отпечаток страницы, посчитанный при разборе
+                (None = не сохранять)
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET parsed = ?, fingerprint = ? WHERE url = ?",
+                (json.dumps(data, ensure_ascii=False), fingerprint, url),
+            )
+            self._conn.commit()
+
+    def _flush_accessed(self):
+        """Записывает накопленные времена обращений (без commit)"""
+        if not self._accessed:
+            return
+        self._conn.executemany(
+            "UPDATE responses SET accessed_at = MAX(accessed_at, ?) WHERE url = ?",
+            [(accessed_at, url) for url, accessed_at in self._accessed.items()],
+        )
+        self._accessed.clear()
+
+    def _evict(self):
+        """Удаляет давно не использованные записи сверх max_bytes"""
+        total = self._conn.execute(
+            "SELECT value FROM cache_meta WHERE key = 'total_size'"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Порядок вытеснения должен учитывать последние попадания в кэш
+        self._flush_accessed()
+        rows = self._conn.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at ASC"
+        ).fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+
+    def close(self):
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
+
+
+def add_cache_arguments(parser):
+    """Добавляет в argparse параметры кэша HTTP ответов"""
+    parser.add_argument(
+        "--cache",
+        default=DEFAULT_CACHE_PATH,
+        help="Файл кэша HTTP ответов",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=int,
+        default=DEFAULT_TTL,
+        help="Время в секундах, в течение которого страница берется из кэша без запроса",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Максимальный размер кэша в МБ",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Не использовать кэш HTTP ответов",
+    )
@@ -0,0 +1,208 @@
+"""
+Инкрементальный повторный парсинг кузовов.
+
+Сравнивает свежий список моделей (toyota_jdm_models.json) с результатом
+прошлого запуска (toyota_jdm_frames.json) и определяет, какие модели
+нужно загрузить заново: новые, с изменившейся записью в списке и,
+при ревалидации, все остальные (через кэш HTTP с условными запросами,
+поэтому неизменившиеся страницы не скачиваются и не разбираются).
+Удаленные модели просто не попадают в новый результат.
+
+Из загруженной страницы модели кузова тоже не извлекаются, если не
+изменился ее список: отпечаток элементов .category2 (page_fingerprint)
+сохраняется в результате вместе с кузовами, и при совпадении отпечатка
+кузова берутся из прошлого результата. В отличие от кэша HTTP, который
+сравнивает страницу целиком, отпечаток не меняется от рекламы, счетчиков
+и прочего содержимого вокруг списка и работает и для Selenium, и без кэша.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from ndjson_output import iter_ndjson
+
+# Причины повторной загрузки модели
+REASON_NEW = "new"
+REASON_CHANGED = "changed"
+REASON_REVALIDATE = "revalidate"
+
+# Версия отпечатков: увеличивается при изменении разбора кузовов, чтобы
+# результаты прошлой версии не использовались повторно
+FINGERPRINT_VERSION = 3
+# Элементы списка кузовов на странице модели epc-data.com (ul или div)
+FINGERPRINT_SELECTOR = ".category2"
+
+
+def load_previous_output(path):
+    """
+    Загружает результат прошлого запуска (JSON или поток NDJSON)
+
+    Returns:
+        tuple: (время завершения прошлого запуска или None,
+                {frame_name_url: model_data})
+    """
+    if not os.path.exists(path):
+        return None, {}
+
+    # Результат без итогового JSON (--no-finalize): читаем поток NDJSON,
+    # время прошлого запуска берем по времени изменения файла
+    if path.endswith(".ndjson"):
+        models = {model["frame_name_url"]: model for model in iter_ndjson(path)}
+        modified = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+        return modified, models
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        return None, {}
+
+    parsing_info = data.get("parsing_info", {})
+    models = {model["frame_name_url"]: model for model in data.get("models", [])}
+    return parsing_info.get("completed_at") or parsing_info.get("timestamp"), models
+
+
+def plan_incremental(models, previous_models, revalidate=False):
+    """
+    Сравнивает список моделей с прошлым результатом
+
+    Args:
+        models: Модели текущего списка (в исходном порядке)
+        previous_models: {frame_name_url: model_data} прошлого запуска
+        revalidate: Загружать также неизменившиеся модели (условным запросом)
+
+    Returns:
+        dict: {
+            "fetch": {frame_name_url: причина},
+            "reuse": {frame_name_url: model_data прошлого запуска},
+            "removed": [model_data удаленных моделей],
+        }
+    """
+    fetch = {}
+    reuse = {}
+    current_urls = set()
+
+    for model in models:
+        url = model.get("frame_name_url", "")
+        if not url:
+            continue
+        current_urls.add(url)
+
+        previous = previous_models.get(url)
+        if previous is None:
+            fetch[url] = REASON_NEW
+        elif previous.get("name") != model.get("name"):
+            fetch[url] = REASON_CHANGED
+        elif not previous.get("frames") and not previous.get("page_fingerprint"):
+            # В прошлый раз кузова не получены - пробуем снова (страница с
+            # пустым списком кузовов имеет отпечаток и не повторяется)
+            fetch[url] = REASON_CHANGED
+        elif revalidate:
+            fetch[url] = REASON_REVALIDATE
+        else:
+            reuse[url] = previous
+
+    removed = [
+        model for url, model in previous_models.items() if url not in current_urls
+    ]
+    return {"fetch": fetch, "reuse": reuse, "removed": removed}
+
+
+def page_fingerprint(page, selectors=None):
+    """
+    Отпечаток списка кузовов на странице модели
+
+    Учитываются только элементы .category2 целиком, со всеми вложенными
+    элементами (без остальной страницы), адрес страницы (ссылки кузовов
+    строятся от него), движок разбора и селекторы профиля сайта.
+
+    Args:
+        page: Разобранная страница (extractors.ParsedPage), тот же разбор
+            используется для извлечения кузовов, если отпечаток изменился
+        selectors: Селекторы кузовов из профиля сайта (None = стандартные)
+
+    Returns:
+        str: Отпечаток или None, если элементов .category2 на странице нет
+            (такая страница всегда разбирается запасными селекторами)
+    """
+    blocks = page.outer_html(FINGERPRINT_SELECTOR)
+    if not blocks:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    header = [FINGERPRINT_VERSION, page.backend, page.base_url, selectors]
+    digest.update(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+    for block in blocks:
+        digest.update(block.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class PageFingerprints:
+    """
+    Отпечатки страниц моделей: прошлого результата и текущего запуска
+
+    Используется воркерами одновременно: match() возвращает кузова
+    прошлого результата, если отпечаток страницы не изменился, и
+    запоминает отпечаток для записи в новый результат.
+    """
+
+    def __init__(self, models=()):
+        """
+        Args:
+            models: Модели прошлого результата (с ключом page_fingerprint)
+        """
+        self._lock = threading.Lock()
+        self._stored = {}
+        self._current = {}
+        for model in models:
+            fingerprint = model.get("page_fingerprint")
+            if fingerprint:
+                self._stored[model["frame_name_url"]] = (fingerprint, model.get("frames", []))
+
+    def __len__(self):
+        return len(self._stored)
+
+    def match(self, model_url, fingerprint):
+        """
+        Запоминает отпечаток загруженной страницы модели
+
+        Returns:
+            list: Кузова прошлого результата (может быть пустым), если
+                отпечаток совпал, иначе None
+        """
+        with self._lock:
+            self._current[model_url] = fingerprint
+            stored = self._stored.get(model_url)
+        if fingerprint is None or stored is None or stored[0] != fingerprint:
+            return None
+        return [dict(frame) for frame in stored[1]]
+
+    def fingerprint(self, model_url):
+        """Отпечаток страницы модели в текущем запуске (None = не загружалась)"""
+        with self._lock:
+            return self._current.get(model_url)
+
+    def summary(self):
+        """
+        Итог сравнения загруженных страниц с прошлым результатом
+
+        Returns:
+            dict: {"unchanged", "changed", "new", "unknown": количество
+                страниц, "changed_urls": адреса изменившихся страниц}
+        """
+        summary = {"unchanged": 0, "changed": 0, "new": 0, "unknown": 0, "changed_urls": []}
+        with self._lock:
+            for model_url, fingerprint in self._current.items():
+                stored = self._stored.get(model_url)
+                if fingerprint is None:
+                    summary["unknown"] += 1
+                elif stored is None:
+                    summary["new"] += 1
+                elif stored[0] == fingerprint:
+                    summary["unchanged"] += 1
+                else:
+                    summary["changed"] += 1
+                    summary["changed_urls"].append(model_url)
+        return summary
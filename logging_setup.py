@@ -0,0 +1,217 @@
+"""
+Логирование через очередь: воркеры только кладут запись в очередь, а
+форматирование и запись в файл и консоль выполняет отдельный поток
+(QueueHandler / QueueListener). Медленный диск или консоль не задерживают
+загрузку страниц, а потоки не ждут друг друга на блокировке обработчика.
+
+Сообщения передаются в стиле logging ("Модель %s", name): строка
+собирается только для записей, которые пройдут по уровню, - logger.debug
+при уровне INFO ничего не форматирует. Текст сообщения и исключения
+фиксируется при постановке в очередь (аргументы могут измениться, пока
+запись ждет в очереди), оформление строки и запись - в потоке записи.
+
+Файлы логов ротируются по размеру (logs/<name>.log, .log.1, ...), поэтому
+каталог logs/ не растет от запуска к запуску. Дополнительно можно писать
+структурированный лог JSON Lines (logs/<name>.jsonl) для разбора
+программами.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+
+DEFAULT_LOG_DIR = "logs"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Атрибуты LogRecord; остальные (переданные через extra=) попадают в JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+# Запущенные потоки записи по имени логгера
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна JSON запись на строку: время, уровень, логгер, поток, сообщение"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler без оформления строки в вызывающем потоке
+
+    Стандартный prepare целиком форматирует запись до постановки в очередь.
+    Здесь в вызывающем потоке собирается только текст сообщения (msg % args)
+    и трассировка исключения: аргументы (списки, словари моделей) могут
+    измениться, пока запись ждет в очереди, а exc_info удерживал бы кадры
+    стека. Время, уровень и прочее оформление добавляет поток записи.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(
+    name="toyota_frame_parser",
+    level=logging.INFO,
+    log_dir=DEFAULT_LOG_DIR,
+    max_bytes=DEFAULT_MAX_BYTES,
+    backup_count=DEFAULT_BACKUP_COUNT,
+    json_lines=False,
+    console=True,
+):
+    """
+    Настраивает логгер name с записью через очередь
+
+    Args:
+        name: Имя логгера и файла лога (logs/<name>.log)
+        level: Уровень логирования (число или имя: "DEBUG", "INFO", ...)
+        log_dir: Каталог логов
+        max_bytes: Размер файла лога, после которого он ротируется
+        backup_count: Сколько старых файлов лога хранить
+        json_lines: Дополнительно писать logs/<name>.jsonl
+        console: Выводить лог в консоль
+
+    Returns:
+        logging.Logger
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    stop_logging(name)
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, f"{name}.log"),
+        maxBytes=max_bytes,
+        backupCount=backup_count,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(formatter)
+    handlers.append(file_handler)
+
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    if json_lines:
+        json_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, f"{name}.jsonl"),
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+        )
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.propagate = False
+    # Удаляем существующие обработчики чтобы избежать дублирования
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+
+    with _listeners_lock:
+        _listeners[name] = (listener, handlers)
+    return logger
+
+
+def stop_logging(name):
+    """Дописывает записи из очереди и закрывает файлы логгера name"""
+    with _listeners_lock:
+        entry = _listeners.pop(name, None)
+    if entry is None:
+        return
+    listener, handlers = entry
+    listener.stop()
+    for handler in handlers:
+        handler.close()
+
+
+@atexit.register
+def shutdown_logging():
+    """Дописывает все очереди при завершении программы"""
+    with _listeners_lock:
+        names = list(_listeners)
+    for name in names:
+        stop_logging(name)
+
+
+def add_logging_arguments(parser):
+    """Добавляет в argparse параметры логирования"""
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=("DEBUG", "INFO", "WARNING", "ERROR"),
+        help="Уровень логирования",
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="Дополнительно писать структурированный лог logs/<имя>.jsonl",
+    )
+    parser.add_argument(
+        "--log-max-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Размер файла лога в МБ, после которого он ротируется",
+    )
+    parser.add_argument(
+        "--log-backups",
+        type=int,
+        default=DEFAULT_BACKUP_COUNT,
+        help="Сколько старых файлов лога хранить",
+    )
+
+
+def logging_options(args):
+    """Параметры setup_logging из аргументов add_logging_arguments"""
+    return {
+        "level": args.log_level,
+        "json_lines": args.log_json,
+        "max_bytes": args.log_max_mb * 1024 * 1024,
+        "backup_count": args.log_backups,
+    }
@@ -1,15 +1,74 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
+import argparse
 import json
-import time
+from contextlib import nullcontext
+from browser_profile import apply_profile_driver, apply_profile_options
+from driver_pool import chromedriver_path
+from extractors import extract_links
+from fetchers import ENGINES
+from fixtures import add_fixture_arguments, open_fetcher
+from readiness import wait_for_content
+from snapshots import KIND_MODELS, add_snapshot_arguments, describe_changeset, snapshot_file
+from http_cache import ResponseCache, add_cache_arguments
 
+# Каталог Toyota по умолчанию
+CATALOG_URL = "https://toyota.epc-data.com/"
 
-# Функция для парсинга моделей Toyota с сайта
-# https://toyota.epc-data.com/
-def scrape_toyota_models():
-    url = "https://toyota.epc-data.com/"
+# Селектор для поиска ссылок на модели автомобилей
+MODEL_SELECTORS = [
+    "ul.category2 h4 a",
+]
+
+
+# Загрузка списка моделей через HTTP (без браузера)
+# record/replay: архив фикстур для записи страниц или работы офлайн
+# fetcher: открытый загрузчик долгоживущего процесса (daemon.py), не закрывается
+# limiter: общий ограничитель сайта, занимается только на время запроса
+def fetch_models_http(
+    url,
+    selectors,
+    cache=None,
+    record=None,
+    replay=None,
+    page_path="page.html",
+    fetcher=None,
+    limiter=None,
+):
+    if fetcher is not None:
+        context = nullcontext(fetcher)
+    else:
+        context = open_fetcher(record, replay, cache=cache)
+    with context as fetcher:
+        with limiter or nullcontext():
+            page = fetcher.get(url)
+
+        # Страница не изменилась - используем сохраненный результат разбора
+        if page.not_modified and fetcher.cache is not None:
+            models_data = fetcher.cache.get_parsed(url)
+            if models_data:
+                return models_data
+
+        # Сохраняем HTML-код страницы для отладки и анализа структуры
+        with open(page_path, "w") as f:
+            f.write(page.text)
+
+        _, links = extract_links(page.text, selectors, page.url)
+        # Формируем список моделей: имя и ссылка на фрейм
+        models_data = [
+            {"name": link["text"], "frame_name_url": link["href"]} for link in links
+        ]
+        if models_data and fetcher.cache is not None:
+            fetcher.cache.store_parsed(url, models_data)
+
+        return models_data
+
+
+# Загрузка списка моделей через Selenium (запасной вариант)
+# limiter: общий ограничитель сайта, занимается только на время загрузки
+# страницы (запуск браузера другие запросы к сайту не задерживает)
+def fetch_models_selenium(url, selectors, page_path="page.html", limiter=None):
+    driver = None  # Явно объявляем driver
 
     try:
         # Настройка Chrome с автоматической установкой драйвера
@@ -17,62 +76,149 @@ def scrape_toyota_models():
         options.add_argument("--headless")  # Запуск в фоновом режиме (без окна браузера)
         options.add_argument("--disable-gpu")
         options.add_argument("--no-sandbox")
+        # Без картинок, шрифтов, стилей и сторонних скриптов
+        apply_profile_options(options)
 
-        driver = None  # Явно объявляем driver
-        # Инициализация драйвера Chrome с помощью webdriver_manager
+        # Инициализация драйвера Chrome (путь к chromedriver из webdriver_manager)
         driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), options=options
+            service=Service(chromedriver_path()), options=options
         )
+        apply_profile_driver(driver)
 
-        # Открываем целевую страницу
-        driver.get(url)
-        time.sleep(10)  # Ждем загрузки страницы (можно уменьшить при стабильном интернете)
+        with limiter or nullcontext():
+            # Открываем целевую страницу
+            driver.get(url)
+            # Ждем появления списка моделей (не дольше 30 сек.) вместо фиксированной паузы
+            wait_for_content(driver, ", ".join(selectors), timeout=30, quiet_period=2)
 
         # Сохраняем HTML-код страницы для отладки и анализа структуры
-        with open("page.html", "w") as f:
-            f.write(driver.page_source)
+        page_source = driver.page_source
+        with open(page_path, "w") as f:
+            f.write(page_source)
 
-        # Селектор для поиска ссылок на модели автомобилей
-        selectors = [
-            "ul.category2 h4 a",
+        # Разбираем HTML тем же извлекателем, что и в режиме http,
+        # вместо запросов text/href к WebDriver для каждого элемента
+        _, links = extract_links(page_source, selectors, driver.current_url)
+        # Формируем список моделей: имя и ссылка на фрейм
+        return [
+            {"name": link["text"], "frame_name_url": link["href"]} for link in links
         ]
 
-        models_data = []
-        for selector in selectors:
-            # Ищем элементы по CSS-селектору
-            elements = driver.find_elements(By.CSS_SELECTOR, selector)
-            if elements:
-                # Формируем список моделей: имя и ссылка на фрейм
-                models_data = [
-                    {
-                        "name": el.text.strip(),
-                        "frame_name_url": el.get_attribute("href"),
-                    }
-                    for el in elements
-                ]
-                break  # Если нашли элементы, прекращаем перебор селекторов
+    finally:
+        # Корректное завершение работы драйвера
+        if driver is not None:
+            driver.quit()
+
+
+# Функция для парсинга моделей Toyota с сайта
+# https://toyota.epc-data.com/
+# engine: "http" (по умолчанию) или "selenium"
+# cache: ResponseCache для условных запросов (только режим http)
+# record/replay: архив фикстур (только режим http)
+# snapshot_dir: каталог снимков результата (None = не сохранять снимок)
+# url/selectors/output_filename/page_path: каталог другой марки (см. site_profiles.py)
+# fetcher: открытый загрузчик (daemon.py) вместо создания нового
+# limiter: общий ограничитель сайта (site_profiles.py, daemon.py) - занимается
+# на каждый запрос к сайту, а не на весь разбор
+# Возвращает список моделей или None при ошибке
+def scrape_toyota_models(
+    engine="http",
+    cache=None,
+    record=None,
+    replay=None,
+    snapshot_dir=None,
+    url=CATALOG_URL,
+    selectors=MODEL_SELECTORS,
+    output_filename="toyota_jdm_models.json",
+    page_path="page.html",
+    fetcher=None,
+    limiter=None,
+):
+    try:
+        models_data = None
+        use_http = engine == "http" or replay or fetcher is not None
+        if use_http:
+            try:
+                models_data = fetch_models_http(
+                    url,
+                    selectors,
+                    cache,
+                    record,
+                    replay,
+                    page_path=page_path,
+                    fetcher=fetcher,
+                    limiter=limiter,
+                )
+            except Exception as e:
+                # Офлайн-прогон по архиву не должен обращаться к сайту
+                if replay:
+                    raise
+                print(f"HTTP request failed: {e}")
+
+        # Запасной вариант: страница могла быть отдана без списка моделей
+        # (защита от ботов, контент через JavaScript) - пробуем через браузер
+        if not models_data and not replay:
+            if use_http:
+                print("No models found via HTTP, retrying with Selenium")
+            models_data = fetch_models_selenium(
+                url, selectors, page_path=page_path, limiter=limiter
+            )
 
         if not models_data:
-            print("No models found. Check saved page.html for structure.")
-            return
+            print(f"No models found. Check saved {page_path} for structure.")
+            return None
 
         # Сохраняем результат в JSON-файл
-        with open("toyota_jdm_models.json", "w") as f:
+        with open(output_filename, "w") as f:
             json.dump({"models": models_data}, f, indent=2)
 
         print(f"Successfully scraped {len(models_data)} models")
 
+        # Версия списка моделей и изменения с прошлого запуска
+        if snapshot_dir:
+            snapshot, changeset = snapshot_file(output_filename, KIND_MODELS, snapshot_dir)
+            print(f"Snapshot: {snapshot['id']}")
+            if changeset is not None:
+                print(describe_changeset(changeset))
+
+        return models_data
+
     except Exception as e:
         # Обработка ошибок
         print(f"An error occurred: {e}")
         if 'cannot find Chrome binary' in str(e):
             print("Google Chrome не найден. Пожалуйста, установите Chrome и добавьте его в PATH.")
-    finally:
-        # Корректное завершение работы драйвера
-        if 'driver' in locals() and driver is not None:
-            driver.quit()
+        return None
 
 
 # Точка входа: запуск парсера при запуске скрипта напрямую
 if __name__ == "__main__":
-    scrape_toyota_models()
+    parser = argparse.ArgumentParser(description="Парсер моделей Toyota")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="http",
+        help="Движок загрузки страниц (по умолчанию http, selenium - запасной)",
+    )
+    add_cache_arguments(parser)
+    add_fixture_arguments(parser)
+    add_snapshot_arguments(parser)
+    args = parser.parse_args()
+
+    # Кэш нужен только загрузчику http (в том числе при записи фикстур)
+    cache = None
+    if not args.no_cache and not args.replay and args.engine == "http":
+        cache = ResponseCache(
+            args.cache, ttl=args.cache_ttl, max_bytes=args.cache_max_mb * 1024 * 1024
+        )
+    try:
+        scrape_toyota_models(
+            engine=args.engine,
+            cache=cache,
+            record=args.record,
+            replay=args.replay,
+            snapshot_dir=None if args.no_snapshot else args.snapshots,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,249 @@
+"""
+Метрики запуска парсера: длительность фаз загрузки и разбора страниц,
+гистограммы времени обработки моделей и счетчики (попытки, сработавшие
+селекторы, исходы).
+
+Метрики собираются в памяти во время работы и в конце запуска пишутся в
+файл: JSON (по умолчанию) или текстовый формат Prometheus (файл .prom).
+Во время работы сводка может периодически выводиться в лог.
+
+    metrics = RunMetrics()
+    with metrics.phase("driver_get"):
+        driver.get(url)
+    metrics.count("selector_hits", selector="ul.category2 h4 a")
+    write_metrics(metrics, "toyota_jdm_frames.metrics.json")
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Границы корзин гистограмм в секундах (как в клиентах Prometheus)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Префикс имен метрик в формате Prometheus
+METRIC_PREFIX = "toyota_parser_"
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    """Метки в формате Prometheus: {key="value",...}"""
+    if not labels:
+        return ""
+    items = (
+        key + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels
+    )
+    return "{" + ",".join(items) + "}"
+
+
+class Histogram:
+    """Гистограмма значений с фиксированными корзинами"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя - +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        position = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets)
+        )
+        self.counts[position] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        Оценка квантиля по корзинам (линейная интерполяция внутри корзины,
+        как histogram_quantile в Prometheus)
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == math.inf else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class RunMetrics:
+    """Потокобезопасный сборщик метрик одного запуска"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value, **labels):
+        """Добавляет значение в гистограмму name с метками labels"""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def count(self, name, value=1, **labels):
+        """Увеличивает счетчик name с метками labels"""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def phase(self, name, **labels):
+        """Замеряет длительность блока как фазу name (гистограмма phase_seconds)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("phase_seconds", time.perf_counter() - started, phase=name, **labels)
+
+    def to_dict(self):
+        """Метрики в виде словаря для JSON"""
+        with self._lock:
+            histograms = {}
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                histograms.setdefault(name, []).append(
+                    {"labels": dict(labels), **histogram.to_dict()}
+                )
+            counters = {}
+            for (name, labels), value in sorted(self._counters.items()):
+                counters.setdefault(name, []).append({"labels": dict(labels), "value": value})
+        return {
+            "started_at": self.started,
+            "duration": round(time.time() - self.started, 3),
+            "histograms": histograms,
+            "counters": counters,
+        }
+
+    def to_prometheus(self):
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            histogram_names = sorted({name for name, _ in self._histograms})
+            for name in histogram_names:
+                metric = METRIC_PREFIX + name
+                lines.append(f"# TYPE {metric} histogram")
+                for (key_name, labels), histogram in sorted(self._histograms.items()):
+                    if key_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == math.inf else str(bound)
+                        lines.append(f"{metric}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+
+            counter_names = sorted({name for name, _ in self._counters})
+            for name in counter_names:
+                metric = METRIC_PREFIX + name + "_total"
+                lines.append(f"# TYPE {metric} counter")
+                for (key_name, labels), value in sorted(self._counters.items()):
+                    if key_name == name:
+                        lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """Краткая сводка для лога: моделей, среднее и p95 по фазам"""
+        with self._lock:
+            models = sum(
+                h.count for (name, _), h in self._histograms.items() if name == "model_seconds"
+            )
+            phases = [
+                (dict(labels).get("phase"), h)
+                for (name, labels), h in sorted(self._histograms.items())
+                if name == "phase_seconds"
+            ]
+            parts = [
+                f"{phase} {h.sum / h.count * 1000:.1f}/{h.quantile(0.95) * 1000:.1f} мс"
+                for phase, h in phases
+                if h.count
+            ]
+        return f"моделей {models}; фазы (среднее/p95): " + (", ".join(parts) or "-")
+
+
+def write_metrics(metrics, path):
+    """
+    Записывает метрики в файл: .prom - формат Prometheus, иначе JSON
+
+    Файл заменяется атомарно, поэтому его можно читать во время записи
+    (например, node_exporter textfile collector).
+    """
+    if path.endswith(".prom"):
+        content = metrics.to_prometheus()
+    else:
+        content = json.dumps(metrics.to_dict(), indent=2, ensure_ascii=False)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class LiveSummary:
+    """Периодический вывод сводки метрик в лог во время работы"""
+
+    def __init__(self, metrics, logger, interval=60.0):
+        self.metrics = metrics
+        self.logger = logger
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.logger.info("Метрики: %s", self.metrics.summary())
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,97 @@
+"""
+Потоковая запись результатов в NDJSON.
+
+Каждая запись пишется отдельной строкой сразу после получения и
+сбрасывается на диск, поэтому результат можно читать (tail -f) во время
+парсинга, а память не зависит от размера результата. Привычный
+toyota_jdm_frames.json с отступами собирается отдельным шагом
+finalize_to_json, который читает поток обратно по одной записи.
+"""
+
+import json
+import threading
+
+
+class NdjsonWriter:
+    """Построчная запись JSON записей с flush после каждой"""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_ndjson(path):
+    """Читает записи NDJSON файла по одной (недописанная строка пропускается)"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def _indent_json(value, prefix):
+    """json.dumps(indent=2) со сдвигом всех строк кроме первой на prefix"""
+    text = json.dumps(value, indent=2, ensure_ascii=False)
+    return text.replace("\n", "\n" + prefix)
+
+
+def finalize_to_json(ndjson_path, json_path, parsing_info, order_key="index"):
+    """
+    Собирает JSON с отступами {"parsing_info": ..., "models": [...]} из NDJSON
+
+    Записи упорядочиваются по order_key (сам ключ в результат не попадает).
+    В памяти хранятся только ключи и смещения строк, сами записи читаются
+    и пишутся по одной. Формат совпадает с json.dump(..., indent=2).
+
+    Returns:
+        int: Количество записанных записей
+    """
+    positions = []
+    with open(ndjson_path, "rb") as f:
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            positions.append((record.get(order_key, 0), offset))
+    positions.sort()
+
+    with open(ndjson_path, "rb") as source, open(json_path, "w", encoding="utf-8") as out:
+        out.write('{\n  "parsing_info": ' + _indent_json(parsing_info, "  "))
+        out.write(',\n  "models": [')
+
+        for count, (_, offset) in enumerate(positions):
+            source.seek(offset)
+            record = json.loads(source.readline())
+            record.pop(order_key, None)
+            out.write(",\n    " if count else "\n    ")
+            out.write(_indent_json(record, "    "))
+
+        out.write("\n  ]\n}" if positions else "]\n}")
+
+    return len(positions)
@@ -0,0 +1,180 @@
+"""
+Ограничение нагрузки на сайт при параллельном парсинге.
+"""
+
+import random
+import threading
+import time
+
+
+class PolitenessLimiter:
+    """
+    Глобальный ограничитель запросов для всех воркеров
+
+    Ограничивает количество одновременных запросов (max_in_flight) и
+    частоту их начала (requests_per_second). Используется как контекстный
+    менеджер вокруг каждой загрузки страницы:
+
+        with limiter:
+            page = fetcher.get(url)
+    """
+
+    def __init__(self, max_in_flight=1, requests_per_second=None):
+        """
+        Args:
+            max_in_flight: Максимум одновременных запросов
+            requests_per_second: Максимум запросов в секунду (None = без ограничения)
+        """
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self.max_in_flight = max_in_flight
+        self.set_rate(requests_per_second)
+
+    def set_rate(self, requests_per_second):
+        """Меняет допустимую частоту запросов"""
+        with self._lock:
+            self.requests_per_second = requests_per_second
+            self._interval = (
+                1.0 / requests_per_second if requests_per_second else 0.0
+            )
+
+    def acquire(self):
+        """Ждет свободный слот и свою очередь по частоте запросов"""
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start)
+            self._next_start = start_at + self._interval
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def release(self):
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class AdaptiveRateLimiter(PolitenessLimiter):
+    """
+    Ограничитель с частотой запросов, подстраиваемой под ответы сайта (AIMD)
+
+    Пока страницы приходят быстро и с данными, частота растет на
+    постоянный шаг (additive increase). Таймаут, ошибочный статус или
+    пустая страница уменьшают частоту в несколько раз (multiplicative
+    decrease). Так парсер держится у максимальной частоты, которую сайт
+    выдерживает, вместо фиксированной частоты на худший случай.
+
+    Результат каждого запроса сообщается воркером:
+
+        with limiter:
+            page = fetcher.get(url)
+        limiter.record_success(page.elapsed)  # или limiter.record_failure()
+    """
+
+    def __init__(
+        self,
+        max_in_flight=1,
+        requests_per_second=1.0,
+        min_rate=0.1,
+        max_rate=5.0,
+        increase_step=0.05,
+        decrease_factor=0.5,
+        slow_response=5.0,
+        max_backoff=60.0,
+    ):
+        """
+        Args:
+            max_in_flight: Максимум одновременных запросов
+            requests_per_second: Начальная частота запросов
+            min_rate: Нижняя граница частоты (запросов в секунду)
+            max_rate: Верхняя граница частоты (запросов в секунду)
+            increase_step: Прибавка к частоте после успешного запроса
+            decrease_factor: Множитель частоты после неудачного запроса
+            slow_response: Время ответа в секундах, после которого успешный
+                запрос не увеличивает частоту (сайт уже под нагрузкой)
+            max_backoff: Максимальная пауза перед повторной попыткой
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.slow_response = slow_response
+        self.max_backoff = max_backoff
+        self._last_decrease = 0.0
+        self.stats = {"increases": 0, "decreases": 0, "min_rate": None, "max_rate": None}
+        super().__init__(max_in_flight, self._clamp(requests_per_second or max_rate))
+
+    def _clamp(self, rate):
+        return min(self.max_rate, max(self.min_rate, rate))
+
+    def set_rate(self, requests_per_second):
+        with self._lock:
+            self._apply_rate(requests_per_second)
+
+    def _apply_rate(self, rate):
+        """Меняет частоту (вызывается под self._lock)"""
+        self.requests_per_second = rate
+        self._interval = 1.0 / rate
+        self.stats["min_rate"] = min(self.stats["min_rate"] or rate, rate)
+        self.stats["max_rate"] = max(self.stats["max_rate"] or rate, rate)
+
+    def record_success(self, elapsed=None):
+        """Запрос успешен: увеличивает частоту, если ответ пришел быстро"""
+        if elapsed is not None and elapsed > self.slow_response:
+            return
+        with self._lock:
+            rate = self._clamp(self.requests_per_second + self.increase_step)
+            if rate != self.requests_per_second:
+                self.stats["increases"] += 1
+                self._apply_rate(rate)
+
+    def record_failure(self):
+        """
+        Запрос неудачен (таймаут, ошибка, пустая страница): снижает частоту
+
+        Returns:
+            bool: True, если частота была снижена
+        """
+        with self._lock:
+            # Ошибки одновременных запросов - следствие одной и той же
+            # перегрузки, поэтому частота снижается не чаще одного раза
+            # за время, пока выполняются запросы, начатые до снижения
+            now = time.monotonic()
+            if now - self._last_decrease < self._interval * self.max_in_flight:
+                return False
+
+            rate = self._clamp(self.requests_per_second * self.decrease_factor)
+            if rate == self.requests_per_second:
+                return False
+            self._last_decrease = now
+            self.stats["decreases"] += 1
+            self._apply_rate(rate)
+            return True
+
+    def backoff(self, attempt):
+        """
+        Пауза перед повторной попыткой номер attempt (с 0)
+
+        Растет экспоненциально от текущего интервала между запросами,
+        поэтому при сниженной частоте повторные попытки тоже реже
+        """
+        delay = min(self.max_backoff, self._interval * 2 ** (attempt + 1))
+        # Случайный разброс, чтобы воркеры не повторяли запросы одновременно
+        return delay * random.uniform(0.5, 1.0)
+
+    def snapshot(self):
+        """Текущее состояние для статистики парсинга"""
+        return {
+            "requests_per_second": round(self.requests_per_second, 3),
+            "min_requests_per_second": round(self.stats["min_rate"], 3),
+            "max_requests_per_second": round(self.stats["max_rate"], 3),
+            "increases": self.stats["increases"],
+            "decreases": self.stats["decreases"],
+        }
@@ -0,0 +1,100 @@
+"""
+Ожидание готовности страницы в WebDriver вместо фиксированных пауз.
+
+Страница считается готовой, как только на ней появилось нужное
+содержимое (элементы по CSS селектору), либо когда документ загружен и
+перестал меняться: количество узлов DOM и загруженных ресурсов не
+меняется в течение quiet_period (загрузка и скрипты закончились, а
+содержимого нет - например, пустая страница при ограничении со стороны
+сайта). Общее время ожидания ограничено timeout.
+
+    reason = wait_for_content(driver, "ul.category2 a", timeout=20)
+"""
+
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Причины готовности страницы
+READY_CONTENT = "content"  # найдено содержимое по селектору
+READY_STABLE = "stable"  # документ загружен и не меняется, содержимого нет
+READY_TIMEOUT = "timeout"  # документ загружен, но не успокоился за timeout
+
+# Состояние страницы одним вызовом: readyState, найдено элементов,
+# узлов DOM, загруженных ресурсов (Resource Timing - запись появляется
+# по завершении загрузки ресурса, поэтому неизменное число записей
+# означает отсутствие новых завершенных запросов)
+_STATE_JS = """
+return [
+    document.readyState,
+    document.querySelectorAll(arguments[0]).length,
+    document.getElementsByTagName('*').length,
+    window.performance && performance.getEntriesByType
+        ? performance.getEntriesByType('resource').length
+        : 0
+];
+"""
+
+
+def page_state(driver, selector):
+    """
+    Состояние страницы
+
+    Returns:
+        tuple: (readyState, найдено элементов, узлов DOM, ресурсов) или None,
+            если страница сейчас недоступна (например, идет переход)
+    """
+    try:
+        state = driver.execute_script(_STATE_JS, selector)
+    except WebDriverException:
+        return None
+    return tuple(state) if state else None
+
+
+def wait_for_content(driver, selector, timeout=20.0, quiet_period=0.5, poll_interval=0.1):
+    """
+    Ждет появления содержимого или окончания загрузки страницы
+
+    Args:
+        driver: WebDriver instance
+        selector: CSS селектор содержимого, при появлении которого страница готова
+        timeout: Максимальное время ожидания в секундах
+        quiet_period: Сколько секунд загруженный документ должен не меняться,
+            чтобы считать, что содержимого на странице нет
+        poll_interval: Интервал проверки состояния
+
+    Returns:
+        str: READY_CONTENT, READY_STABLE или READY_TIMEOUT
+
+    Raises:
+        TimeoutException: Документ не начал отображаться за timeout
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    loaded = False
+    last_sample = None
+    last_change = started
+
+    while True:
+        state = page_state(driver, selector)
+        now = time.monotonic()
+
+        if state is not None:
+            ready_state, matched, nodes, resources = state
+            if ready_state != "loading":
+                loaded = True
+                if matched:
+                    return READY_CONTENT
+
+            sample = (nodes, resources)
+            if sample != last_sample:
+                last_sample = sample
+                last_change = now
+            elif ready_state == "complete" and now - last_change >= quiet_period:
+                return READY_STABLE
+
+        if now >= deadline:
+            if not loaded:
+                raise TimeoutException(f"Страница не загрузилась за {timeout} сек.")
+            return READY_TIMEOUT
+        time.sleep(min(poll_interval, deadline - now))
@@ -0,0 +1,129 @@
+"""
+Отложенные повторные попытки для моделей, у которых не нашлись кузова.
+
+Неудачная модель не задерживает остальные: после одной быстрой попытки
+она попадает в очередь и повторяется позже, когда пройдет пауза
+(cooldown), а к тому времени основная масса моделей уже обработана. Пауза
+растет с каждым кругом повторов. Модели, которые не удалось получить и
+после всех кругов, записываются в failed_models.json, который можно
+обработать отдельно (frame_parse.py --retry-failed).
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_FAILED_PATH = "failed_models.json"
+
+
+class DeferredRetryQueue:
+    """
+    Очередь отложенных повторов с растущей паузой
+
+        queue.push(item)                  # после неудачи
+        for item in queue.pop_ready():    # когда пауза прошла
+            ...
+    """
+
+    def __init__(self, cooldown=30.0, factor=2.0, max_rounds=2, max_cooldown=600.0):
+        """
+        Args:
+            cooldown: Пауза перед первым повтором в секундах
+            factor: Во сколько раз растет пауза с каждым кругом
+            max_rounds: Сколько раз повторять модель после быстрой попытки
+            max_cooldown: Максимальная пауза
+        """
+        self.cooldown = cooldown
+        self.factor = factor
+        self.max_rounds = max_rounds
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._heap = []
+        self._order = itertools.count()
+        self._rounds = {}
+        self.stats = {"deferred": 0, "retried": 0, "exhausted": 0}
+
+    def push(self, key, item):
+        """
+        Откладывает элемент после неудачной попытки
+
+        Args:
+            key: Ключ элемента (URL модели) для подсчета кругов
+            item: Элемент, который вернет pop_ready
+
+        Returns:
+            bool: True - элемент поставлен в очередь, False - круги исчерпаны
+        """
+        with self._lock:
+            rounds = self._rounds.get(key, 0)
+            if rounds >= self.max_rounds:
+                self.stats["exhausted"] += 1
+                return False
+            self._rounds[key] = rounds + 1
+            delay = min(self.max_cooldown, self.cooldown * self.factor**rounds)
+            # Разброс, чтобы отложенные модели не повторялись одной пачкой
+            ready_at = time.monotonic() + delay * random.uniform(0.8, 1.2)
+            heapq.heappush(self._heap, (ready_at, next(self._order), item))
+            self.stats["deferred" if rounds == 0 else "retried"] += 1
+            return True
+
+    def rounds(self, key):
+        """Сколько раз элемент уже откладывался"""
+        with self._lock:
+            return self._rounds.get(key, 0)
+
+    def pop_ready(self, force=False):
+        """
+        Элементы, пауза которых прошла
+
+        Args:
+            force: Вернуть все элементы, не дожидаясь паузы
+        """
+        ready = []
+        now = time.monotonic()
+        with self._lock:
+            while self._heap and (force or self._heap[0][0] <= now):
+                ready.append(heapq.heappop(self._heap)[2])
+        return ready
+
+    def next_ready_in(self):
+        """Секунд до готовности ближайшего элемента (None - очередь пуста)"""
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._heap)
+
+
+def write_failed_models(models, path=DEFAULT_FAILED_PATH):
+    """
+    Записывает модели, которые не удалось обработать, в формате
+    toyota_jdm_models.json (если список пуст, файл удаляется)
+    """
+    if not models:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    data = {
+        "failed_at": datetime.now().isoformat(),
+        "models": [
+            {"name": model.get("name"), "frame_name_url": model.get("frame_name_url")}
+            for model in models
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def load_failed_urls(path=DEFAULT_FAILED_PATH):
+    """URL моделей из failed_models.json"""
+    with open(path, "r", encoding="utf-8") as f:
+        return {model["frame_name_url"] for model in json.load(f).get("models", [])}
@@ -0,0 +1,520 @@
+"""
+Поисковый индекс по результатам парсинга.
+
+Собирает toyota_jdm_frames.json (модели и кузова) и NDJSON деталей
+(deep_crawl.py) в базу SQLite с B-tree индексами по нормализованным
+ключам, поэтому поиск по коду кузова, его префиксу, названию модели и
+номеру детали - это поиск по индексу, а не просмотр всего файла. Для
+поиска по названию детали используется полнотекстовый индекс FTS5
+(если он есть в сборке SQLite).
+
+Индекс обновляется инкрементально: кузова переписываются только у
+изменившихся моделей (по хешу), из потока деталей дочитываются только
+новые строки. Поток deep_crawl.py при повторном запуске перезаписывается
+с начала, поэтому дочитывание продолжается, только если уже прочитанная
+часть файла не изменилась (по хешу), иначе детали индексируются заново.
+
+    python search_index.py build
+    python search_index.py query --frame ZZE122
+    python search_index.py query --prefix ZZE12
+    python search_index.py query --model corolla
+    python search_index.py query --part 90915 --text "oil filter"
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+DEFAULT_INDEX_PATH = "toyota_jdm.index.sqlite"
+
+# Разделители нескольких кодов в названии кузова ("NZE121, ZZE122")
+_CODE_SPLIT_RE = re.compile(r"[\s,;/]+")
+# Символ, заведомо больший любого символа кода (верхняя граница префикса)
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize_code(code):
+    """Код кузова или детали без регистра, пробелов и дефисов"""
+    return re.sub(r"[\s\-]", "", code).upper()
+
+
+def split_frame_codes(frame_name):
+    """Коды кузова из названия (одно название может содержать несколько)"""
+    return [normalize_code(part) for part in _CODE_SPLIT_RE.split(frame_name) if part]
+
+
+def part_fields(record):
+    """
+    Поля детали из записи потока deep_crawl.py
+
+    Returns:
+        dict: number, name, model, frame (коды нормализованы), path, url
+    """
+    path = record.get("path", {})
+    leaf = next((value for key, value in record.items() if key != "path"), {})
+    cells = leaf.get("cells") or [leaf.get("name", "")]
+    return {
+        "number": normalize_code(cells[0]) if cells else "",
+        "name": " ".join(cells[1:]) if len(cells) > 1 else "",
+        "model": path.get("model"),
+        "frame": normalize_code(path["frame"]) if path.get("frame") else None,
+        "path": path,
+        "url": leaf.get("url"),
+    }
+
+
+def _model_hash(model):
+    data = json.dumps([model.get("name"), model.get("frames", [])], ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def _hash_prefix(f, size, digest, chunk_size=1024 * 1024):
+    """
+    Добавляет в digest первые size байт файла
+
+    Returns:
+        str: Хеш прочитанного или None, если файл короче size
+    """
+    remaining = size
+    while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+            return None
+        digest.update(chunk)
+        remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+class SearchIndex:
+    """Индекс моделей, кузовов и деталей в SQLite"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Индекс прежней версии хранил хеш первой строки потока, по которому
+        # нельзя отличить перезапись файла от дописывания: такие источники
+        # индексируются заново
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(sources)")]
+        if "head_hash" in columns:
+            self._conn.execute("DROP TABLE sources")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS models (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS models_name_key ON models (name_key);
+
+            CREATE TABLE IF NOT EXISTS frames (
+                model_id INTEGER NOT NULL,
+                code TEXT NOT NULL,
+                frame_name TEXT NOT NULL,
+                frame_url TEXT
+            );
+            CREATE INDEX IF NOT EXISTS frames_code ON frames (code);
+            CREATE INDEX IF NOT EXISTS frames_model ON frames (model_id);
+
+            CREATE TABLE IF NOT EXISTS parts (
+                id INTEGER PRIMARY KEY,
+                number TEXT NOT NULL,
+                name TEXT NOT NULL,
+                model TEXT,
+                frame TEXT,
+                path TEXT NOT NULL,
+                url TEXT,
+                source TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS parts_number ON parts (number);
+            CREATE INDEX IF NOT EXISTS parts_frame ON parts (frame);
+            CREATE INDEX IF NOT EXISTS parts_source ON parts (source);
+
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                prefix_hash TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            """
+        )
+        self.has_fts = self._create_fts()
+        self._conn.commit()
+
+    def _create_fts(self):
+        """Полнотекстовый индекс названий деталей (None, если FTS5 недоступен)"""
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts "
+                "USING fts5(name, content='parts', content_rowid='id')"
+            )
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    # --- Обновление ---
+
+    def update_frames(self, models):
+        """
+        Обновляет модели и кузова, переписываются только изменившиеся
+
+        Args:
+            models: Модели в формате toyota_jdm_frames.json
+
+        Returns:
+            dict: {"added", "updated", "removed", "unchanged"}
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        existing = {
+            url: (model_id, content_hash)
+            for model_id, url, content_hash in self._conn.execute(
+                "SELECT id, url, content_hash FROM models"
+            )
+        }
+
+        seen = set()
+        with self._conn:
+            for model in models:
+                url = model.get("frame_name_url")
+                if not url or url in seen:
+                    continue
+                seen.add(url)
+
+                content_hash = _model_hash(model)
+                current = existing.get(url)
+                if current is not None and current[1] == content_hash:
+                    stats["unchanged"] += 1
+                    continue
+
+                name = model.get("name", "")
+                if current is None:
+                    model_id = self._conn.execute(
+                        "INSERT INTO models (url, name, name_key, content_hash) VALUES (?, ?, ?, ?)",
+                        (url, name, name.lower(), content_hash),
+                    ).lastrowid
+                    stats["added"] += 1
+                else:
+                    model_id = current[0]
+                    self._conn.execute(
+                        "UPDATE models SET name = ?, name_key = ?, content_hash = ? WHERE id = ?",
+                        (name, name.lower(), content_hash, model_id),
+                    )
+                    self._conn.execute("DELETE FROM frames WHERE model_id = ?", (model_id,))
+                    stats["updated"] += 1
+
+                self._conn.executemany(
+                    "INSERT INTO frames (model_id, code, frame_name, frame_url) VALUES (?, ?, ?, ?)",
+                    [
+                        (model_id, code, frame["frame_name"], frame.get("frame_url"))
+                        for frame in model.get("frames", [])
+                        for code in split_frame_codes(frame["frame_name"])
+                    ],
+                )
+
+            for url, (model_id, _) in existing.items():
+                if url not in seen:
+                    self._conn.execute("DELETE FROM frames WHERE model_id = ?", (model_id,))
+                    self._conn.execute("DELETE FROM models WHERE id = ?", (model_id,))
+                    stats["removed"] += 1
+
+        return stats
+
+    def update_parts(self, ndjson_path, batch_size=10000):
+        """
+        Дочитывает в индекс новые строки потока деталей (deep_crawl.py)
+
+        Уже прочитанная часть файла сверяется по хешу: если файл был
+        перезаписан (deep_crawl.py пишет поток заново при каждом запуске)
+        или стал короче, детали этого источника индексируются заново.
+
+        Returns:
+            int: Количество добавленных деталей
+        """
+        source = os.path.abspath(ndjson_path)
+        row = self._conn.execute(
+            "SELECT prefix_hash, offset FROM sources WHERE path = ?", (source,)
+        ).fetchone()
+
+        added = 0
+        batch = []
+        with open(ndjson_path, "rb") as f:
+            offset = 0
+            digest = hashlib.sha1()
+            if row is not None:
+                previous_hash, previous_offset = row
+                if _hash_prefix(f, previous_offset, digest) == previous_hash:
+                    offset = previous_offset
+            if offset == 0:
+                # Новый или перезаписанный источник: старые детали удаляются
+                self._delete_parts(source)
+                f.seek(0)
+                digest = hashlib.sha1()
+
+            for line in f:
+                # Недописанная последняя строка будет прочитана в следующий раз
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                digest.update(line)
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                batch.append(self._part_row(record, source))
+                if len(batch) >= batch_size:
+                    added += self._insert_parts(batch)
+                    batch = []
+        added += self._insert_parts(batch)
+
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (path, prefix_hash, offset, updated_at) VALUES (?, ?, ?, ?)",
+                (source, digest.hexdigest(), offset, time.time()),
+            )
+        return added
+
+    @staticmethod
+    def _part_row(record, source):
+        fields = part_fields(record)
+        return (
+            fields["number"],
+            fields["name"],
+            fields["model"],
+            fields["frame"],
+            json.dumps(fields["path"], ensure_ascii=False),
+            fields["url"],
+            source,
+        )
+
+    def _insert_parts(self, rows):
+        if not rows:
+            return 0
+        with self._conn:
+            for row in rows:
+                part_id = self._conn.execute(
+                    "INSERT INTO parts (number, name, model, frame, path, url, source) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                ).lastrowid
+                if self.has_fts:
+                    self._conn.execute(
+                        "INSERT INTO parts_fts (rowid, name) VALUES (?, ?)", (part_id, row[1])
+                    )
+        return len(rows)
+
+    def _delete_parts(self, source):
+        with self._conn:
+            if self.has_fts:
+                # Внешнее содержимое FTS5: удаляемые строки передаются явно
+                self._conn.execute(
+                    "INSERT INTO parts_fts (parts_fts, rowid, name) "
+                    "SELECT 'delete', id, name FROM parts WHERE source = ?",
+                    (source,),
+                )
+            self._conn.execute("DELETE FROM parts WHERE source = ?", (source,))
+            self._conn.execute("DELETE FROM sources WHERE path = ?", (source,))
+
+    # --- Поиск ---
+
+    def _models_with_frames(self, rows):
+        return [
+            {"model": model, "model_url": model_url, "frame_name": frame_name, "frame_url": frame_url}
+            for model, model_url, frame_name, frame_url in rows
+        ]
+
+    def find_frame(self, code):
+        """Модели с кузовом code (точное совпадение кода)"""
+        rows = self._conn.execute(
+            """
+            SELECT m.name, m.url, f.frame_name, f.frame_url
+            FROM frames f JOIN models m ON m.id = f.model_id
+            WHERE f.code = ?
+            ORDER BY m.name
+            """,
+            (normalize_code(code),),
+        )
+        return self._models_with_frames(rows)
+
+    def find_frame_prefix(self, prefix, limit=100):
+        """Кузова, код которых начинается с prefix"""
+        key = normalize_code(prefix)
+        rows = self._conn.execute(
+            """
+            SELECT m.name, m.url, f.frame_name, f.frame_url
+            FROM frames f JOIN models m ON m.id = f.model_id
+            WHERE f.code >= ? AND f.code < ?
+            ORDER BY f.code, m.name
+            LIMIT ?
+            """,
+            (key, key + _PREFIX_END, limit),
+        )
+        return self._models_with_frames(rows)
+
+    def find_model(self, name, limit=100):
+        """Модели, название которых начинается с name (без учета регистра), с кузовами"""
+        key = name.lower()
+        models = self._conn.execute(
+            "SELECT id, name, url FROM models WHERE name_key >= ? AND name_key < ? "
+            "ORDER BY name_key LIMIT ?",
+            (key, key + _PREFIX_END, limit),
+        ).fetchall()
+        return [
+            {
+                "model": model_name,
+                "model_url": url,
+                "frames": [
+                    {"frame_name": frame_name, "frame_url": frame_url}
+                    for frame_name, frame_url in self._conn.execute(
+                        "SELECT DISTINCT frame_name, frame_url FROM frames WHERE model_id = ? "
+                        "ORDER BY rowid",
+                        (model_id,),
+                    )
+                ],
+            }
+            for model_id, model_name, url in models
+        ]
+
+    def find_parts(self, number=None, text=None, frame=None, limit=100):
+        """Детали по номеру (префиксу номера), словам в названии и коду кузова"""
+        conditions = []
+        params = []
+        if number:
+            key = normalize_code(number)
+            conditions.append("p.number >= ? AND p.number < ?")
+            params += [key, key + _PREFIX_END]
+        if frame:
+            conditions.append("p.frame = ?")
+            params.append(normalize_code(frame))
+
+        query = "SELECT p.number, p.name, p.model, p.frame, p.url FROM parts p"
+        if text and self.has_fts:
+            query += " JOIN parts_fts ON parts_fts.rowid = p.id"
+            conditions.append("parts_fts MATCH ?")
+            params.append(" ".join(f'"{word}"' for word in text.split()))
+        elif text:
+            conditions.append("p.name LIKE ?")
+            params.append(f"%{text}%")
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " LIMIT ?"
+        params.append(limit)
+
+        return [
+            {"number": number, "name": name, "model": model, "frame": frame_code, "url": url}
+            for number, name, model, frame_code, url in self._conn.execute(query, params)
+        ]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def update_index(
+    index_path=DEFAULT_INDEX_PATH,
+    frames_path="toyota_jdm_frames.json",
+    parts_path="toyota_jdm_parts.ndjson",
+):
+    """
+    Инкрементально обновляет индекс из существующих файлов результатов
+
+    Returns:
+        dict: {"frames": статистика моделей или None, "parts": добавлено деталей или None}
+    """
+    result = {"frames": None, "parts": None}
+    with SearchIndex(index_path) as index:
+        if frames_path and os.path.exists(frames_path):
+            with open(frames_path, "r", encoding="utf-8") as f:
+                models = json.load(f).get("models", [])
+            result["frames"] = index.update_frames(models)
+        if parts_path and os.path.exists(parts_path):
+            result["parts"] = index.update_parts(parts_path)
+    return result
+
+
+def add_index_arguments(parser):
+    """Добавляет в argparse параметры поискового индекса"""
+    parser.add_argument(
+        "--index",
+        default=DEFAULT_INDEX_PATH,
+        help="Поисковый индекс, обновляемый после парсинга (см. search_index.py)",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Не обновлять поисковый индекс",
+    )
+
+
+def _print_rows(rows, as_json):
+    if as_json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return
+    for row in rows:
+        if "frames" in row:
+            frames = ", ".join(frame["frame_name"] for frame in row["frames"])
+            print(f"{row['model']}: {frames}")
+        elif "number" in row:
+            print(f"{row['number']}  {row['name']}  [{row['model']} / {row['frame']}]")
+        else:
+            print(f"{row['frame_name']}  {row['model']}  {row['frame_url']}")
+    if not rows:
+        print("Ничего не найдено")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Поисковый индекс кузовов и деталей")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Файл индекса")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Обновить индекс из результатов")
+    build_parser.add_argument("--frames", default="toyota_jdm_frames.json")
+    build_parser.add_argument("--parts", default="toyota_jdm_parts.ndjson")
+
+    query_parser = commands.add_parser("query", help="Поиск по индексу")
+    query_parser.add_argument("--frame", help="Точный код кузова (ZZE122)")
+    query_parser.add_argument("--prefix", help="Префикс кода кузова (ZZE12)")
+    query_parser.add_argument("--model", help="Название модели (начало названия)")
+    query_parser.add_argument("--part", help="Номер детали (или его начало)")
+    query_parser.add_argument("--text", help="Слова в названии детали")
+    query_parser.add_argument("--limit", type=int, default=100)
+    query_parser.add_argument("--json", action="store_true", help="Вывод в JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        result = update_index(args.index, args.frames, args.parts)
+        if result["frames"] is not None:
+            print(f"Модели: {result['frames']}")
+        if result["parts"] is not None:
+            print(f"Добавлено деталей: {result['parts']}")
+
+    else:
+        with SearchIndex(args.index) as index:
+            started = time.perf_counter()
+            if args.frame:
+                rows = index.find_frame(args.frame)
+            elif args.prefix:
+                rows = index.find_frame_prefix(args.prefix, args.limit)
+            elif args.model:
+                rows = index.find_model(args.model, args.limit)
+            elif args.part or args.text:
+                rows = index.find_parts(args.part, args.text, limit=args.limit)
+            else:
+                parser.error("укажите --frame, --prefix, --model, --part или --text")
+            elapsed = time.perf_counter() - started
+
+        _print_rows(rows, args.json)
+        if not args.json:
+            print(f"Найдено: {len(rows)} за {elapsed * 1000:.2f} мс")
@@ -0,0 +1,374 @@
+"""
+Параллельный парсинг кузовов несколькими процессами (шардами).
+
+Список моделей делится на N частей по хешу URL модели, поэтому каждый
+процесс (на этой или другой машине) независимо от остальных получает
+одну и ту же часть. Каждый шард пишет свой результат, журнал и лог;
+состояние шардов (запущен, завершен, файл результата, счетчики)
+отмечается в общем файле SQLite. Команда merge собирает результаты
+шардов в один toyota_jdm_frames.json с суммарной статистикой.
+
+    python sharding.py run --shards 4 -- --workers 2      # 4 процесса локально
+    python frame_parse.py --shard 2/4                     # один шард вручную
+    python sharding.py merge                              # объединение
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+from search_index import add_index_arguments, update_index
+from columnar import add_columnar_arguments, export_frames
+from snapshots import KIND_FRAMES, add_snapshot_arguments, describe_changeset, snapshot_file
+
+DEFAULT_REGISTRY_PATH = "shards.sqlite"
+
+# Счетчики parsing_info, которые при объединении суммируются
+SUMMED_STATS = (
+    "total_models_processed",
+    "total_frames_found",
+    "models_with_zero_frames",
+    "models_retried",
+    "models_deferred",
+    "models_failed",
+    "models_resumed",
+)
+
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def parse_shard(value):
+    """
+    Разбирает номер шарда вида "K/N" (K от 1 до N)
+
+    Returns:
+        tuple: (K, N)
+
+    Raises:
+        ValueError: Неверный формат или номер шарда
+    """
+    try:
+        index, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Шард задается в виде K/N, получено: {value}")
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Номер шарда должен быть от 1 до N, получено: {value}")
+    return index, total
+
+
+def shard_of(url, total):
+    """Номер шарда (с 1) для URL модели, одинаковый во всех процессах"""
+    digest = hashlib.sha1(url.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % total + 1
+
+
+def filter_shard(indexed_models, shard):
+    """Оставляет модели шарда, сохраняя их исходные индексы"""
+    index, total = shard
+    return [
+        (i, model)
+        for i, model in indexed_models
+        if shard_of(model.get("frame_name_url", ""), total) == index
+    ]
+
+
+def shard_path(path, shard):
+    """Имя файла шарда: toyota_jdm_frames.json -> toyota_jdm_frames.shard2of4.json"""
+    index, total = shard
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{index}of{total}{ext}"
+
+
+class ShardRegistry:
+    """Общий для всех шардов файл состояния (SQLite)"""
+
+    def __init__(self, path=DEFAULT_REGISTRY_PATH):
+        self.path = path
+        # Файл открывают несколько процессов: ждем снятия блокировки
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shards (
+                shard_index INTEGER NOT NULL,
+                shard_total INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                output TEXT,
+                host TEXT,
+                pid INTEGER,
+                stats TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (shard_index, shard_total)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def update(self, shard, status, output=None, stats=None):
+        """Отмечает состояние шарда"""
+        index, total = shard
+        with self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO shards
+                    (shard_index, shard_total, status, output, host, pid, stats, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    index,
+                    total,
+                    status,
+                    output,
+                    socket.gethostname(),
+                    os.getpid(),
+                    json.dumps(stats, ensure_ascii=False) if stats is not None else None,
+                    time.time(),
+                ),
+            )
+
+    def shards(self, total=None):
+        """
+        Состояние шардов
+
+        Returns:
+            list: Словари {"shard", "status", "output", "host", "pid", "stats"}
+        """
+        query = "SELECT shard_index, shard_total, status, output, host, pid, stats FROM shards"
+        params = ()
+        if total is not None:
+            query += " WHERE shard_total = ?"
+            params = (total,)
+        rows = self._conn.execute(query + " ORDER BY shard_total, shard_index", params)
+        return [
+            {
+                "shard": (index, shard_total),
+                "status": status,
+                "output": output,
+                "host": host,
+                "pid": pid,
+                "stats": json.loads(stats) if stats else None,
+            }
+            for index, shard_total, status, output, host, pid, stats in rows
+        ]
+
+    def close(self):
+        self._conn.close()
+
+
+def merge_parsing_info(infos):
+    """Суммирует статистику шардов"""
+    merged = {
+        "timestamp": min(
+            (info["timestamp"] for info in infos if info.get("timestamp")), default=None
+        ),
+        "shards": len(infos),
+    }
+    for key in SUMMED_STATS:
+        merged[key] = sum(info.get(key, 0) for info in infos)
+    completed = [info["completed_at"] for info in infos if info.get("completed_at")]
+    if completed:
+        merged["completed_at"] = max(completed)
+    return merged
+
+
+def merge_shards(paths, output_filename, models_path="toyota_jdm_models.json"):
+    """
+    Объединяет результаты шардов в один файл
+
+    Модели упорядочиваются как в models_path (модели, которых там нет,
+    идут в конце), числовая статистика parsing_info суммируется.
+
+    Returns:
+        dict: parsing_info объединенного результата
+    """
+    order = {}
+    if os.path.exists(models_path):
+        with open(models_path, "r", encoding="utf-8") as f:
+            for position, model in enumerate(json.load(f).get("models", [])):
+                order.setdefault(model.get("frame_name_url", ""), position)
+
+    infos = []
+    models = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        infos.append(data.get("parsing_info", {}))
+        models.extend(data.get("models", []))
+
+    models.sort(key=lambda model: order.get(model.get("frame_name_url", ""), len(order)))
+    parsing_info = merge_parsing_info(infos)
+
+    with open(output_filename, "w", encoding="utf-8") as f:
+        json.dump({"parsing_info": parsing_info, "models": models}, f, indent=2, ensure_ascii=False)
+    return parsing_info
+
+
+def run_local(total, frame_parse_args, registry_path=DEFAULT_REGISTRY_PATH):
+    """
+    Запускает все шарды локально отдельными процессами и ждет завершения
+
+    Returns:
+        int: Количество шардов, завершившихся с ошибкой
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frame_parse.py")
+    processes = [
+        subprocess.Popen(
+            [
+                sys.executable,
+                script,
+                "--shard",
+                f"{index}/{total}",
+                "--shard-registry",
+                registry_path,
+                *frame_parse_args,
+            ]
+        )
+        for index in range(1, total + 1)
+    ]
+    return sum(1 for process in processes if process.wait() != 0)
+
+
+def _after_merge(output_filename, index_path=None, snapshot_dir=None, columnar_path=None):
+    """Снимок, поисковый индекс и колоночный экспорт объединенного результата"""
+    if snapshot_dir:
+        snapshot, changeset = snapshot_file(output_filename, KIND_FRAMES, snapshot_dir)
+        print(f"Снимок результата: {snapshot['id']}")
+        if changeset is not None:
+            print(f"Изменения каталога: {describe_changeset(changeset)}")
+    if index_path:
+        stats = update_index(index_path, output_filename, parts_path=None)
+        print(f"Поисковый индекс {index_path} обновлен: {stats['frames']}")
+    if columnar_path:
+        rows = export_frames(output_filename, columnar_path)
+        print(f"Колоночный экспорт: {columnar_path} ({rows} строк)")
+
+
+def _merge_from_registry(
+    registry_path,
+    total,
+    output_filename,
+    index_path=None,
+    snapshot_dir=None,
+    columnar_path=None,
+):
+    registry = ShardRegistry(registry_path)
+    try:
+        shards = registry.shards(total)
+    finally:
+        registry.close()
+
+    if not shards:
+        print(f"В {registry_path} нет шардов")
+        return 1
+
+    total = total or shards[-1]["shard"][1]
+    shards = [shard for shard in shards if shard["shard"][1] == total]
+    done = [shard for shard in shards if shard["status"] == STATUS_DONE]
+    if len(done) < total:
+        not_done = sorted(
+            set(range(1, total + 1)) - {shard["shard"][0] for shard in done}
+        )
+        print(f"Не завершены шарды: {', '.join(f'{i}/{total}' for i in not_done)}")
+        return 1
+
+    parsing_info = merge_shards([shard["output"] for shard in done], output_filename)
+    print(
+        f"Объединено шардов: {total}, моделей: {parsing_info['total_models_processed']}, "
+        f"кузовов: {parsing_info['total_frames_found']} -> {output_filename}"
+    )
+    _after_merge(output_filename, index_path, snapshot_dir, columnar_path)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Парсинг кузовов несколькими процессами")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY_PATH, help="Файл состояния шардов")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Запустить N шардов локально и объединить")
+    run_parser.add_argument("--shards", type=int, required=True, help="Количество шардов")
+    run_parser.add_argument("--output", default="toyota_jdm_frames.json")
+    run_parser.add_argument(
+        "frame_parse_args",
+        nargs=argparse.REMAINDER,
+        help="Параметры frame_parse.py (после --)",
+    )
+
+    merge_parser = commands.add_parser("merge", help="Объединить результаты шардов")
+    merge_parser.add_argument("--shards", type=int, default=None, help="Количество шардов N")
+    merge_parser.add_argument("--output", default="toyota_jdm_frames.json")
+    merge_parser.add_argument(
+        "files",
+        nargs="*",
+        help="Файлы шардов (по умолчанию берутся из файла состояния)",
+    )
+
+    for command_parser in (run_parser, merge_parser):
+        add_index_arguments(command_parser)
+        add_snapshot_arguments(command_parser)
+        add_columnar_arguments(command_parser)
+
+    commands.add_parser("status", help="Состояние шардов")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        extra = args.frame_parse_args
+        if extra[:1] == ["--"]:
+            extra = extra[1:]
+        failed = run_local(args.shards, extra, args.registry)
+        if failed:
+            # Результат неудачного шарда неполный - не объединяем
+            print(f"Шардов с ошибкой: {failed}, объединение не выполнено")
+            sys.exit(1)
+        sys.exit(
+            _merge_from_registry(
+                args.registry,
+                args.shards,
+                args.output,
+                None if args.no_index else args.index,
+                None if args.no_snapshot else args.snapshots,
+                None if args.no_columnar else args.columnar,
+            )
+        )
+
+    elif args.command == "merge":
+        if args.files:
+            info = merge_shards(args.files, args.output)
+            print(f"Объединено файлов: {len(args.files)}, моделей: {info['total_models_processed']}")
+            _after_merge(
+                args.output,
+                None if args.no_index else args.index,
+                None if args.no_snapshot else args.snapshots,
+                None if args.no_columnar else args.columnar,
+            )
+        else:
+            sys.exit(
+                _merge_from_registry(
+                    args.registry,
+                    args.shards,
+                    args.output,
+                    None if args.no_index else args.index,
+                    None if args.no_snapshot else args.snapshots,
+                    None if args.no_columnar else args.columnar,
+                )
+            )
+
+    else:
+        registry = ShardRegistry(args.registry)
+        for shard in registry.shards():
+            index, total = shard["shard"]
+            stats = shard["stats"] or {}
+            print(
+                f"{index}/{total}: {shard['status']:<8} {shard['host'] or ''} pid {shard['pid']} "
+                f"моделей {stats.get('total_models_processed', '-')} -> {shard['output']}"
+            )
+        registry.close()
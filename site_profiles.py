@@ -0,0 +1,482 @@
+"""
+Профили сайтов: один и тот же парсер для каталогов разных марок.
+
+Профиль (файл TOML или JSON в каталоге profiles/) описывает каталог:
+адрес, селекторы моделей и кузовов, ограничения частоты запросов и куда
+писать результаты. Команда crawl обновляет каталоги нескольких марок за
+один запуск: для каждого профиля загружается список моделей (как main.py),
+затем кузова (как frame_parse.py), профили обрабатываются параллельно.
+
+Профили на одном сайте (или в одной группе host_group) делят общий
+ограничитель нагрузки: одновременных запросов и частота запросов
+считаются на сайт, а не на профиль, поэтому параллельный запуск
+нескольких марок нагружает сайт не больше, чем один профиль.
+
+    name = "lexus"
+    base_url = "https://lexus.epc-data.com/"
+    output_prefix = "lexus_jdm"
+    output_dir = "catalog/lexus"
+
+    [extractors]
+    models = ["ul.category2 h4 a"]
+    frames = ["ul.category2 h4 a", "a[href*='/{model}/']"]
+
+    [rate_limit]
+    workers = 2
+    delay = 1.0
+    max_requests_per_second = 4.0
+    host_group = "epc-data.com"
+
+    python site_profiles.py list
+    python site_profiles.py crawl --concurrency 3
+"""
+
+import argparse
+import json
+import os
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+from browser_profile import BROWSER_PROFILES, DEFAULT_PROFILE
+from columnar import DEFAULT_COLUMNAR_PATH
+from fetchers import ENGINES
+from http_cache import DEFAULT_CACHE_PATH, ResponseCache
+from rate_limit import AdaptiveRateLimiter
+
+DEFAULT_PROFILES_DIR = "profiles"
+PROFILE_EXTENSIONS = (".toml", ".json")
+
+
+class SiteProfile:
+    """Описание каталога одной марки"""
+
+    def __init__(
+        self,
+        name,
+        base_url,
+        output_prefix=None,
+        output_dir=".",
+        model_selectors=None,
+        frame_selectors=None,
+        engine="http",
+        browser_profile=DEFAULT_PROFILE,
+        workers=1,
+        delay=3.0,
+        max_requests_per_second=5.0,
+        host_group=None,
+    ):
+        """
+        Args:
+            name: Имя профиля (для выбора в командной строке)
+            base_url: Главная страница каталога со списком моделей
+            output_prefix: Префикс файлов результатов (по умолчанию <name>_jdm)
+            output_dir: Каталог результатов
+            model_selectors: Селекторы ссылок на модели на главной странице
+            frame_selectors: Селекторы кузовов на странице модели, {model}
+                заменяется на название модели (None = стандартные)
+            engine: Движок загрузки страниц кузовов
+            browser_profile: Профиль Chrome для Selenium
+            workers: Количество параллельных воркеров
+            delay: Начальный интервал между запросами в секундах
+            max_requests_per_second: Верхняя граница частоты запросов
+            host_group: Группа профилей с общим ограничителем нагрузки
+                (по умолчанию - хост base_url)
+
+        Raises:
+            ValueError: Некорректные параметры профиля
+        """
+        if not name:
+            raise ValueError("В профиле не указано имя (name)")
+        if not base_url or not urlsplit(base_url).netloc:
+            raise ValueError(f"Профиль {name}: некорректный base_url: {base_url!r}")
+        if engine not in ENGINES:
+            raise ValueError(
+                f"Профиль {name}: неизвестный движок {engine}. Доступны: {', '.join(ENGINES)}"
+            )
+        if browser_profile not in BROWSER_PROFILES:
+            raise ValueError(
+                f"Профиль {name}: неизвестный профиль браузера {browser_profile}. "
+                f"Доступны: {', '.join(BROWSER_PROFILES)}"
+            )
+        if workers < 1:
+            raise ValueError(f"Профиль {name}: workers должно быть не меньше 1")
+
+        self.name = name
+        self.base_url = base_url
+        self.output_prefix = output_prefix or f"{name}_jdm"
+        self.output_dir = output_dir
+        self.model_selectors = list(model_selectors or ["ul.category2 h4 a"])
+        self.frame_selectors = list(frame_selectors) if frame_selectors else None
+        self.engine = engine
+        self.browser_profile = browser_profile
+        self.workers = workers
+        self.delay = delay
+        self.max_requests_per_second = max_requests_per_second
+        self.host_group = host_group or urlsplit(base_url).hostname
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Профиль из словаря (содержимое файла TOML/JSON)
+
+        Raises:
+            ValueError: Некорректные параметры профиля
+        """
+        extractors = data.get("extractors", {})
+        rate_limit = data.get("rate_limit", {})
+        return cls(
+            name=data.get("name"),
+            base_url=data.get("base_url"),
+            output_prefix=data.get("output_prefix"),
+            output_dir=data.get("output_dir", "."),
+            model_selectors=extractors.get("models"),
+            frame_selectors=extractors.get("frames"),
+            engine=data.get("engine", "http"),
+            browser_profile=data.get("browser_profile", DEFAULT_PROFILE),
+            workers=rate_limit.get("workers", 1),
+            delay=rate_limit.get("delay", 3.0),
+            max_requests_per_second=rate_limit.get("max_requests_per_second", 5.0),
+            host_group=rate_limit.get("host_group"),
+        )
+
+    def path(self, suffix):
+        """Путь к файлу результата: <output_dir>/<output_prefix><suffix>"""
+        return os.path.join(self.output_dir, self.output_prefix + suffix)
+
+    @property
+    def models_path(self):
+        return self.path("_models.json")
+
+    @property
+    def frames_path(self):
+        return self.path("_frames.json")
+
+    @property
+    def journal_path(self):
+        return self.path("_frames.journal.jsonl")
+
+    @property
+    def stream_path(self):
+        return self.path("_frames.ndjson")
+
+    @property
+    def metrics_path(self):
+        return self.path("_frames.metrics.json")
+
+    @property
+    def failed_path(self):
+        return self.path("_failed_models.json")
+
+    @property
+    def index_path(self):
+        return self.path(".index.sqlite")
+
+    @property
+    def columnar_path(self):
+        """Колоночный экспорт кузовов (формат columnar.py по умолчанию)"""
+        return self.path("_frames" + os.path.splitext(DEFAULT_COLUMNAR_PATH)[1])
+
+    @property
+    def page_path(self):
+        """HTML главной страницы для отладки селекторов моделей"""
+        return self.path("_page.html")
+
+    @property
+    def snapshot_dir(self):
+        return os.path.join(self.output_dir, "snapshots")
+
+    @property
+    def cache_path(self):
+        return os.path.join(self.output_dir, DEFAULT_CACHE_PATH)
+
+    def __repr__(self):
+        return f"SiteProfile({self.name!r}, {self.base_url!r})"
+
+
+def load_profile(path):
+    """
+    Загружает профиль из файла .toml или .json
+
+    Raises:
+        ValueError: Неизвестный формат файла или некорректный профиль
+    """
+    if path.endswith(".toml"):
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    elif path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    else:
+        raise ValueError(f"Неизвестный формат профиля: {path} (нужен .toml или .json)")
+    data.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return SiteProfile.from_dict(data)
+
+
+def load_profiles(directory=DEFAULT_PROFILES_DIR):
+    """
+    Загружает все профили каталога
+
+    Returns:
+        dict: {имя профиля: SiteProfile} в порядке имен файлов
+
+    Raises:
+        ValueError: Два профиля с одинаковым именем
+    """
+    profiles = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(PROFILE_EXTENSIONS):
+            continue
+        profile = load_profile(os.path.join(directory, filename))
+        if profile.name in profiles:
+            raise ValueError(f"Профиль {profile.name} описан в {directory} дважды")
+        profiles[profile.name] = profile
+    return profiles
+
+
+class HostBudgets:
+    """
+    Общие ограничители нагрузки по сайтам
+
+    Для группы профилей создается один AdaptiveRateLimiter с самыми
+    осторожными настройками группы: частота - наименьшая из заданных,
+    одновременных запросов - не больше, чем у самого большого профиля.
+    """
+
+    def __init__(self, profiles):
+        self._lock = threading.Lock()
+        self._groups = {}
+        for profile in profiles:
+            self._groups.setdefault(profile.host_group, []).append(profile)
+        self._limiters = {}
+
+    def limiter(self, profile):
+        """Ограничитель группы профиля"""
+        with self._lock:
+            limiter = self._limiters.get(profile.host_group)
+            if limiter is None:
+                group = self._groups.get(profile.host_group, [profile])
+                initial_rate = min(
+                    1 / p.delay if p.delay > 0 else p.max_requests_per_second for p in group
+                )
+                max_rate = min(p.max_requests_per_second for p in group)
+                limiter = AdaptiveRateLimiter(
+                    max_in_flight=max(p.workers for p in group),
+                    requests_per_second=initial_rate,
+                    # Заданная частота всегда попадает в допустимый диапазон
+                    min_rate=min(0.1, initial_rate),
+                    max_rate=max(max_rate, initial_rate),
+                )
+                self._limiters[profile.host_group] = limiter
+            return limiter
+
+
+def crawl_profile(
+    profile,
+    limiter,
+    skip_models=False,
+    max_models=None,
+    resume=True,
+    incremental=False,
+    use_cache=True,
+):
+    """
+    Обновляет каталог одной марки: список моделей, затем кузова
+
+    Args:
+        profile: SiteProfile
+        limiter: Общий ограничитель сайта (HostBudgets.limiter)
+        skip_models: Не загружать список моделей, взять profile.models_path
+        max_models: Максимальное количество моделей (None = все)
+        resume: Пропускать модели, обработанные в прошлых запусках
+        incremental: Загружать только новые и изменившиеся модели
+        use_cache: Использовать кэш HTTP ответов
+
+    Returns:
+        dict: Сводная информация о парсинге кузовов или None при ошибке
+    """
+    # Импорт здесь: main и frame_parse подключают Selenium
+    from frame_parse import scrape_toyota_frames
+    from main import scrape_toyota_models
+
+    if profile.output_dir:
+        os.makedirs(profile.output_dir, exist_ok=True)
+    cache_path = profile.cache_path if use_cache else None
+
+    if not skip_models:
+        # Кэш нужен только загрузчику http, но закрывается при любом движке
+        cache = ResponseCache(cache_path) if cache_path else None
+        try:
+            # Главная страница тоже запрос к сайту - ограничитель занимается
+            # только на время запроса, а не на весь разбор и запуск браузера
+            models = scrape_toyota_models(
+                engine=profile.engine,
+                cache=cache,
+                snapshot_dir=profile.snapshot_dir,
+                url=profile.base_url,
+                selectors=profile.model_selectors,
+                output_filename=profile.models_path,
+                page_path=profile.page_path,
+                limiter=limiter,
+            )
+        finally:
+            if cache is not None:
+                cache.close()
+        if not models:
+            return None
+
+    return scrape_toyota_frames(
+        max_models=max_models,
+        delay_between_requests=profile.delay,
+        engine=profile.engine,
+        workers=profile.workers,
+        journal_path=profile.journal_path,
+        resume=resume,
+        cache_path=cache_path,
+        output_filename=profile.frames_path,
+        incremental=incremental,
+        stream_output=profile.stream_path,
+        max_requests_per_second=profile.max_requests_per_second,
+        index_path=profile.index_path,
+        metrics_path=profile.metrics_path,
+        snapshot_dir=profile.snapshot_dir,
+        browser_profile=profile.browser_profile,
+        failed_output=profile.failed_path,
+        models_path=profile.models_path,
+        frame_selectors=profile.frame_selectors,
+        limiter=limiter,
+        log_name=f"{profile.name}_frame_parser",
+        columnar_path=profile.columnar_path,
+    )
+
+
+def crawl_profiles(profiles, concurrency=None, **kwargs):
+    """
+    Обновляет каталоги нескольких марок параллельно
+
+    Args:
+        profiles: Список SiteProfile
+        concurrency: Сколько профилей обрабатывать одновременно
+            (None = все сразу; нагрузку на сайт ограничивает HostBudgets)
+        **kwargs: Параметры crawl_profile
+
+    Returns:
+        dict: {имя профиля: сводная информация или None при ошибке}
+    """
+    budgets = HostBudgets(profiles)
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency or len(profiles) or 1) as executor:
+        futures = {
+            executor.submit(crawl_profile, profile, budgets.limiter(profile), **kwargs): profile
+            for profile in profiles
+        }
+        for future in as_completed(futures):
+            profile = futures[future]
+            try:
+                results[profile.name] = future.result()
+            except Exception as e:
+                print(f"[{profile.name}] Ошибка: {e}")
+                results[profile.name] = None
+    return {profile.name: results[profile.name] for profile in profiles}
+
+
+def select_profiles(profiles, names):
+    """
+    Профили по именам (пустой список - все)
+
+    Raises:
+        ValueError: Неизвестное имя профиля
+    """
+    if not names:
+        return list(profiles.values())
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        raise ValueError(
+            f"Неизвестные профили: {', '.join(unknown)}. Доступны: {', '.join(profiles)}"
+        )
+    return [profiles[name] for name in names]
+
+
+def parse_args():
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Парсинг каталогов нескольких марок по профилям")
+    parser.add_argument(
+        "--dir",
+        default=DEFAULT_PROFILES_DIR,
+        help=f"Каталог профилей (по умолчанию {DEFAULT_PROFILES_DIR})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="Показать профили")
+
+    crawl = commands.add_parser("crawl", help="Обновить каталоги марок")
+    crawl.add_argument(
+        "profiles", nargs="*", help="Имена профилей (по умолчанию - все профили каталога)"
+    )
+    crawl.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Сколько профилей обрабатывать одновременно (по умолчанию - все)",
+    )
+    crawl.add_argument(
+        "--skip-models",
+        action="store_true",
+        help="Не загружать списки моделей, использовать сохраненные",
+    )
+    crawl.add_argument(
+        "--max-models", type=int, default=None, help="Максимум моделей на профиль"
+    )
+    crawl.add_argument(
+        "--no-resume", action="store_true", help="Не использовать журналы прошлых запусков"
+    )
+    crawl.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Загружать только новые и изменившиеся модели",
+    )
+    crawl.add_argument("--no-cache", action="store_true", help="Не использовать кэш HTTP ответов")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    # Примеры использования:
+
+    # Список профилей
+    # python site_profiles.py list
+
+    # Все марки, не больше двух одновременно
+    # python site_profiles.py crawl --concurrency 2
+
+    # Только Lexus и Nissan, списки моделей уже загружены
+    # python site_profiles.py crawl lexus nissan --skip-models
+
+    args = parse_args()
+    profiles = load_profiles(args.dir)
+
+    if args.command == "list":
+        for profile in profiles.values():
+            print(
+                f"{profile.name:12} {profile.base_url:40} {profile.engine:9} "
+                f"воркеров {profile.workers}, группа {profile.host_group}, "
+                f"результаты {profile.frames_path}"
+            )
+    else:
+        results = crawl_profiles(
+            select_profiles(profiles, args.profiles),
+            concurrency=args.concurrency,
+            skip_models=args.skip_models,
+            max_models=args.max_models,
+            resume=not args.no_resume,
+            incremental=args.incremental,
+            use_cache=not args.no_cache,
+        )
+        for name, info in results.items():
+            if info is None:
+                print(f"{name}: ошибка, см. logs/{name}_frame_parser.log")
+            else:
+                print(
+                    f"{name}: моделей {info['total_models_processed']}, "
+                    f"кузовов {info['total_frames_found']}"
+                )
@@ -0,0 +1,450 @@
+"""
+Версии результатов парсинга и изменения между ними.
+
+Каждый результат (toyota_jdm_models.json или toyota_jdm_frames.json)
+сохраняется в хранилище снимков под хешем содержимого: одинаковый
+результат хранится один раз, а новая версия появляется только при
+изменении каталога. Команда diff сравнивает два снимка (за линейное время,
+через словари по URL) и пишет компактный список изменений (changeset):
+добавленные, удаленные и переименованные модели и кузова. Потребителям
+достаточно применить changeset (apply_changeset) к своей копии вместо
+повторного импорта всего toyota_jdm_frames.json.
+
+    python snapshots.py list
+    python snapshots.py diff                       # предыдущий -> последний
+    python snapshots.py diff frames-20240101T0000-ab12cd34 latest --output changes.json
+    python snapshots.py apply old_frames.json changes.json --output new_frames.json
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+DEFAULT_SNAPSHOT_DIR = "snapshots"
+
+KIND_MODELS = "models"
+KIND_FRAMES = "frames"
+
+CHANGESET_FORMAT = 1
+
+
+def canonical_models(models):
+    """
+    Содержимое результата без порядка и служебных полей
+
+    Returns:
+        dict: {url модели: {"name": ..., "frames": {url кузова: название}}}
+    """
+    canonical = {}
+    for model in models:
+        url = model.get("frame_name_url")
+        if not url:
+            continue
+        canonical[url] = {
+            "name": model.get("name", ""),
+            "frames": {
+                frame["frame_url"]: frame["frame_name"] for frame in model.get("frames", [])
+            },
+        }
+    return canonical
+
+
+def content_hash(canonical):
+    """Хеш содержимого (не зависит от порядка моделей и кузовов)"""
+    data = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _frames_hash(frames):
+    return hashlib.sha1(
+        json.dumps(sorted(frames.items()), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def diff_models(old, new):
+    """
+    Изменения между двумя каноническими результатами (см. canonical_models)
+
+    Модель определяется по URL. Модель, у которой сменился URL, но остались
+    те же кузова, считается переименованной, а не удаленной и добавленной.
+    Кузов внутри модели определяется по URL кузова.
+
+    Returns:
+        dict: {"models": {"added", "removed", "renamed"}, "frames": [...]}
+    """
+    added = [url for url in new if url not in old]
+    removed = [url for url in old if url not in new]
+
+    # Пары удаленная/добавленная модель с одинаковыми кузовами - смена URL
+    removed_by_frames = {}
+    for url in removed:
+        if old[url]["frames"]:
+            removed_by_frames.setdefault(_frames_hash(old[url]["frames"]), []).append(url)
+
+    renamed = []
+    moved = set()
+    for url in added:
+        if not new[url]["frames"]:
+            continue
+        candidates = removed_by_frames.get(_frames_hash(new[url]["frames"]))
+        if candidates:
+            old_url = candidates.pop()
+            moved.update((url, old_url))
+            renamed.append(
+                {"url": url, "old_url": old_url, "name": new[url]["name"], "old_name": old[old_url]["name"]}
+            )
+
+    for url in new:
+        if url in old and old[url]["name"] != new[url]["name"]:
+            renamed.append({"url": url, "name": new[url]["name"], "old_name": old[url]["name"]})
+
+    frames = []
+    for url, model in new.items():
+        if url not in old:
+            continue
+        old_frames = old[url]["frames"]
+        new_frames = model["frames"]
+        if old_frames == new_frames:
+            continue
+        change = {
+            "model_url": url,
+            "added": [
+                {"frame_name": name, "frame_url": frame_url}
+                for frame_url, name in new_frames.items()
+                if frame_url not in old_frames
+            ],
+            "removed": [frame_url for frame_url in old_frames if frame_url not in new_frames],
+            "renamed": [
+                {"frame_url": frame_url, "name": name, "old_name": old_frames[frame_url]}
+                for frame_url, name in new_frames.items()
+                if frame_url in old_frames and old_frames[frame_url] != name
+            ],
+        }
+        frames.append({key: value for key, value in change.items() if value})
+
+    return {
+        "models": {
+            "added": [
+                _model_record(url, new[url]) for url in added if url not in moved
+            ],
+            "removed": [url for url in removed if url not in moved],
+            "renamed": renamed,
+        },
+        "frames": frames,
+    }
+
+
+def _model_record(url, model):
+    """Модель в формате результата (у списка моделей main.py кузовов нет)"""
+    record = {"name": model["name"], "frame_name_url": url}
+    if model["frames"]:
+        record["frames"] = [
+            {"frame_name": name, "frame_url": frame_url}
+            for frame_url, name in model["frames"].items()
+        ]
+    return record
+
+
+def apply_changeset(models, changeset):
+    """
+    Применяет changeset к списку моделей (формат toyota_jdm_frames.json)
+
+    Порядок оставшихся моделей и кузовов сохраняется, новые добавляются
+    в конец.
+
+    Returns:
+        list: Новый список моделей
+
+    Raises:
+        ValueError: changeset построен не от этой версии данных
+    """
+    if content_hash(canonical_models(models)) != changeset["from_hash"]:
+        raise ValueError("Изменения построены для другой версии данных (from_hash не совпадает)")
+
+    changes = changeset["changes"]
+    removed = set(changes["models"]["removed"])
+    renamed = {item.get("old_url", item["url"]): item for item in changes["models"]["renamed"]}
+    frame_changes = {item["model_url"]: item for item in changes["frames"]}
+
+    result = []
+    for model in models:
+        url = model.get("frame_name_url")
+        if url in removed:
+            continue
+        model = dict(model)
+        if url in renamed:
+            model["name"] = renamed[url]["name"]
+            model["frame_name_url"] = url = renamed[url]["url"]
+
+        change = frame_changes.get(url)
+        if change:
+            dropped = set(change.get("removed", []))
+            new_names = {item["frame_url"]: item["name"] for item in change.get("renamed", [])}
+            frames = [
+                {**frame, "frame_name": new_names.get(frame["frame_url"], frame["frame_name"])}
+                for frame in model.get("frames", [])
+                if frame["frame_url"] not in dropped
+            ]
+            frames.extend(change.get("added", []))
+            model["frames"] = frames
+        if "frames_count" in model:
+            model["frames_count"] = len(model.get("frames", []))
+        result.append(model)
+
+    # Кузова есть только в результатах frame_parse.py
+    with_frames = any("frames" in model for model in models)
+    for model in changes["models"]["added"]:
+        if with_frames:
+            frames = model.get("frames", [])
+            model = {**model, "frames": frames, "frames_count": len(frames)}
+        result.append(model)
+
+    if content_hash(canonical_models(result)) != changeset["to_hash"]:
+        raise ValueError("Результат применения изменений не совпадает с to_hash")
+    return result
+
+
+class SnapshotStore:
+    """
+    Хранилище снимков: объекты по хешу содержимого и журнал версий
+
+        snapshots/objects/<sha256>.json.gz   - содержимое результата
+        snapshots/manifest.jsonl             - версии (по одной на строку)
+        snapshots/changes/<from>..<to>.json  - изменения между соседними версиями
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.jsonl")
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest + ".json.gz")
+
+    def list(self, kind=None):
+        """
+        Версии в порядке создания
+
+        Returns:
+            list: Словари {"id", "kind", "hash", "created_at", "source", "models", "frames"}
+        """
+        if not os.path.exists(self.manifest_path):
+            return []
+        entries = []
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if kind is None or entry["kind"] == kind:
+                    entries.append(entry)
+        return entries
+
+    def resolve(self, ref, kind=KIND_FRAMES):
+        """
+        Находит версию по id, префиксу хеша, "latest" или "previous"
+
+        Raises:
+            KeyError: Версия не найдена
+        """
+        entries = self.list(kind)
+        if ref in ("latest", "previous"):
+            position = -1 if ref == "latest" else -2
+            if len(entries) < -position:
+                raise KeyError(f"Недостаточно версий {kind} для {ref}")
+            return entries[position]
+        matches = [e for e in self.list() if e["id"] == ref or e["hash"].startswith(ref)]
+        if not matches:
+            raise KeyError(f"Снимок не найден: {ref}")
+        return matches[-1]
+
+    def load(self, entry):
+        """Модели снимка"""
+        with gzip.open(self._object_path(entry["hash"]), "rt", encoding="utf-8") as f:
+            return json.load(f)["models"]
+
+    def save(self, data, kind, source=None):
+        """
+        Сохраняет результат, если его содержимое изменилось с прошлой версии
+
+        Args:
+            data: Результат {"parsing_info": ..., "models": [...]}
+            kind: KIND_MODELS или KIND_FRAMES
+            source: Имя исходного файла (для списка версий)
+
+        Returns:
+            tuple: (версия, changeset относительно предыдущей версии или None).
+                Если содержимое не изменилось, возвращается прошлая версия
+        """
+        models = data.get("models", [])
+        canonical = canonical_models(models)
+        digest = content_hash(canonical)
+
+        entries = self.list(kind)
+        previous = entries[-1] if entries else None
+        if previous is not None and previous["hash"] == digest:
+            return previous, None
+
+        os.makedirs(self.directory, exist_ok=True)
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = object_path + ".tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, object_path)
+
+        created_at = datetime.now()
+        entry = {
+            "id": f"{kind}-{created_at.strftime('%Y%m%dT%H%M%S')}-{digest[:8]}",
+            "kind": kind,
+            "hash": digest,
+            "created_at": created_at.isoformat(),
+            "source": source,
+            "models": len(canonical),
+            "frames": sum(len(model["frames"]) for model in canonical.values()),
+        }
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        changeset = None
+        if previous is not None:
+            changeset = self.diff(previous, entry, new_models=models)
+            self.write_changeset(changeset)
+        return entry, changeset
+
+    def diff(self, old_entry, new_entry, new_models=None):
+        """
+        Changeset между двумя версиями
+
+        Returns:
+            dict: {"format", "from", "to", "from_hash", "to_hash", "summary", "changes"}
+        """
+        old = canonical_models(self.load(old_entry))
+        new = canonical_models(new_models if new_models is not None else self.load(new_entry))
+        changes = diff_models(old, new)
+        return {
+            "format": CHANGESET_FORMAT,
+            "from": old_entry["id"],
+            "to": new_entry["id"],
+            "from_hash": old_entry["hash"],
+            "to_hash": new_entry["hash"],
+            "summary": {
+                "models_added": len(changes["models"]["added"]),
+                "models_removed": len(changes["models"]["removed"]),
+                "models_renamed": len(changes["models"]["renamed"]),
+                "models_with_frame_changes": len(changes["frames"]),
+            },
+            "changes": changes,
+        }
+
+    def write_changeset(self, changeset, path=None):
+        """Записывает changeset (по умолчанию в snapshots/changes/), возвращает путь"""
+        if path is None:
+            path = os.path.join(
+                self.directory, "changes", f"{changeset['from']}..{changeset['to']}.json"
+            )
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(changeset, f, ensure_ascii=False, separators=(",", ":"))
+        return path
+
+
+def snapshot_file(path, kind, directory=DEFAULT_SNAPSHOT_DIR):
+    """
+    Сохраняет файл результата в хранилище снимков
+
+    Returns:
+        tuple: (версия, changeset относительно предыдущей версии или None)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return SnapshotStore(directory).save(data, kind, source=os.path.basename(path))
+
+
+def describe_changeset(changeset):
+    """Краткое описание изменений для лога"""
+    summary = changeset["summary"]
+    return (
+        f"{changeset['from']} -> {changeset['to']}: "
+        f"моделей +{summary['models_added']} -{summary['models_removed']} "
+        f"переименовано {summary['models_renamed']}, "
+        f"с изменениями кузовов {summary['models_with_frame_changes']}"
+    )
+
+
+def add_snapshot_arguments(parser):
+    """Добавляет в argparse параметры хранилища снимков"""
+    parser.add_argument(
+        "--snapshots",
+        default=DEFAULT_SNAPSHOT_DIR,
+        help="Каталог снимков результатов и изменений между ними",
+    )
+    parser.add_argument(
+        "--no-snapshot",
+        action="store_true",
+        help="Не сохранять снимок результата",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Снимки результатов и изменения между ними")
+    parser.add_argument("--dir", default=DEFAULT_SNAPSHOT_DIR, help="Каталог снимков")
+    parser.add_argument(
+        "--kind", choices=(KIND_MODELS, KIND_FRAMES), default=KIND_FRAMES, help="Тип результата"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = commands.add_parser("save", help="Сохранить файл результата как снимок")
+    save_parser.add_argument("file", nargs="?", help="Файл результата")
+
+    commands.add_parser("list", help="Список снимков")
+
+    diff_parser = commands.add_parser("diff", help="Изменения между двумя снимками")
+    diff_parser.add_argument("old", nargs="?", default="previous", help="Старый снимок")
+    diff_parser.add_argument("new", nargs="?", default="latest", help="Новый снимок")
+    diff_parser.add_argument("--output", help="Файл changeset (по умолчанию в каталоге снимков)")
+
+    apply_parser = commands.add_parser("apply", help="Применить changeset к файлу результата")
+    apply_parser.add_argument("base", help="Файл результата, от которого построен changeset")
+    apply_parser.add_argument("changeset", help="Файл changeset")
+    apply_parser.add_argument("--output", required=True, help="Файл нового результата")
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.dir)
+
+    if args.command == "save":
+        default_file = "toyota_jdm_models.json" if args.kind == KIND_MODELS else "toyota_jdm_frames.json"
+        entry, changeset = snapshot_file(args.file or default_file, args.kind, args.dir)
+        print(f"Снимок: {entry['id']}")
+        if changeset is not None:
+            print(describe_changeset(changeset))
+
+    elif args.command == "list":
+        for entry in store.list(args.kind):
+            print(
+                f"{entry['id']}  моделей {entry['models']}, кузовов {entry['frames']}  ({entry['source']})"
+            )
+
+    elif args.command == "diff":
+        changeset = store.diff(store.resolve(args.old, args.kind), store.resolve(args.new, args.kind))
+        print(describe_changeset(changeset))
+        print(f"Изменения сохранены в: {store.write_changeset(changeset, args.output)}")
+
+    else:
+        with open(args.base, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        with open(args.changeset, "r", encoding="utf-8") as f:
+            changeset = json.load(f)
+        base["models"] = apply_changeset(base.get("models", []), changeset)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(base, f, indent=2, ensure_ascii=False)
+        print(f"Применено {describe_changeset(changeset)} -> {args.output}")
@@ -0,0 +1,19 @@
+def make_model(url, name=None, frames=(), fingerprint=None):
+    """
+    Модель в формате toyota_jdm_frames.json
+
+    Args:
+        url: Адрес модели (frame_name_url)
+        name: Название (None = последний сегмент адреса)
+        frames: Названия кузовов, адрес кузова - url + название в нижнем регистре
+        fingerprint: Отпечаток страницы модели (None = без отпечатка)
+    """
+    model = {
+        "name": name or url.rstrip("/").rsplit("/", 1)[-1],
+        "frame_name_url": url,
+        "frames": [{"frame_name": frame, "frame_url": url + frame.lower() + "/"} for frame in frames],
+        "frames_count": len(frames),
+    }
+    if fingerprint:
+        model["page_fingerprint"] = fingerprint
+    return model
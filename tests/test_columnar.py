@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from columnar import (
+    DEFAULT_COLUMNAR_PATH,
+    DEFAULT_PARTS_COLUMNAR_PATH,
+    KIND_FRAMES,
+    KIND_PARTS,
+    ColumnarFile,
+    export_frames,
+    export_parts,
+    iter_models,
+    load_columnar,
+    write_columnar,
+)
+from ndjson_output import NdjsonWriter
+
+BASE = "https://toyota.epc-data.com/"
+
+MODELS = [
+    {
+        "name": "ALLION",
+        "frame_name_url": BASE + "allion/",
+        "frames": [
+            {"frame_name": "ZZT240", "frame_url": BASE + "allion/zzt240/"},
+            {"frame_name": "NZT260", "frame_url": BASE + "allion/nzt260/"},
+        ],
+        "frames_count": 2,
+    },
+    # Модель без кузовов - одна строка с пустым кузовом
+    {"name": "ALPHARD", "frame_name_url": BASE + "alphard/", "frames": [], "frames_count": 0},
+    {
+        "name": "Королла",
+        "frame_name_url": BASE + "corolla/",
+        "frames": [{"frame_name": "AE110", "frame_url": BASE + "corolla/ae110/"}],
+        "frames_count": 1,
+    },
+]
+
+
+@pytest.fixture
+def frames_json(tmp_path):
+    path = tmp_path / "toyota_jdm_frames.json"
+    path.write_text(
+        json.dumps({"parsing_info": {"total_models_processed": 3}, "models": MODELS}),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_default_paths_do_not_depend_on_pyarrow():
+    assert DEFAULT_COLUMNAR_PATH == "toyota_jdm_frames.tjc"
+    assert DEFAULT_PARTS_COLUMNAR_PATH == "toyota_jdm_parts.tjc"
+
+
+def test_frames_round_trip_tjc(tmp_path, frames_json):
+    output = str(tmp_path / "frames.tjc")
+
+    assert export_frames(frames_json, output) == 4
+
+    with load_columnar(output) as table:
+        assert isinstance(table, ColumnarFile)
+        assert table.kind == KIND_FRAMES
+        assert table.metadata == {"total_models_processed": 3}
+        assert table.column_names == ["model_name", "model_url", "frame_name", "frame_url"]
+        assert table.row(2) == {
+            "model_name": "ALPHARD",
+            "model_url": BASE + "alphard/",
+            "frame_name": None,
+            "frame_url": None,
+        }
+        assert table.column("model_name").rows("ALLION") == [0, 1]
+        assert list(iter_models(table)) == MODELS
+
+
+def test_parts_round_trip_tjc(tmp_path):
+    stream = str(tmp_path / "parts.ndjson")
+    with NdjsonWriter(stream) as output:
+        output.write(
+            {
+                "path": {"model": "Corolla", "frame": "ZZE122", "group": "Engine"},
+                "parts": {"cells": ["90915-10001", "Oil filter"], "url": BASE + "p/1/"},
+            }
+        )
+    output_path = str(tmp_path / "parts.tjc")
+
+    assert export_parts(stream, output_path) == 1
+
+    with load_columnar(output_path) as table:
+        assert table.kind == KIND_PARTS
+        assert list(table) == [
+            {
+                "number": "9091510001",
+                "name": "Oil filter",
+                "model": "Corolla",
+                "frame": "ZZE122",
+                "url": BASE + "p/1/",
+            }
+        ]
+
+
+def test_unknown_kind_and_foreign_file(tmp_path):
+    with pytest.raises(ValueError):
+        write_columnar(str(tmp_path / "x.tjc"), "bogus", [])
+
+    path = tmp_path / "x.tjc"
+    path.write_bytes(b"not a columnar file")
+    with pytest.raises(ValueError):
+        load_columnar(str(path))
+
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_frames_round_trip_arrow(tmp_path, frames_json, extension):
+    pyarrow = pytest.importorskip("pyarrow")
+    output = str(tmp_path / ("frames" + extension))
+
+    assert export_frames(frames_json, output) == 4
+
+    table = load_columnar(output)
+    assert isinstance(table, pyarrow.Table)
+    assert table.num_rows == 4
+    assert list(iter_models(table)) == MODELS
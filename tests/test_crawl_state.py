@@ -0,0 +1,60 @@
+from conftest import make_model
+from crawl_state import STATUS_DONE, STATUS_FAILED, CrawlJournal
+
+
+def test_resume_skips_models_done_in_unfinished_run(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    journal = CrawlJournal(path)
+    journal.record(make_model("https://x/a/", frames=["fa1"]))
+    journal.record(make_model("https://x/b/"))
+
+    # Новый процесс после падения
+    resumed = CrawlJournal(path)
+    records = resumed.load()
+
+    assert set(records) == {"https://x/a/", "https://x/b/"}
+    assert resumed.is_done("https://x/a/")
+    assert not resumed.is_done("https://x/b/")
+    assert resumed.get("https://x/b/")["status"] == STATUS_FAILED
+
+
+def test_completed_run_is_not_resumed(tmp_path):
+    path = tmp_path / "state.jsonl"
+    journal = CrawlJournal(str(path))
+    journal.record(make_model("https://x/a/", frames=["fa1"]))
+    journal.complete()
+
+    assert not path.exists()
+    resumed = CrawlJournal(str(path))
+    assert resumed.load() == {}
+    assert not resumed.is_done("https://x/a/")
+
+
+def test_last_record_wins_and_attempts_are_counted(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    journal = CrawlJournal(path)
+    journal.record(make_model("https://x/a/"))
+    journal.record(make_model("https://x/a/", frames=["fa1"]))
+    journal.compact()
+
+    record = CrawlJournal(path).load()["https://x/a/"]
+    assert record["status"] == STATUS_DONE
+    assert record["attempts"] == 2
+    assert [frame["frame_name"] for frame in record["frames"]] == ["fa1"]
+
+
+def test_empty_page_with_fingerprint_is_done(tmp_path):
+    journal = CrawlJournal(str(tmp_path / "state.jsonl"))
+    record = journal.record(make_model("https://x/a/", fingerprint="abc"))
+
+    assert record["status"] == STATUS_DONE
+    assert record["page_fingerprint"] == "abc"
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = tmp_path / "state.jsonl"
+    CrawlJournal(str(path)).record(make_model("https://x/a/", frames=["fa1"]))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"name": "b", "frame_na')
+
+    assert list(CrawlJournal(str(path)).load()) == ["https://x/a/"]
@@ -0,0 +1,124 @@
+import pytest
+
+from driver_pool import DriverPool
+
+USER_AGENTS = ["ua-1", "ua-2"]
+
+
+class FakeDriver:
+    """WebDriver без браузера: отвечает на execute_script и считает quit"""
+
+    def __init__(self, user_agent, memory_mb=10):
+        self.user_agent = user_agent
+        self.healthy = True
+        self.memory_mb = memory_mb
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        if not self.healthy:
+            raise RuntimeError("chrome not reachable")
+        if "performance.memory" in script:
+            return self.memory_mb * 1024 * 1024
+        return 1
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+class FakeFactory:
+    def __init__(self, fail_after=None):
+        self.drivers = []
+        self.fail_after = fail_after
+
+    def __call__(self, user_agent):
+        if self.fail_after is not None and len(self.drivers) >= self.fail_after:
+            raise RuntimeError("cannot find Chrome binary")
+        driver = FakeDriver(user_agent)
+        self.drivers.append(driver)
+        return driver
+
+
+def test_driver_is_reused():
+    factory = FakeFactory()
+    pool = DriverPool(factory, USER_AGENTS, max_size=2, prewarm=1)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    assert len(factory.drivers) == 1
+    pool.release(second)
+    pool.close()
+    assert factory.drivers[0].quit_calls == 1
+
+
+def test_driver_is_recycled_after_max_pages():
+    factory = FakeFactory()
+    pool = DriverPool(factory, USER_AGENTS, max_size=1, max_pages=2)
+
+    pooled = pool.acquire()
+    pool.release(pooled)
+    pooled = pool.acquire()
+    pool.release(pooled)
+
+    assert pool.stats == {"created": 2, "recycled": 1, "unhealthy": 0, "rotations": 0}
+    assert factory.drivers[0].quit_calls == 1
+    assert pool.acquire().driver is factory.drivers[1]
+
+
+def test_driver_is_recycled_on_memory_growth():
+    factory = FakeFactory()
+    pool = DriverPool(factory, USER_AGENTS, max_size=1, max_memory_mb=100)
+
+    pooled = pool.acquire()
+    pooled.driver.memory_mb = 300
+    pool.release(pooled)
+
+    assert pool.stats["recycled"] == 1
+    assert factory.drivers[0].quit_calls == 1
+    assert pool.acquire().driver is factory.drivers[1]
+
+
+def test_unhealthy_driver_is_replaced():
+    factory = FakeFactory()
+    pool = DriverPool(factory, USER_AGENTS, max_size=1, prewarm=1)
+    factory.drivers[0].healthy = False
+
+    pooled = pool.acquire()
+
+    assert pooled.driver is factory.drivers[1]
+    assert factory.drivers[0].quit_calls == 1
+    assert pool.stats["unhealthy"] == 1
+
+
+def test_rotate_switches_user_agent():
+    factory = FakeFactory()
+    pool = DriverPool(factory, USER_AGENTS, max_size=2, prewarm=2)
+
+    pooled = pool.acquire()
+    rotated = pool.rotate(pooled)
+
+    assert rotated.user_agent != pooled.user_agent
+    assert pool.stats["rotations"] == 1
+    assert len(factory.drivers) == 2
+
+
+def test_startup_failure_quits_started_drivers():
+    factory = FakeFactory(fail_after=2)
+
+    with pytest.raises(RuntimeError):
+        DriverPool(factory, USER_AGENTS, max_size=3, prewarm=3)
+
+    assert [driver.quit_calls for driver in factory.drivers] == [1, 1]
+
+
+def test_failed_create_frees_slot():
+    factory = FakeFactory(fail_after=0)
+    pool = DriverPool(factory, USER_AGENTS, max_size=1)
+
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+    factory.fail_after = None
+    assert pool.acquire().driver is factory.drivers[0]
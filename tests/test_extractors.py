@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from extractors import BACKENDS, ParsedPage, extract_links, extract_rows, parse_selector
+
+ROOT = Path(__file__).resolve().parent.parent
+CATALOG_URL = "https://toyota.epc-data.com/"
+
+# Селекторы main.py, стандартного списка frame_parse.py и deep_crawl.py
+SELECTORS = [
+    "ul.category2 h4 a",
+    "table ul.category2 h4 a",
+    ".category2 a",
+    "ul.category2 a",
+    "li h4 a",
+    "table a[href*='/']",
+    "div.category2 a",
+    "a[href*='/corolla/']",
+    "ul.category2 > li > h4 > a",
+    "a[href^='https://toyota']",
+    "a[href$='/']",
+    "* > h4 a",
+]
+
+
+@pytest.fixture(scope="module")
+def catalog_html():
+    return (ROOT / "page.html").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_models_match_saved_result(catalog_html, backend):
+    expected = json.loads((ROOT / "toyota_jdm_models.json").read_text(encoding="utf-8"))["models"]
+
+    selector, links = extract_links(catalog_html, ["ul.category2 h4 a"], CATALOG_URL, backend)
+
+    assert selector == "ul.category2 h4 a"
+    assert [{"name": link["text"], "frame_name_url": link["href"]} for link in links] == expected
+
+
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_backends_return_identical_links(catalog_html, selector):
+    results = {
+        backend: ParsedPage(catalog_html, CATALOG_URL, backend).links([selector])
+        for backend in BACKENDS
+    }
+
+    reference = results["html.parser"]
+    for backend, result in results.items():
+        assert result == reference, backend
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_first_matching_selector_wins(catalog_html, backend):
+    selector, links = extract_links(
+        catalog_html, ["div.no-such-list a", ".category2 a"], CATALOG_URL, backend
+    )
+
+    assert selector == ".category2 a"
+    assert links
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+@pytest.mark.parametrize("selector", ["a:bogus", "a,,b", "ul >> a", "a["])
+def test_invalid_selector_raises(backend, selector):
+    page = ParsedPage("<ul class='category2'><li><a href='/x/'>X</a></li></ul>", CATALOG_URL, backend)
+
+    with pytest.raises(ValueError):
+        page.links([selector, "a"])
+
+
+@pytest.mark.parametrize("selector", ["li:first-child a", "h4 + a", "h4 ~ a", "ul a, ol a"])
+def test_builtin_rejects_unsupported_syntax(selector):
+    with pytest.raises(ValueError):
+        parse_selector(selector)
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_nested_markup_and_relative_links(backend):
+    html = """
+    <ul class="category2">
+      <li><h4><a href="ae110/"> AE110 <b>1995</b></a></h4>
+        <ul><li><a href="/corolla/ae111/">AE111</a></li></ul>
+      </li>
+      <li><h4><a href="ae112/">AE112</a></h4></li>
+      <li><h4><a>no href</a></h4></li>
+    </ul>
+    """
+
+    _, links = extract_links(html, ["ul.category2 h4 a"], CATALOG_URL + "corolla/", backend)
+
+    assert links == [
+        {"text": "AE110 1995", "href": "https://toyota.epc-data.com/corolla/ae110/"},
+        {"text": "AE112", "href": "https://toyota.epc-data.com/corolla/ae112/"},
+    ]
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_extract_rows(backend):
+    html = """
+    <table class="parts">
+      <tr><th></th></tr>
+      <tr><td>90915-10001</td><td><a href="/p/1/">Oil filter</a></td></tr>
+      <tr><td>17801-22020</td><td>Air filter</td></tr>
+    </table>
+    """
+
+    rows = extract_rows(html, "table.parts tr", CATALOG_URL, backend=backend)
+
+    assert rows == [
+        {"cells": ["90915-10001", "Oil filter"], "href": "https://toyota.epc-data.com/p/1/"},
+        {"cells": ["17801-22020", "Air filter"], "href": None},
+    ]
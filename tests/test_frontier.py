@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from extractors import extract_links
+from frontier import canonicalize_url, dedup_links
+
+ROOT = Path(__file__).resolve().parent.parent
+CATALOG_URL = "https://toyota.epc-data.com/"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("HTTPS://Toyota.EPC-Data.com:443/corolla", "https://toyota.epc-data.com/corolla/"),
+        ("https://toyota.epc-data.com//corolla//ae110/#top", "https://toyota.epc-data.com/corolla/ae110/"),
+        ("https://toyota.epc-data.com/search?b=2&a=1", "https://toyota.epc-data.com/search/?a=1&b=2"),
+        ("https://toyota.epc-data.com/img/logo.png", "https://toyota.epc-data.com/img/logo.png"),
+        ("https://toyota.epc-data.com/a%2fb", "https://toyota.epc-data.com/a%2Fb/"),
+        ("http://example.com:8080", "http://example.com:8080/"),
+    ],
+)
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_canonicalize_relative_url():
+    assert (
+        canonicalize_url("ae110", base="https://toyota.epc-data.com/corolla/")
+        == "https://toyota.epc-data.com/corolla/ae110/"
+    )
+
+
+def test_dedup_links_keeps_original_href():
+    page_url = "https://toyota.epc-data.com/corolla/ae110/"
+    links = [
+        {"text": "Engine", "href": "https://toyota.epc-data.com/corolla/ae110/engine"},
+        {"text": "Engine again", "href": "https://TOYOTA.epc-data.com/corolla/ae110/engine/#top"},
+        {"text": "Home", "href": "https://toyota.epc-data.com/"},
+        {"text": "Self", "href": "https://toyota.epc-data.com/corolla/ae110"},
+        {"text": "Other site", "href": "https://example.com/corolla/ae111/"},
+        {"text": "Corolla", "href": "https://toyota.epc-data.com/corolla/"},
+        {"text": "Search", "href": "https://toyota.epc-data.com/search?b=2&a=1"},
+    ]
+
+    assert dedup_links(links, page_url) == [
+        {"text": "Engine", "href": "https://toyota.epc-data.com/corolla/ae110/engine"},
+        # Ссылка на раздел выше по пути - не навигация
+        {"text": "Corolla", "href": "https://toyota.epc-data.com/corolla/"},
+        {"text": "Search", "href": "https://toyota.epc-data.com/search?b=2&a=1"},
+    ]
+
+
+def test_dedup_links_on_catalog_page():
+    html = (ROOT / "page.html").read_text(encoding="utf-8")
+    expected = json.loads((ROOT / "toyota_jdm_models.json").read_text(encoding="utf-8"))["models"]
+
+    # Запасной селектор захватывает и навигацию, основной - только модели
+    _, fallback = extract_links(html, ["table a[href*='/']"], CATALOG_URL)
+    _, models = extract_links(html, ["ul.category2 h4 a"], CATALOG_URL)
+
+    assert [link["href"] for link in dedup_links(models, CATALOG_URL)] == [
+        model["frame_name_url"] for model in expected
+    ]
+    unique = dedup_links(fallback, CATALOG_URL)
+    hrefs = [link["href"] for link in unique]
+    assert len(set(hrefs)) == len(hrefs)
+    assert CATALOG_URL not in hrefs
+    assert all(link in fallback for link in unique)
+    assert {model["frame_name_url"] for model in expected} <= set(hrefs)
@@ -0,0 +1,146 @@
+import itertools
+import sqlite3
+
+import pytest
+
+import http_cache
+from http_cache import ResponseCache
+
+URL = "https://toyota.epc-data.com/corolla/"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Время обращения растет на секунду при каждом вызове - порядок LRU
+    # не зависит от точности системных часов
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(http_cache.time, "time", lambda: float(next(ticks)))
+
+
+def total_size(cache):
+    return cache._conn.execute("SELECT value FROM cache_meta WHERE key = 'total_size'").fetchone()[0]
+
+
+def stored_size(cache):
+    return cache._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+
+def urls(cache):
+    return sorted(row[0] for row in cache._conn.execute("SELECT url FROM responses"))
+
+
+def test_store_and_get(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.store(URL, "<html>Кузова</html>", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+
+    entry = cache.get(URL)
+
+    assert entry.body == "<html>Кузова</html>"
+    assert entry.is_fresh(3600)
+    assert not entry.is_fresh(0)
+    assert entry.conditional_headers() == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+    }
+    assert cache.get(URL + "missing/") is None
+    cache.close()
+
+
+def test_size_counter_follows_insert_update_delete(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+
+    cache.store(URL, "a" * 10)
+    cache.store(URL + "ae110/", "б" * 10)
+    assert total_size(cache) == stored_size(cache) == 30
+
+    # Новая версия страницы заменяет запись (UPSERT, не REPLACE)
+    cache.store(URL, "a" * 4)
+    assert total_size(cache) == stored_size(cache) == 24
+
+    cache._conn.execute("DELETE FROM responses WHERE url = ?", (URL,))
+    assert total_size(cache) == stored_size(cache) == 20
+    cache.close()
+
+
+def test_counter_is_initialized_for_existing_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.store(URL, "a" * 10)
+    cache.close()
+
+    # Кэш прежней версии: без счетчика и колонки отпечатков
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        DROP TABLE cache_meta;
+        DROP TRIGGER responses_size_insert;
+        DROP TRIGGER responses_size_update;
+        DROP TRIGGER responses_size_delete;
+        ALTER TABLE responses DROP COLUMN fingerprint;
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    cache = ResponseCache(path)
+    assert total_size(cache) == 10
+    assert cache.get_fingerprint(URL) is None
+    cache.store(URL + "ae110/", "a" * 5)
+    assert total_size(cache) == stored_size(cache) == 15
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=25)
+    cache.store(URL + "1/", "a" * 10)
+    cache.store(URL + "2/", "a" * 10)
+    # Попадание в кэш обновляет время обращения (сбрасывается при вытеснении)
+    assert cache.get(URL + "1/") is not None
+
+    cache.store(URL + "3/", "a" * 10)
+
+    assert urls(cache) == [URL + "1/", URL + "3/"]
+    assert total_size(cache) == stored_size(cache) == 20
+    cache.close()
+
+
+def test_access_times_are_flushed_in_batches(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(http_cache, "ACCESS_FLUSH_BATCH", 2)
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.store(URL + "1/", "a")
+    cache.store(URL + "2/", "a")
+
+    def accessed_at(url):
+        return cache._conn.execute("SELECT accessed_at FROM responses WHERE url = ?", (url,)).fetchone()[0]
+
+    stored = accessed_at(URL + "1/")
+    cache.get(URL + "1/")
+    assert accessed_at(URL + "1/") == stored
+    cache.get(URL + "2/")
+    assert accessed_at(URL + "1/") > stored
+
+    cache.get(URL + "1/")
+    cache.close()
+    cache = ResponseCache(path)
+    assert accessed_at(URL + "1/") > accessed_at(URL + "2/")
+    cache.close()
+
+
+def test_parsed_result_and_fingerprint(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    cache.store(URL, "<html></html>")
+    frames = [{"frame_name": "AE110", "frame_url": URL + "ae110/"}]
+
+    cache.store_parsed(URL, frames, "3:abc")
+    assert cache.get_parsed(URL) == frames
+    assert cache.get_fingerprint(URL) == "3:abc"
+
+    # Ревалидация (304) сохраняет разбор, новая версия страницы - сбрасывает
+    cache.touch(URL)
+    assert cache.get_fingerprint(URL) == "3:abc"
+    cache.store(URL, "<html>new</html>")
+    assert cache.get_parsed(URL) is None
+    assert cache.get_fingerprint(URL) is None
+    assert cache.get_fingerprint(URL + "missing/") is None
+    cache.close()
@@ -0,0 +1,110 @@
+import pytest
+
+from conftest import make_model
+from extractors import BACKENDS, ParsedPage
+from incremental import (
+    REASON_CHANGED,
+    REASON_NEW,
+    REASON_REVALIDATE,
+    PageFingerprints,
+    page_fingerprint,
+    plan_incremental,
+)
+
+PAGE_URL = "https://toyota.epc-data.com/corolla/"
+
+NESTED_PAGE = """
+<html><body>
+<div class="banner">Реклама 1</div>
+<ul class="category2">
+  <li><h4>1995-2000</h4>
+    <ul><li><a href="ae110/">AE110</a></li></ul>
+  </li>
+  <li><a href="ae111/">AE111</a></li>
+</ul>
+</body></html>
+"""
+
+
+def fingerprint(html, backend):
+    return page_fingerprint(ParsedPage(html, PAGE_URL, backend))
+
+
+def test_plan_incremental_reasons():
+    previous = {
+        "a": make_model("a", frames=["fa"]),
+        "b": make_model("b", name="Old", frames=["fb"]),
+        "c": make_model("c"),
+        "d": make_model("d", fingerprint="fp"),
+        "gone": make_model("gone", frames=["fg"]),
+    }
+    current = [
+        make_model("a"),
+        make_model("b", name="New"),
+        make_model("c"),
+        make_model("d"),
+        make_model("e"),
+    ]
+
+    plan = plan_incremental(current, previous)
+
+    assert plan["fetch"] == {"b": REASON_CHANGED, "c": REASON_CHANGED, "e": REASON_NEW}
+    # Пустой список кузовов с отпечатком - результат, а не неудача
+    assert set(plan["reuse"]) == {"a", "d"}
+    assert [removed["frame_name_url"] for removed in plan["removed"]] == ["gone"]
+
+
+def test_plan_incremental_revalidate():
+    previous = {"a": make_model("a", frames=["fa"])}
+
+    plan = plan_incremental([make_model("a")], previous, revalidate=True)
+
+    assert plan["fetch"] == {"a": REASON_REVALIDATE}
+    assert plan["reuse"] == {}
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_fingerprint_ignores_content_outside_category2(backend):
+    changed = NESTED_PAGE.replace("Реклама 1", "Реклама 2")
+
+    assert fingerprint(NESTED_PAGE, backend) is not None
+    assert fingerprint(NESTED_PAGE, backend) == fingerprint(changed, backend)
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_fingerprint_covers_list_after_nested_ul(backend):
+    # Кузов после вложенного </ul> - внутри того же .category2
+    changed = NESTED_PAGE.replace("AE111", "AE112")
+
+    assert fingerprint(NESTED_PAGE, backend) != fingerprint(changed, backend)
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_fingerprint_covers_div_category2(backend):
+    page = '<div class="category2"><a href="zn6/">ZN6</a></div>'
+    changed = page.replace("ZN6", "ZN8")
+
+    assert fingerprint(page, backend) is not None
+    assert fingerprint(page, backend) != fingerprint(changed, backend)
+
+
+def test_fingerprint_missing_category2():
+    assert fingerprint("<html><body><p>Нет списка</p></body></html>", None) is None
+
+
+def test_page_fingerprints_match():
+    fp = fingerprint(NESTED_PAGE, None)
+    fingerprints = PageFingerprints(
+        [make_model("a", frames=["fa"], fingerprint=fp), make_model("b", fingerprint=fp), make_model("c")]
+    )
+
+    assert fingerprints.match("a", fp) == [{"frame_name": "fa", "frame_url": "afa/"}]
+    # Совпавший отпечаток страницы без кузовов - пустой список, а не None
+    assert fingerprints.match("b", fp) == []
+    assert fingerprints.match("a", "other") is None
+    assert fingerprints.match("c", fp) is None
+    assert fingerprints.fingerprint("a") == "other"
+
+    summary = fingerprints.summary()
+    assert summary["unchanged"] == 1
+    assert summary["changed_urls"] == ["a"]
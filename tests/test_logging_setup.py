@@ -0,0 +1,49 @@
+import json
+import logging
+import queue
+
+from logging_setup import _DeferredQueueHandler, setup_logging, stop_logging
+
+
+def test_message_is_captured_when_queued():
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger("test_logging_setup.capture")
+    logger.propagate = False
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    models = ["ALLION"]
+
+    logger.warning("Модели: %s", models)
+    # Список меняется, пока запись ждет в очереди
+    models.append("ALPHARD")
+    try:
+        raise KeyError("frames")
+    except KeyError:
+        logger.exception("Ошибка модели %s", models[0])
+
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "Модели: ['ALLION']"
+    assert record.args is None
+
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "Ошибка модели ALLION"
+    assert record.exc_info is None
+    assert "KeyError: 'frames'" in record.exc_text
+
+
+def test_exception_reaches_log_files(tmp_path):
+    logger = setup_logging("test_logging_setup", log_dir=str(tmp_path), json_lines=True, console=False)
+    try:
+        raise ValueError("bad page")
+    except ValueError:
+        logger.exception("Модель %s", "ALLION", extra={"model_url": "https://x/allion/"})
+    stop_logging("test_logging_setup")
+
+    text = (tmp_path / "test_logging_setup.log").read_text(encoding="utf-8")
+    assert "ERROR - Модель ALLION" in text
+    assert "ValueError: bad page" in text
+
+    (line,) = (tmp_path / "test_logging_setup.jsonl").read_text(encoding="utf-8").splitlines()
+    entry = json.loads(line)
+    assert entry["message"] == "Модель ALLION"
+    assert entry["model_url"] == "https://x/allion/"
+    assert "ValueError: bad page" in entry["exception"]
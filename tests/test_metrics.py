@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from metrics import Histogram, RunMetrics, write_metrics
+
+
+def test_prometheus_rendering():
+    metrics = RunMetrics(buckets=(0.1, 1))
+    metrics.observe("phase_seconds", 0.05, phase="http_get")
+    metrics.observe("phase_seconds", 0.5, phase="http_get")
+    metrics.observe("phase_seconds", 2.0, phase="http_get")
+    metrics.count("attempts", engine="http")
+    metrics.count("attempts", 2, engine="http")
+    metrics.count("selector_hits", selector='a[href*="/"]')
+
+    assert metrics.to_prometheus() == (
+        "# TYPE toyota_parser_phase_seconds histogram\n"
+        'toyota_parser_phase_seconds_bucket{phase="http_get",le="0.1"} 1\n'
+        'toyota_parser_phase_seconds_bucket{phase="http_get",le="1"} 2\n'
+        'toyota_parser_phase_seconds_bucket{phase="http_get",le="+Inf"} 3\n'
+        'toyota_parser_phase_seconds_sum{phase="http_get"} 2.550000\n'
+        'toyota_parser_phase_seconds_count{phase="http_get"} 3\n'
+        "# TYPE toyota_parser_attempts_total counter\n"
+        'toyota_parser_attempts_total{engine="http"} 3\n'
+        "# TYPE toyota_parser_selector_hits_total counter\n"
+        'toyota_parser_selector_hits_total{selector="a[href*=\\"/\\"]"} 1\n'
+    )
+
+
+def test_prometheus_groups_label_sets_under_one_type():
+    metrics = RunMetrics()
+    metrics.count("outcomes", outcome="success")
+    metrics.count("outcomes", outcome="empty_list")
+    metrics.count("retries")
+
+    assert metrics.to_prometheus().splitlines() == [
+        "# TYPE toyota_parser_outcomes_total counter",
+        'toyota_parser_outcomes_total{outcome="empty_list"} 1',
+        'toyota_parser_outcomes_total{outcome="success"} 1',
+        "# TYPE toyota_parser_retries_total counter",
+        "toyota_parser_retries_total 1",
+    ]
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(1, 2, 4))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == pytest.approx(1.5)
+    assert histogram.quantile(1.0) == 3.0
+    assert Histogram().quantile(0.5) is None
+    assert histogram.to_dict()["buckets"] == {"1": 1, "2": 3, "4": 4, "+Inf": 4}
+
+
+def test_write_metrics_by_extension(tmp_path):
+    metrics = RunMetrics()
+    with metrics.phase("parse"):
+        pass
+    metrics.count("model_errors")
+
+    write_metrics(metrics, str(tmp_path / "run.prom"))
+    write_metrics(metrics, str(tmp_path / "run.json"))
+
+    assert "toyota_parser_model_errors_total 1" in (tmp_path / "run.prom").read_text(encoding="utf-8")
+    data = json.loads((tmp_path / "run.json").read_text(encoding="utf-8"))
+    assert data["counters"]["model_errors"] == [{"labels": {}, "value": 1}]
+    assert data["histograms"]["phase_seconds"][0]["labels"] == {"phase": "parse"}
+    assert not list(tmp_path.glob("*.tmp"))
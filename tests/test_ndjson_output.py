@@ -0,0 +1,72 @@
+import json
+
+from ndjson_output import NdjsonWriter, finalize_to_json, iter_ndjson
+
+PARSING_INFO = {
+    "timestamp": "2025-01-02T10:00:00",
+    "total_models_processed": 2,
+    "total_frames_found": 1,
+    "start_index": 0,
+    "end_index": 1,
+}
+
+MODELS = [
+    {
+        "name": "ALLION",
+        "frame_name_url": "https://toyota.epc-data.com/allion/",
+        "frames": [{"frame_name": "ZZT240", "frame_url": "https://toyota.epc-data.com/allion/zzt240/"}],
+        "frames_count": 1,
+    },
+    {"name": "Королла", "frame_name_url": "https://toyota.epc-data.com/corolla/", "frames": [], "frames_count": 0},
+]
+
+
+def test_finalize_matches_json_dump(tmp_path):
+    stream = str(tmp_path / "frames.ndjson")
+    output = tmp_path / "frames.json"
+    # Воркеры пишут модели в порядке завершения, а не по индексу
+    with NdjsonWriter(stream) as writer:
+        writer.write({"index": 1, **MODELS[1]})
+        writer.write({"index": 0, **MODELS[0]})
+
+    assert finalize_to_json(stream, str(output), PARSING_INFO) == 2
+
+    # Тот же текст, что json.dump результата целиком (формат до потоковой записи)
+    expected = json.dumps({"parsing_info": PARSING_INFO, "models": MODELS}, indent=2, ensure_ascii=False)
+    assert output.read_text(encoding="utf-8") == expected
+
+
+def test_finalize_empty_stream(tmp_path):
+    stream = tmp_path / "frames.ndjson"
+    stream.write_text("", encoding="utf-8")
+    output = tmp_path / "frames.json"
+
+    assert finalize_to_json(str(stream), str(output), PARSING_INFO) == 0
+
+    assert output.read_text(encoding="utf-8") == json.dumps(
+        {"parsing_info": PARSING_INFO, "models": []}, indent=2, ensure_ascii=False
+    )
+
+
+def test_unfinished_line_is_skipped(tmp_path):
+    stream = tmp_path / "frames.ndjson"
+    with NdjsonWriter(str(stream)) as writer:
+        writer.write({"index": 0, **MODELS[0]})
+    # Запись прервана на середине строки (процесс остановлен)
+    with open(stream, "a", encoding="utf-8") as f:
+        f.write('{"index": 1, "name": "Кор')
+
+    assert [record["name"] for record in iter_ndjson(str(stream))] == ["ALLION"]
+    output = tmp_path / "frames.json"
+    assert finalize_to_json(str(stream), str(output), PARSING_INFO) == 1
+    assert json.loads(output.read_text(encoding="utf-8"))["models"] == MODELS[:1]
+
+
+def test_append_continues_stream(tmp_path):
+    stream = str(tmp_path / "frames.ndjson")
+    with NdjsonWriter(stream) as writer:
+        writer.write({"index": 0})
+    with NdjsonWriter(stream, append=True) as writer:
+        writer.write({"index": 1})
+
+    assert list(iter_ndjson(stream)) == [{"index": 0}, {"index": 1}]
@@ -0,0 +1,102 @@
+import pytest
+
+import rate_limit
+from rate_limit import AdaptiveRateLimiter, PolitenessLimiter
+
+
+class FakeClock:
+    """time.monotonic и time.sleep без реального ожидания"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_requests_are_spaced_by_rate(clock):
+    limiter = PolitenessLimiter(max_in_flight=2, requests_per_second=4)
+
+    for _ in range(3):
+        with limiter:
+            pass
+
+    assert clock.sleeps == [0.25, 0.25]
+
+
+def test_success_increases_rate_up_to_max(clock):
+    limiter = AdaptiveRateLimiter(requests_per_second=1.0, max_rate=1.1, increase_step=0.05)
+
+    limiter.record_success(0.2)
+    assert limiter.requests_per_second == pytest.approx(1.05)
+    limiter.record_success()
+    limiter.record_success()
+    assert limiter.requests_per_second == 1.1
+    assert limiter.stats["increases"] == 2
+
+
+def test_slow_success_keeps_rate(clock):
+    limiter = AdaptiveRateLimiter(requests_per_second=1.0, slow_response=5.0)
+
+    limiter.record_success(6.0)
+
+    assert limiter.requests_per_second == 1.0
+    assert limiter.stats["increases"] == 0
+
+
+def test_failure_decreases_rate_once_per_interval(clock):
+    limiter = AdaptiveRateLimiter(max_in_flight=2, requests_per_second=2.0, min_rate=0.3)
+
+    assert limiter.record_failure()
+    assert limiter.requests_per_second == 1.0
+    # Ошибки запросов, начатых до снижения, частоту повторно не снижают
+    clock.now += 1.5
+    assert not limiter.record_failure()
+    clock.now += 1.0
+    assert limiter.record_failure()
+    assert limiter.requests_per_second == 0.5
+
+    clock.now += 10
+    assert limiter.record_failure()
+    clock.now += 10
+    assert not limiter.record_failure()
+    assert limiter.requests_per_second == 0.3
+    assert limiter.snapshot() == {
+        "requests_per_second": 0.3,
+        "min_requests_per_second": 0.3,
+        "max_requests_per_second": 2.0,
+        "increases": 0,
+        "decreases": 3,
+    }
+
+
+def test_backoff_grows_with_attempt_and_interval(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+    limiter = AdaptiveRateLimiter(requests_per_second=1.0, max_backoff=10.0)
+
+    assert [limiter.backoff(attempt) for attempt in range(4)] == [2.0, 4.0, 8.0, 10.0]
+
+    limiter.record_failure()
+    assert limiter.backoff(0) == 4.0
+
+
+def test_backoff_is_jittered(clock):
+    limiter = AdaptiveRateLimiter(requests_per_second=1.0)
+
+    delays = {limiter.backoff(1) for _ in range(20)}
+
+    assert all(2.0 <= delay <= 4.0 for delay in delays)
+    assert len(delays) > 1
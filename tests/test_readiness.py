@@ -0,0 +1,77 @@
+import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+import readiness
+from readiness import READY_CONTENT, READY_STABLE, READY_TIMEOUT, wait_for_content
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeDriver:
+    """Отдает состояния страницы по порядку, последнее - до конца ожидания"""
+
+    def __init__(self, *states):
+        self.states = list(states)
+        self.calls = 0
+
+    def execute_script(self, script, selector):
+        self.calls += 1
+        state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+        if isinstance(state, Exception):
+            raise state
+        return list(state)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(readiness.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(readiness.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_content_ends_wait_immediately(clock):
+    driver = FakeDriver(("loading", 0, 10, 1), ("interactive", 3, 50, 2))
+
+    assert wait_for_content(driver, "ul.category2 a") == READY_CONTENT
+    assert driver.calls == 2
+    assert clock.now == pytest.approx(0.1)
+
+
+def test_matches_while_loading_are_ignored(clock):
+    driver = FakeDriver(("loading", 2, 10, 1), ("complete", 2, 40, 1))
+
+    assert wait_for_content(driver, "a") == READY_CONTENT
+    assert driver.calls == 2
+
+
+def test_stable_page_without_content(clock):
+    driver = FakeDriver(("interactive", 0, 10, 1), ("complete", 0, 40, 3))
+
+    assert wait_for_content(driver, "a", timeout=20, quiet_period=0.5) == READY_STABLE
+    # Первое неизменное состояние + quiet_period, а не весь timeout
+    assert clock.now == pytest.approx(0.6)
+
+
+def test_changing_page_times_out(clock):
+    states = [("complete", 0, nodes, 1) for nodes in range(100)]
+    driver = FakeDriver(*states)
+
+    assert wait_for_content(driver, "a", timeout=2, quiet_period=0.5) == READY_TIMEOUT
+    assert clock.now == pytest.approx(2.0)
+
+
+def test_page_that_never_loads_raises(clock):
+    driver = FakeDriver(WebDriverException("navigation in progress"))
+
+    with pytest.raises(TimeoutException):
+        wait_for_content(driver, "a", timeout=1)
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import retry_queue
+from retry_queue import DeferredRetryQueue, load_failed_urls, write_failed_models
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Фиксированное время и паузы без случайного разброса
+    now = [1000.0]
+    monkeypatch.setattr(retry_queue.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(retry_queue.random, "uniform", lambda low, high: 1.0)
+    return now
+
+
+def test_items_are_ready_after_cooldown(clock):
+    queue = DeferredRetryQueue(cooldown=30.0)
+
+    assert queue.push("a", "model a")
+    assert queue.pop_ready() == []
+    assert queue.next_ready_in() == 30.0
+
+    clock[0] += 30.0
+    assert queue.pop_ready() == ["model a"]
+    assert len(queue) == 0
+    assert queue.next_ready_in() is None
+
+
+def test_ready_items_come_in_cooldown_order(clock):
+    queue = DeferredRetryQueue(cooldown=10.0, factor=3.0, max_rounds=3)
+    queue.push("a", "a1")
+    queue.push("a", "a2")  # второй круг - пауза 30 сек.
+    clock[0] += 5.0
+    queue.push("b", "b1")  # готова через 10 сек. после постановки
+    queue.push("c", "c1")
+
+    clock[0] += 10.0
+    assert queue.pop_ready() == ["a1", "b1", "c1"]
+    clock[0] += 15.0
+    assert queue.pop_ready() == ["a2"]
+    assert queue.stats == {"deferred": 3, "retried": 1, "exhausted": 0}
+
+
+def test_cooldown_is_capped(clock):
+    queue = DeferredRetryQueue(cooldown=100.0, factor=10.0, max_rounds=3, max_cooldown=300.0)
+    queue.push("a", "a1")
+    queue.pop_ready(force=True)
+
+    queue.push("a", "a2")
+
+    assert queue.next_ready_in() == 300.0
+
+
+def test_rounds_are_limited(clock):
+    queue = DeferredRetryQueue(max_rounds=2)
+
+    assert queue.push("a", "a1")
+    assert queue.push("a", "a2")
+    assert not queue.push("a", "a3")
+    assert queue.rounds("a") == 2
+    assert queue.rounds("b") == 0
+    assert queue.stats["exhausted"] == 1
+
+
+def test_force_returns_everything(clock):
+    queue = DeferredRetryQueue(cooldown=10.0)
+    queue.push("a", "a1")
+    queue.push("b", "b1")
+
+    assert queue.pop_ready(force=True) == ["a1", "b1"]
+    assert len(queue) == 0
+
+
+def test_failed_models_file(tmp_path):
+    path = str(tmp_path / "failed_models.json")
+    models = [{"name": "ALLION", "frame_name_url": "https://x/allion/", "frames": []}]
+
+    write_failed_models(models, path)
+
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["models"] == [{"name": "ALLION", "frame_name_url": "https://x/allion/"}]
+    assert load_failed_urls(path) == {"https://x/allion/"}
+
+    write_failed_models([], path)
+    assert not (tmp_path / "failed_models.json").exists()
@@ -0,0 +1,92 @@
+import sqlite3
+
+from ndjson_output import NdjsonWriter
+from search_index import SearchIndex
+
+
+def part(number, name, frame="ZZE122"):
+    # Запись потока deep_crawl.py: путь по каталогу и строка таблицы деталей
+    return {
+        "path": {"model": "Corolla", "frame": frame, "group": "Engine"},
+        "parts": {"cells": [number, name], "url": f"https://x/parts/{number}/"},
+    }
+
+
+def write_run(path, records):
+    # Каждый запуск deep_crawl.py пишет поток заново (NdjsonWriter без append)
+    with NdjsonWriter(str(path)) as output:
+        for record in records:
+            output.write(record)
+
+
+def indexed_numbers(index):
+    return sorted(item["number"] for item in index.find_parts(limit=1000))
+
+
+def test_appended_lines_are_read_once(tmp_path):
+    stream = tmp_path / "parts.ndjson"
+    write_run(stream, [part("90915-10001", "Oil filter")])
+
+    with SearchIndex(str(tmp_path / "index.sqlite")) as index:
+        assert index.update_parts(str(stream)) == 1
+        with NdjsonWriter(str(stream), append=True) as output:
+            output.write(part("04152-37010", "Oil element"))
+        assert index.update_parts(str(stream)) == 1
+        assert index.update_parts(str(stream)) == 0
+        assert indexed_numbers(index) == ["0415237010", "9091510001"]
+
+
+def test_rerun_with_same_first_record_is_reindexed(tmp_path):
+    stream = tmp_path / "parts.ndjson"
+    index_path = str(tmp_path / "index.sqlite")
+    write_run(stream, [part("90915-10001", "Oil filter"), part("17801-22020", "Air filter")])
+    with SearchIndex(index_path) as index:
+        index.update_parts(str(stream))
+
+    # Повторный запуск: та же первая деталь, остальные изменились,
+    # новый файл длиннее прошлого
+    write_run(
+        stream,
+        [
+            part("90915-10001", "Oil filter"),
+            part("17801-22021", "Air filter element, long description"),
+            part("23300-21010", "Fuel filter"),
+        ],
+    )
+    with SearchIndex(index_path) as index:
+        assert index.update_parts(str(stream)) == 3
+        assert indexed_numbers(index) == ["1780122021", "2330021010", "9091510001"]
+        assert [item["name"] for item in index.find_parts(text="fuel")] == ["Fuel filter"]
+
+
+def test_shorter_rerun_is_reindexed(tmp_path):
+    stream = tmp_path / "parts.ndjson"
+    write_run(stream, [part("90915-10001", "Oil filter"), part("17801-22020", "Air filter")])
+    with SearchIndex(str(tmp_path / "index.sqlite")) as index:
+        index.update_parts(str(stream))
+        write_run(stream, [part("23300-21010", "Fuel filter")])
+
+        assert index.update_parts(str(stream)) == 1
+        assert indexed_numbers(index) == ["2330021010"]
+
+
+def test_index_of_previous_version_is_reindexed(tmp_path):
+    stream = tmp_path / "parts.ndjson"
+    index_path = str(tmp_path / "index.sqlite")
+    write_run(stream, [part("90915-10001", "Oil filter")])
+    with SearchIndex(index_path) as index:
+        index.update_parts(str(stream))
+
+    # Таблица источников прежней версии (хеш первой строки)
+    conn = sqlite3.connect(index_path)
+    conn.execute("DROP TABLE sources")
+    conn.execute(
+        "CREATE TABLE sources (path TEXT PRIMARY KEY, head_hash TEXT NOT NULL,"
+        " offset INTEGER NOT NULL, updated_at REAL NOT NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    with SearchIndex(index_path) as index:
+        assert index.update_parts(str(stream)) == 1
+        assert indexed_numbers(index) == ["9091510001"]
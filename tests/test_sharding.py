@@ -0,0 +1,23 @@
+from sharding import merge_parsing_info
+
+
+def test_merge_parsing_info_sums_stats():
+    merged = merge_parsing_info(
+        [
+            {"timestamp": "2025-01-02T10:00:00", "total_models_processed": 3, "completed_at": "2025-01-02T11:00:00"},
+            {"timestamp": "2025-01-02T09:00:00", "total_models_processed": 2, "completed_at": "2025-01-02T12:00:00"},
+        ]
+    )
+
+    assert merged["timestamp"] == "2025-01-02T09:00:00"
+    assert merged["completed_at"] == "2025-01-02T12:00:00"
+    assert merged["total_models_processed"] == 5
+    assert merged["shards"] == 2
+
+
+def test_merge_parsing_info_without_timestamps():
+    merged = merge_parsing_info([{"total_frames_found": 4}, {}])
+
+    assert merged["timestamp"] is None
+    assert merged["total_frames_found"] == 4
+    assert "completed_at" not in merged
@@ -0,0 +1,69 @@
+import pytest
+
+from conftest import make_model
+from snapshots import KIND_FRAMES, SnapshotStore, apply_changeset, canonical_models
+
+
+OLD = [
+    make_model("https://x/allion/", "Allion", ["ZZT240", "NZT240"]),
+    make_model("https://x/corolla/", "Corolla", ["AE110"]),
+    make_model("https://x/86/", "86", ["ZN6"]),
+    make_model("https://x/mark2/", "Mark II", ["JZX100"]),
+]
+
+NEW = [
+    # Сменилось название и один кузов
+    make_model("https://x/allion/", "Allion II", ["ZZT240", "ZZT245"]),
+    make_model("https://x/corolla/", "Corolla", ["AE110"]),
+    # Сменился URL модели, кузова те же
+    {**make_model("https://x/86/", "86", ["ZN6"]), "frame_name_url": "https://x/gt86/"},
+    make_model("https://x/crown/", "Crown", ["JZS171"]),
+]
+
+
+@pytest.fixture
+def changeset(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    store.save({"models": OLD}, KIND_FRAMES)
+    _, changeset = store.save({"models": NEW}, KIND_FRAMES)
+    return changeset
+
+
+def test_diff_summary(changeset):
+    changes = changeset["changes"]
+
+    assert changeset["summary"] == {
+        "models_added": 1,
+        "models_removed": 1,
+        "models_renamed": 2,
+        "models_with_frame_changes": 1,
+    }
+    assert [item["frame_name_url"] for item in changes["models"]["added"]] == ["https://x/crown/"]
+    assert changes["models"]["removed"] == ["https://x/mark2/"]
+    assert {"url": "https://x/gt86/", "old_url": "https://x/86/", "name": "86", "old_name": "86"} in (
+        changes["models"]["renamed"]
+    )
+
+
+def test_apply_changeset_round_trip(changeset):
+    result = apply_changeset(OLD, changeset)
+
+    assert canonical_models(result) == canonical_models(NEW)
+    allion = next(item for item in result if item["frame_name_url"] == "https://x/allion/")
+    assert allion["frames_count"] == 2
+
+
+def test_apply_changeset_to_other_version(changeset):
+    with pytest.raises(ValueError):
+        apply_changeset(NEW, changeset)
+
+
+def test_unchanged_content_is_not_a_new_version(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    first, _ = store.save({"models": OLD}, KIND_FRAMES)
+    # Порядок моделей не влияет на содержимое
+    second, changeset = store.save({"models": list(reversed(OLD))}, KIND_FRAMES)
+
+    assert second == first
+    assert changeset is None
+    assert len(store.list(KIND_FRAMES)) == 1